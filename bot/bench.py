@@ -0,0 +1,771 @@
+"""Offline benchmarks.
+
+Run from the ``bot`` directory, like the bot itself::
+
+    python bench.py --turns 20
+    python bench.py --suite
+    python bench.py --suite --save-baseline
+    python bench.py --backends
+    python bench.py --matching
+    python bench.py --dealing --deals 1_000_000
+    python bench.py --opponent --games 50
+    python bench.py --edits --games 50 --turns 10
+    python bench.py --render-cache --games 20 --cache-bytes 33554432
+    python bench.py --formats
+    python bench.py --memory
+    python bench.py --database
+    python bench.py --stream
+    python bench.py --snapshots
+    python bench.py --logging
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import random
+import re
+import statistics
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import aclosing, nullcontext
+from io import BytesIO
+from logging.handlers import QueueListener
+from pathlib import Path
+from typing import TYPE_CHECKING, Self
+
+import aiosqlite
+from cogs.chess import Board, Dot, GameDifficulty, GameFlow, NumberStatus, Player, deal_numbers
+from utils import array_renderer
+from utils.database import DatabasePool
+from utils.encoder import FILENAMES, encode_animation
+from utils.logging_utils import FORMATTER, LOGGER, DroppingQueueHandler, log, logging_stats
+from utils.metrics import METRICS
+from utils.opponent import MAX_HORIZON, OPPONENT_BUDGET, Opponent, Solver
+from utils.render_cache import render_cache
+from utils.snapshots import SnapshotStore
+from utils.testing import (
+    FakeMessage,
+    legacy_all_found,
+    legacy_match,
+    make_board,
+    measure_peak,
+    play_edit_games,
+    play_rendered_game,
+    play_turn,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from PIL import Image
+    from utils.message_edits import EditScheduler
+
+BENCH_BASELINE = Path(__file__).with_name("bench_baseline.json")
+SUITE_CASES = ("visible", "hidden", "game")
+PROC_SELF = Path("/proc/self")
+
+
+def bench_turns(
+    difficulty: GameDifficulty, turns: int, *, incremental: bool, backend: str = "pil"
+) -> tuple[list[float], list[float]]:
+    """Return the compositing and GIF encoding times of the hidden render of every turn."""
+    board = make_board(difficulty)
+    board.render_backend = backend
+    board._render_image(NumberStatus.HIDDEN)  # noqa: SLF001
+
+    composite_times, encode_times = [], []
+    for _ in range(turns):
+        play_turn(board)
+        if not incremental:
+            board.invalidate_frames()
+
+        start = time.perf_counter()
+        board._render_frames(NumberStatus.HIDDEN)  # noqa: SLF001
+        composite_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        board._render_image(NumberStatus.HIDDEN)  # noqa: SLF001
+        encode_times.append(time.perf_counter() - start)
+
+    return composite_times, encode_times
+
+
+def report_backends(turns: int, seed: int) -> None:
+    """Print the per-turn compositing time of the render backends, the tests check they draw the same pixels."""
+    if not array_renderer.array_backend("numpy"):
+        print("NumPy is not installed, only the pil backend is available")
+        return
+
+    print(f"{'Difficulty':<10} {'Mode':<12} {'PIL (ms)':>9} {'NumPy (ms)':>11} {'Speedup':>8}")
+    for difficulty in GameDifficulty:
+        for incremental in (False, True):
+            composite = {}
+            for backend in ("pil", "numpy"):
+                random.seed(seed)
+                composite_times, _ = bench_turns(difficulty, turns, incremental=incremental, backend=backend)
+                composite[backend] = statistics.median(composite_times) * 1000
+
+            mode = "incremental" if incremental else "full redraw"
+            print(
+                f"{difficulty.name:<10} {mode:<12} {composite['pil']:>9.2f} {composite['numpy']:>11.2f} "
+                f"{composite['pil'] / composite['numpy']:>7.2f}x"
+            )
+
+
+def encode_legacy(frames: list[Image.Image]) -> bytes:
+    """Encode the frames like boards used to, as independently quantised full GIF frames."""
+    buffer = BytesIO()
+    frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:], duration=400, loop=0)
+    return buffer.getvalue()
+
+
+def bench_formats(
+    difficulty: GameDifficulty, numbers_visible: NumberStatus, repeat: int
+) -> dict[str, tuple[int, float]]:
+    """Return the size and median encoding time of a board render in every image format."""
+    board = make_board(difficulty)
+    frames = board._render_frames(numbers_visible)  # noqa: SLF001
+
+    encoders = {"legacy gif": encode_legacy}
+    encoders.update({image_format: (lambda f, i=image_format: encode_animation(f, i)) for image_format in FILENAMES})
+
+    results = {}
+    for name, encoder in encoders.items():
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = encoder(frames)
+            times.append(time.perf_counter() - start)
+        results[name] = (len(data), statistics.median(times))
+
+    return results
+
+
+def report_formats(repeat: int) -> None:
+    """Print the size and encoding time comparison of the image formats."""
+    print(f"{'Difficulty':<10} {'Numbers':<8} {'Format':<11} {'Size (KiB)':>11} {'Encode (ms)':>12}")
+    for difficulty in GameDifficulty:
+        for numbers_visible in NumberStatus:
+            for name, (size, encode_time) in bench_formats(difficulty, numbers_visible, repeat).items():
+                print(
+                    f"{difficulty.name:<10} {numbers_visible.name:<8} {name:<11} {size / 1024:>11.1f} "
+                    f"{encode_time * 1000:>12.2f}"
+                )
+
+
+def report_turns(turns: int, seed: int) -> None:
+    """Print the per-turn render time comparison of full and incremental redraws."""
+    print(f"{'Difficulty':<10} {'Mode':<12} {'Composite (ms)':>15} {'Encode (ms)':>12} {'Turn (ms)':>10}")
+    for difficulty in GameDifficulty:
+        for incremental in (False, True):
+            random.seed(seed)
+            composite_times, encode_times = bench_turns(difficulty, turns, incremental=incremental)
+            composite = statistics.median(composite_times) * 1000
+            encode = statistics.median(encode_times) * 1000
+            mode = "incremental" if incremental else "full redraw"
+            print(f"{difficulty.name:<10} {mode:<12} {composite:>15.2f} {encode:>12.2f} {composite + encode:>10.2f}")
+
+
+def winning_picks(board: Board) -> list[tuple[int, int, int, int]]:
+    """Return picks matching a pair every turn until the game is won, without moving the rafts."""
+    board = board.copy()
+    picks = []
+    while not board.all_found:
+        tile = next(tile for tile in board.active_tiles if not tile.all_found)
+        picks.append((tile.num, 0, *board.find_pair(tile.num, 0)))
+        board.match_dots(*picks[-1])
+    return picks
+
+
+def time_matching(board: Board, match: Callable[..., tuple[bool, Dot, Dot]], won: Callable[[Board], bool]) -> float:
+    """Return the time to play the winning picks of a board, a match then a win check per turn."""
+    picks = winning_picks(board)
+    start = time.perf_counter()
+    for tile1, dot1, tile2, dot2 in picks:
+        match(board, tile1, dot1, tile2, dot2)
+        won(board)
+    return time.perf_counter() - start
+
+
+def report_matching(games: int, seed: int) -> None:
+    """Print the time of a match and a win check with the pair index and with the old scan of every stone."""
+    print(f"{'Difficulty':<10} {'Games':>6} {'Index (us)':>11} {'Legacy (us)':>12}")
+    for difficulty in GameDifficulty:
+        dealt = [make_board(difficulty, seed + game) for game in range(games)]
+        index_time = legacy_time = 0.0
+        for board in dealt:
+            index_time += time_matching(board.copy(), Board.match_dots, lambda board: board.all_found)
+            legacy_time += time_matching(board.copy(), legacy_match, legacy_all_found)
+        pairs = games * len(dealt[0]._stones) // 2  # noqa: SLF001
+        print(f"{difficulty.name:<10} {games:>6} {index_time / pairs * 1e6:>11.2f} {legacy_time / pairs * 1e6:>12.2f}")
+
+
+def time_dealing(difficulty: GameDifficulty, seeds: range) -> tuple[float, float]:
+    """Deal the numbers of a board for every seed, run on the worker processes.
+
+    Return the total and the longest time of a deal.
+    """
+    LOGGER.setLevel(logging.WARNING)
+    tiles = Board(0, difficulty.value, [Player(user=None)])._total_spaces - 1  # noqa: SLF001
+    total = longest = 0.0
+    for seed in seeds:
+        rng = random.Random(seed)  # noqa: S311
+        start = time.perf_counter()
+        deal_numbers(rng, tiles, difficulty.value)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        longest = max(longest, elapsed)
+
+    return total, longest
+
+
+def report_dealing(deals: int, seed: int, workers: int) -> None:
+    """Print the mean and the longest time to deal a board."""
+    print(f"{'Difficulty':<10} {'Deals':>10} {'Mean (us)':>10} {'Max (us)':>9} {'Wall (s)':>9}")
+    chunk_size = max(1, min(50_000, deals // (workers * 16)))
+    for difficulty in GameDifficulty:
+        total = longest = 0.0
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = [
+                executor.submit(time_dealing, difficulty, range(first, min(first + chunk_size, seed + deals)))
+                for first in range(seed, seed + deals, chunk_size)
+            ]
+            for chunk in chunks:
+                chunk_total, chunk_longest = chunk.result()
+                total += chunk_total
+                longest = max(longest, chunk_longest)
+
+        print(
+            f"{difficulty.name:<10} {deals:>10} {total / deals * 1e6:>10.2f} {longest * 1e6:>9.0f} "
+            f"{time.perf_counter() - start:>9.1f}"
+        )
+
+
+def time_decisions(difficulty: GameDifficulty, games: int, seed: int, solver: Solver) -> tuple[list[float], list[int]]:
+    """Let the bot play every turn of some games, return the time and the search depth of its decisions."""
+    flow = GameFlow()
+    latencies, depths = [], []
+    for game in range(games):
+        board = make_board(difficulty, seed + game)
+        board.opponent = Opponent(random.Random(seed + game), board.num_stones, solver=solver)  # noqa: S311
+        board.opponent.start(board.hidden_stones)
+        with METRICS.capture() as samples:
+            while not board.all_found:
+                flow.bot_turn(board)
+                depths.append(board.opponent.last_depth)
+        latencies.extend(seconds for phase, seconds in samples if phase == "opponent.decide")
+
+    return latencies, depths
+
+
+def report_opponent(games: int, seed: int) -> None:
+    """Print the decision time of the bot, with an empty transposition table then with the one it filled."""
+    print(
+        f"{'Difficulty':<10} {'Table':<6} {'Decisions':>10} {'p50 (us)':>9} {'p99 (us)':>9} {'Max (ms)':>9} "
+        f"{'Cut short':>10} {'Min depth':>10}"
+    )
+    for difficulty in GameDifficulty:
+        solver = Solver()
+        for table in ("cold", "warm"):
+            latencies, depths = time_decisions(difficulty, games, seed, solver)
+            percentiles = statistics.quantiles(latencies, n=100)
+            cut_short = sum(depth < MAX_HORIZON for depth in depths)
+            print(
+                f"{difficulty.name:<10} {table:<6} {len(latencies):>10} {percentiles[49] * 1e6:>9.0f} "
+                f"{percentiles[98] * 1e6:>9.0f} {max(latencies) * 1000:>9.1f} {cut_short:>10} {min(depths):>10}"
+            )
+
+    print(f"Budget: {OPPONENT_BUDGET:.0f}ms, a search cut short keeps the move of the deepest horizon it finished")
+
+
+def report_render_cache(games: int, seed: int, budget: int) -> None:
+    """Render the games of every difficulty through a cache of ``budget`` bytes, print its hit rate and memory."""
+    print(
+        f"{'Difficulty':<10} {'Renders':>8} {'Hits':>6} {'Hit rate':>9} {'Miss (ms)':>10} {'Hit (us)':>9} "
+        f"{'Entries':>8} {'Memory (KiB)':>13}"
+    )
+    render_cache.resize(budget)
+    for difficulty in GameDifficulty:
+        render_cache.clear()
+        hit_times, miss_times = [], []
+        for game in range(games):
+            for status, board in play_rendered_game(difficulty, seed + game):
+                hits = render_cache.stats.hits
+                start = time.perf_counter()
+                board._generate_board_img(status)  # noqa: SLF001
+                elapsed = time.perf_counter() - start
+                if render_cache.stats.hits == hits:
+                    miss_times.append(elapsed)
+                else:
+                    hit_times.append(elapsed)
+
+        renders = len(hit_times) + len(miss_times)
+        print(
+            f"{difficulty.name:<10} {renders:>8} {len(hit_times):>6} {len(hit_times) / renders:>9.1%} "
+            f"{statistics.fmean(miss_times) * 1000:>10.1f} {statistics.fmean(hit_times or [0]) * 1e6:>9.0f} "
+            f"{len(render_cache):>8} {render_cache.memory / 1024:>13.0f}"
+        )
+
+    print(render_cache)
+
+
+async def bench_edits(
+    games: int, turns: int, channels: int, *, scheduled: bool, rate: int, per: float
+) -> tuple[float, int, list[FakeMessage], EditScheduler | None]:
+    """Play games on fake messages, return the wall time, the edits Discord would have refused and the messages."""
+    start = time.perf_counter()
+    messages, fake_channels, scheduler = await play_edit_games(
+        games, turns, channels, scheduled=scheduled, rate=rate, per=per
+    )
+    wall = time.perf_counter() - start
+    return wall, sum(channel.refused for channel in fake_channels), messages, scheduler
+
+
+async def report_edits(games: int, turns: int, channels: int) -> None:
+    """Print how many edits of games are sent one by one and through the scheduler, and how long the games took."""
+    rate, per = 5, 0.2  # Discord's 5 edits per 5 seconds of a channel, 25 times faster
+    print(
+        f"{'Edits':<10} {'Requested':>10} {'Sent':>6} {'Saved':>6} {'Refused':>8} {'Max wait (ms)':>14} "
+        f"{'Wall (s)':>9}"
+    )
+    direct_wall, direct_refused, direct, _ = await bench_edits(
+        games, turns, channels, scheduled=False, rate=rate, per=per
+    )
+    sent = sum(len(message.history) for message in direct)
+    print(f"{'direct':<10} {sent:>10} {sent:>6} {0:>6} {direct_refused:>8} {'':>14} {direct_wall:>9.2f}")
+
+    wall, refused, _, scheduler = await bench_edits(games, turns, channels, scheduled=True, rate=rate, per=per)
+    stats = scheduler.stats
+    print(
+        f"{'scheduled':<10} {stats.requested:>10} {stats.sent:>6} {stats.saved:>6} {refused:>8} "
+        f"{stats.max_wait * 1000:>14.0f} {wall:>9.2f}"
+    )
+
+
+def report_memory(boards: int) -> None:
+    """Print the memory held by the game state of a dealt board, without its rendered frames."""
+    print(f"{'Difficulty':<10} {'State (KiB)':>12} {'Snapshot (B)':>13}")
+    for difficulty in GameDifficulty:
+        make_board(difficulty)  # Load the assets outside of the measurement
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        dealt = [make_board(difficulty) for _ in range(boards)]
+        state = (tracemalloc.get_traced_memory()[0] - before) / boards
+        tracemalloc.stop()
+
+        print(f"{difficulty.name:<10} {state / 1024:>12.2f} {len(dealt[0].snapshot()):>13}")
+
+
+def proc_memory(field: str) -> int:
+    """Return a memory counter of the process from ``/proc``, in bytes."""
+    match = re.search(rf"^{field}:\s+(\d+) kB", (PROC_SELF / "status").read_text(), re.MULTILINE)
+    return int(match.group(1)) * 1024
+
+
+class PeakMemory:
+    """Measure the peak memory growth of a block.
+
+    On Linux this is the growth of the resident set, which includes the pixel buffers Pillow allocates in C, elsewhere
+    only the Python allocations traced by ``tracemalloc`` are seen.
+    """
+
+    def __init__(self) -> None:
+        self.peak = 0
+        self._start = 0
+        self._resident = False
+
+    def __enter__(self) -> Self:
+        gc.collect()
+        try:
+            (PROC_SELF / "clear_refs").write_text("5")  # Reset the resident set peak to its current size
+            self._start = proc_memory("VmRSS")
+            self._resident = True
+        except OSError:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        if self._resident:
+            self.peak = proc_memory("VmHWM") - self._start
+        else:
+            self.peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+
+def run_case(difficulty: GameDifficulty, case: str, *, seed: int, measure_memory: bool = False) -> dict[str, float]:
+    """Render a case of the suite on a freshly dealt board, return its time, peak memory and output size.
+
+    ``visible`` and ``hidden`` are the first render of a board, ``game`` is every hidden render of a game played to
+    the end, one per turn.
+    """
+    random.seed(seed)
+    board = make_board(difficulty)
+
+    with PeakMemory() if measure_memory else nullcontext() as memory:
+        start = time.perf_counter()
+        if case == "game":
+            size = len(board._render_image(NumberStatus.HIDDEN))  # noqa: SLF001
+            while not board.all_found:
+                play_turn(board)
+                size += len(board._render_image(NumberStatus.HIDDEN))  # noqa: SLF001
+        else:
+            size = len(board._render_image(NumberStatus[case.upper()]))  # noqa: SLF001
+        elapsed = time.perf_counter() - start
+
+    return {"time": elapsed, "peak": memory.peak if measure_memory else 0, "bytes": size}
+
+
+def measure_case_memory(difficulty: GameDifficulty, case: str, seed: int) -> int:
+    """Return the peak memory growth of a case, after a first run loaded the assets and filled the sprite cache."""
+    LOGGER.setLevel(logging.WARNING)
+    run_case(difficulty, case, seed=seed)
+    return run_case(difficulty, case, seed=seed, measure_memory=True)["peak"]
+
+
+def bench_suite(seed: int, repeat: int) -> dict[str, dict[str, float]]:
+    """Return the median time, the peak memory and the output size of every case of every difficulty."""
+    results = {}
+    for difficulty in GameDifficulty:
+        for case in SUITE_CASES:
+            run_case(difficulty, case, seed=seed)  # Load the assets and fill the sprite cache beforehand
+            runs = [run_case(difficulty, case, seed=seed) for _ in range(repeat)]
+            results[f"{difficulty.name.lower()}.{case}"] = {
+                **runs[0],
+                "time": statistics.median(r["time"] for r in runs),
+            }
+
+    # Every memory measurement runs in a new process, with large buffers always mapped on their own. Otherwise the
+    # allocator hands back memory freed by earlier renders and the peak changes from one run to the next.
+    os.environ["MALLOC_MMAP_THRESHOLD_"] = "65536"
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context, max_tasks_per_child=1) as executor:
+        peaks = {
+            f"{difficulty.name.lower()}.{case}": executor.submit(measure_case_memory, difficulty, case, seed)
+            for difficulty in GameDifficulty
+            for case in SUITE_CASES
+        }
+        for name, peak in peaks.items():
+            results[name]["peak"] = peak.result()
+    del os.environ["MALLOC_MMAP_THRESHOLD_"]
+
+    return results
+
+
+def report_suite(seed: int, repeat: int, threshold: float, *, save: bool) -> int:
+    """Print the suite results against the baseline, return 1 if any of them regressed beyond the threshold.
+
+    With ``save`` the results replace the baseline instead of failing.
+    """
+    results = bench_suite(seed, repeat)
+    baseline = {}
+    if BENCH_BASELINE.exists():
+        stored = json.loads(BENCH_BASELINE.read_text(encoding="utf-8"))
+        if stored["seed"] == seed:
+            baseline = stored["results"]
+        else:
+            print(f"The baseline was measured with seed {stored['seed']}, not {seed}, it is not compared")
+
+    regressions = []
+    print(
+        f"{'Case':<15} {'Time (ms)':>10} {'Change':>8} {'Peak (KiB)':>11} {'Change':>8} {'Size (KiB)':>11} "
+        f"{'Change':>8}"
+    )
+    for name, result in results.items():
+        row = f"{name:<15}"
+        for metric, scale, width in (("time", 1000, 10), ("peak", 1 / 1024, 11), ("bytes", 1 / 1024, 11)):
+            row += f" {result[metric] * scale:>{width}.1f}"
+            if name in baseline and baseline[name][metric]:
+                change = result[metric] / baseline[name][metric] - 1
+                row += f" {change:>+8.0%}"
+                if change > threshold:
+                    regressions.append(f"{name} {metric}")
+            else:
+                row += f" {'-':>8}"
+        print(row)
+
+    if save:
+        BENCH_BASELINE.write_text(json.dumps({"seed": seed, "results": results}, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {BENCH_BASELINE.name}")
+    elif regressions:
+        print(f"Regressed by more than {threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+class LegacyDatabase:
+    """Queries the way the bot used to run them, on a new connection every time."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    async def execute(self, query: str, *values: object) -> None:
+        """Execute a query and commit it."""
+        async with aiosqlite.connect(self.path) as db:
+            await db.execute(query, values)
+            await db.commit()
+
+    async def fetchval(self, query: str, *values: object) -> object:
+        """Fetch the first value of the first row."""
+        async with aiosqlite.connect(self.path) as db, db.execute(query, values) as cur:
+            row = await cur.fetchone()
+        return row[0] if row else None
+
+
+async def bench_database(
+    database: LegacyDatabase | DatabasePool, queries: int, concurrency: int
+) -> tuple[float, float]:
+    """Return the writes and reads per second of a database, with a number of queries in flight at once."""
+    await database.execute("CREATE TABLE IF NOT EXISTS scores (user_id INTEGER PRIMARY KEY, score INTEGER)")
+
+    async def run(make_query: Callable[[int], Awaitable[object]]) -> float:
+        start = time.perf_counter()
+        for offset in range(0, queries, concurrency):
+            await asyncio.gather(*(make_query(i) for i in range(offset, min(offset + concurrency, queries))))
+        return queries / (time.perf_counter() - start)
+
+    writes = await run(lambda i: database.execute("INSERT OR REPLACE INTO scores VALUES (?, ?)", i, i))
+    if isinstance(database, DatabasePool):
+        start = time.perf_counter()
+        await database.flush()
+        writes = queries / (queries / writes + time.perf_counter() - start)
+    reads = await run(lambda i: database.fetchval("SELECT score FROM scores WHERE user_id = ?", i))
+    return writes, reads
+
+
+async def bench_cache(pool: DatabasePool, queries: int, guilds: int = 50, write_every: int = 10) -> float:
+    """Return the lookups per second of per-guild settings, with a score written every few lookups."""
+    await pool.execute("CREATE TABLE IF NOT EXISTS settings (guild_id INTEGER PRIMARY KEY, difficulty INTEGER)")
+    await pool.execute("CREATE TABLE IF NOT EXISTS scores (user_id INTEGER PRIMARY KEY, score INTEGER)")
+    await pool.executemany("INSERT OR REPLACE INTO settings VALUES (?, ?)", [(i, i % 3) for i in range(guilds)])
+
+    start = time.perf_counter()
+    for i in range(queries):
+        if i % write_every == 0:
+            await pool.execute("INSERT OR REPLACE INTO scores VALUES (?, ?)", i, i)
+        await pool.fetchval("SELECT difficulty FROM settings WHERE guild_id = ?", i % guilds)
+    return queries / (time.perf_counter() - start)
+
+
+async def report_database(queries: int) -> None:
+    """Print the queries per second of a connection per query, of the connection pool and of queued writes."""
+    print(f"{'Database':<8} {'Concurrency':>11} {'Writes/s':>9} {'Reads/s':>9}")
+    for concurrency in (1, 8):
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy = LegacyDatabase(str(Path(tmp) / "legacy.sqlite"))
+            writes, reads = await bench_database(legacy, queries, concurrency)
+            print(f"{'legacy':<8} {concurrency:>11} {writes:>9.0f} {reads:>9.0f}")
+
+            pool = DatabasePool(str(Path(tmp) / "pool.sqlite"))
+            writes, reads = await bench_database(pool, queries, concurrency)
+            await pool.close()
+            print(f"{'pool':<8} {concurrency:>11} {writes:>9.0f} {reads:>9.0f}")
+
+            queued = DatabasePool(str(Path(tmp) / "queued.sqlite"), write_behind=True)
+            writes, reads = await bench_database(queued, queries, concurrency)
+            await queued.close()
+            print(f"{'queued':<8} {concurrency:>11} {writes:>9.0f} {reads:>9.0f}    {queued.write_stats}")
+
+    print(f"\n{'Cache':<8} {'Lookups/s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for cache_size in (0, 256):
+            pool = DatabasePool(str(Path(tmp) / f"cache{cache_size}.sqlite"), cache_size=cache_size)
+            lookups = await bench_cache(pool, queries * 4)
+            await pool.close()
+            print(f"{cache_size:<8} {lookups:>9.0f}    {pool.cache}")
+
+
+async def report_stream(rows: int, chunk_size: int) -> None:
+    """Print the peak memory of reading a large table at once and as a stream."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = DatabasePool(str(Path(tmp) / "stream.sqlite"), size=1)
+        await pool.execute("CREATE TABLE games (id INTEGER PRIMARY KEY, player INTEGER, score INTEGER, moves TEXT)")
+        await pool.executemany(
+            "INSERT INTO games VALUES (?, ?, ?, ?)", ((i, i % 97, i % 13, "x" * 32) for i in range(rows))
+        )
+        query = "SELECT * FROM games"
+
+        async def fetch_all() -> int:
+            return len(await pool.fetch(query))
+
+        async def stream_all() -> int:
+            read = 0
+            async for _ in pool.stream(query, chunk_size=chunk_size):
+                read += 1
+            return read
+
+        async def stream_early_exit() -> int:
+            read = 0
+            async with aclosing(pool.stream(query, chunk_size=chunk_size)) as stream:
+                async for _ in stream:
+                    read += 1
+                    if read == chunk_size * 2:
+                        break
+            return read
+
+        print(f"{'Read':<18} {'Rows':>8} {'Peak (KiB)':>11}")
+        for name, consume in (("fetch", fetch_all), ("stream", stream_all), ("stream, early exit", stream_early_exit)):
+            read, peak = await measure_peak(consume)
+            print(f"{name:<18} {read:>8} {peak / 1024:>11.1f}")
+
+        await pool.close()
+
+
+async def report_snapshots(games: int, turns: int) -> None:
+    """Print the size and write cost of game snapshots and the time to resume a game from one."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = DatabasePool(str(Path(tmp) / "snapshots.sqlite"))
+        store = SnapshotStore(pool, flush_delay=0)
+
+        print(f"{'Difficulty':<10} {'Record (B)':>10} {'Flush (ms)':>11} {'Resume (ms)':>12}")
+        for difficulty in GameDifficulty:
+            boards = [make_board(difficulty) for _ in range(games)]
+            for i, board in enumerate(boards):
+                board._msg_id = i  # noqa: SLF001
+                for _ in range(turns):
+                    play_turn(board)
+                store.save(board.msg_id, board.game_record())
+
+            start = time.perf_counter()
+            await store.flush()
+            flush_time = time.perf_counter() - start
+
+            # A new game flow has nothing in memory, like after a restart
+            game_flow = GameFlow()
+            game_flow.snapshots = store
+            resume_times = []
+            for board in boards:
+                start = time.perf_counter()
+                resumed = await game_flow.get_board(board.msg_id, None)
+                resume_times.append(time.perf_counter() - start)
+                assert resumed.snapshot() == board.snapshot()  # noqa: S101
+
+            record_size = len(boards[0].game_record())
+            resume = statistics.median(resume_times) * 1000
+            print(f"{difficulty.name:<10} {record_size:>10} {flush_time * 1000:>11.2f} {resume:>12.3f}")
+
+        print(store)
+        await pool.close()
+
+
+def bench_logging(logger: logging.Logger, records: int, level: str) -> float:
+    """Return the time a ``log`` call takes the caller, in microseconds."""
+    start = time.perf_counter()
+    for i in range(records):
+        log(i, "Bench", "Turn %s ended: %s", i, (i, i + 1), level=level, logger=logger)
+    return (time.perf_counter() - start) / records * 1_000_000
+
+
+def report_logging(records: int) -> None:
+    """Print the cost of a log call writing to a console and a file directly and through the queue."""
+    with tempfile.TemporaryDirectory() as tmp, Path(os.devnull).open("w") as console:
+        file_handler = logging.FileHandler(Path(tmp) / "bench.log")
+        file_handler.setFormatter(FORMATTER)
+        console_handler = logging.StreamHandler(console)
+
+        direct = logging.getLogger("bench.direct")
+        direct.propagate = False
+        direct.addHandler(console_handler)
+        direct.addHandler(file_handler)
+
+        queue_handler = DroppingQueueHandler(queue.Queue(records))
+        queued = logging.getLogger("bench.queued")
+        queued.propagate = False
+        queued.addHandler(queue_handler)
+        listener = QueueListener(queue_handler.queue, console_handler, file_handler)
+        listener.start()
+
+        print(f"{'Logger':<8} {'Level':<6} {'Logger level':<13} {'Call (us)':>10}")
+        for logger_level in (logging.DEBUG, logging.INFO):
+            for name, logger in (("direct", direct), ("queued", queued)):
+                logger.setLevel(logger_level)
+                call = bench_logging(logger, records, "DEBUG")
+                print(f"{name:<8} {'DEBUG':<6} {logging.getLevelName(logger_level):<13} {call:>10.2f}")
+
+        print(f"Queue before draining: {logging_stats(queued)}")
+        listener.stop()
+        file_handler.close()
+
+
+def run_report(args: argparse.Namespace) -> int | None:
+    """Run the benchmark asked for, return the exit status of the ones that compare their results with a baseline."""
+    reports = {
+        "edits": lambda: asyncio.run(report_edits(args.games, args.turns, args.channels)),
+        "render_cache": lambda: report_render_cache(args.games, args.seed, args.cache_bytes),
+        "suite": lambda: report_suite(args.seed, args.repeat, args.threshold, save=args.save_baseline),
+        "save_baseline": lambda: report_suite(args.seed, args.repeat, args.threshold, save=True),
+        "formats": lambda: report_formats(args.repeat),
+        "backends": lambda: report_backends(args.turns, args.seed),
+        "memory": lambda: report_memory(args.boards),
+        "database": lambda: asyncio.run(report_database(args.queries)),
+        "stream": lambda: asyncio.run(report_stream(args.rows, args.chunk_size)),
+        "snapshots": lambda: asyncio.run(report_snapshots(args.games, args.turns)),
+        "logging": lambda: report_logging(args.records),
+        "dealing": lambda: report_dealing(args.deals, args.seed, args.workers),
+        "matching": lambda: report_matching(args.games, args.seed),
+        "opponent": lambda: report_opponent(args.games, args.seed),
+    }
+    for mode, report in reports.items():
+        if getattr(args, mode):
+            return report()
+    return report_turns(args.turns, args.seed)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description="Offline render benchmarks.")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--formats", action="store_true", help="compare the image formats instead")
+    parser.add_argument("--memory", action="store_true", help="measure the memory of the game state instead")
+    parser.add_argument("--boards", type=int, default=200)
+    parser.add_argument("--database", action="store_true", help="measure the database queries per second instead")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--stream", action="store_true", help="measure the peak memory of streamed reads instead")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--snapshots", action="store_true", help="measure the game snapshots instead")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--logging", action="store_true", help="measure the cost of a log call instead")
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--suite", action="store_true", help="run the render suite against the baseline instead")
+    parser.add_argument("--save-baseline", action="store_true", help="store the suite results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="regression allowed before the suite fails")
+    parser.add_argument("--backends", action="store_true", help="compare the pil and numpy render backends instead")
+    parser.add_argument("--matching", action="store_true", help="time matching with the pair index instead")
+    parser.add_argument("--dealing", action="store_true", help="time dealing many boards instead")
+    parser.add_argument("--deals", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--opponent", action="store_true", help="time the decisions of the bot instead")
+    parser.add_argument("--edits", action="store_true", help="count the merged message edits instead")
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--render-cache", action="store_true", help="measure the render cache instead")
+    parser.add_argument("--cache-bytes", type=int, default=32 * 1024 * 1024)
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Run the benchmarks."""
+    args = parse_args()
+
+    LOGGER.setLevel(logging.WARNING)
+
+    random.seed(args.seed)
+    status = run_report(args)
+    if status is not None:
+        raise SystemExit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
+from __future__ import annotations
+
 import os
+from typing import TYPE_CHECKING
 
-import aiosqlite
 import disnake
 from disnake.ext import commands
 from dotenv import load_dotenv
+from utils.database import STREAM_CHUNK_SIZE, DatabasePool
+from utils.metrics import timed
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
 
 load_dotenv()
 
@@ -21,54 +28,59 @@ class MyBot(commands.Bot):
         super().__init__(*args, **kwargs)
         self.db_path = "main.sqlite"
         self.cog_path = "./cogs"
+        self.db = DatabasePool(self.db_path)
+
+    async def start(self, *args: object, **kwargs: object) -> None:
+        """Open the database pool, then connect to Discord."""
+        await self.db.open()
+        await super().start(*args, **kwargs)
+
+    async def close(self) -> None:
+        """Disconnect from Discord, then commit the queued writes and close the database pool."""
+        await super().close()
+        if self.db.is_open:
+            await self.db.close()
+
+    async def process_application_commands(self, interaction: disnake.ApplicationCommandInteraction) -> None:
+        """Run a slash command, timing it as a whole."""
+        with timed(f"command.{interaction.data.name}"):
+            await super().process_application_commands(interaction)
 
     async def commit(self) -> None:
         """Commit the database."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.commit()
+        await self.db.commit()
+
+    async def flush(self) -> None:
+        """Wait until the queued writes are committed, when writes are queued."""
+        await self.db.flush()
 
     async def execute(self, query: str, *values: object) -> None:
         """Execute a query."""
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.cursor() as cur:
-                await cur.execute(query, tuple(values))
-            await db.commit()
+        await self.db.execute(query, *values)
 
     async def executemany(self, query: str, values: tuple) -> None:
         """Execute many queries."""
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.cursor() as cur:
-                await cur.executemany(query, values)
-            await db.commit()
+        await self.db.executemany(query, values)
 
-    async def fetchval(self, query: str, *values: str) -> str:
+    async def fetchval(self, query: str, *values: str, cache: bool = True) -> str:
         """Fetch a single value."""
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.cursor() as cur:
-                exe = await cur.execute(query, tuple(values))
-                val = await exe.fetchone()
-            return val[0] if val else None
+        return await self.db.fetchval(query, *values, cache=cache)
 
-    async def fetchrow(self, query: str, *values: object) -> list:
+    async def fetchrow(self, query: str, *values: object, cache: bool = True) -> list:
         """Fetch a single row."""
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.cursor() as cur:
-                exe = await cur.execute(query, tuple(values))
-                row = await exe.fetchmany(size=1)
-            row: list = list(row[0]) if len(row) > 0 else None
-            return row
+        return await self.db.fetchrow(query, *values, cache=cache)
 
     async def fetchmany(self, query: str, size: int, *values: object) -> list:
         """Fetch many rows."""
-        async with aiosqlite.connect(self.db_path) as db, db.cursor() as cur:
-            exe = await cur.execute(query, tuple(values))
-            return await exe.fetchmany(size)
+        return await self.db.fetchmany(query, size, *values)
 
     async def fetch(self, query: str, *values: object) -> list:
         """Fetch all rows."""
-        async with aiosqlite.connect(self.db_path) as db, db.cursor() as cur:
-            exe = await cur.execute(query, tuple(values))
-            return await exe.fetchall()
+        return await self.db.fetch(query, *values)
+
+    def stream(self, query: str, *values: object, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[tuple]:
+        """Iterate over the rows lazily, ``chunk_size`` rows at a time."""
+        return self.db.stream(query, *values, chunk_size=chunk_size)
 
 
 bot = MyBot(
@@ -1,20 +1,63 @@
 from __future__ import annotations
 
 import asyncio
+import base64
+import hashlib
+import os
 import random
-from dataclasses import dataclass
+import struct
+import time
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from enum import Enum
+from functools import lru_cache
 from io import BytesIO
-from pathlib import Path
+from typing import TYPE_CHECKING
 
 import disnake
-from disnake.ext import commands
-from PIL import Image, ImageDraw, ImageFont
+from disnake.ext import commands, tasks
+from PIL import Image
+from utils import array_renderer
+from utils.array_renderer import RENDER_BACKEND
+from utils.assets import ROCK_VARIANTS, WATER_COLOR, get_atlas, load_atlas, stone_sprite
+from utils.encoder import FILENAMES, IMAGE_FORMAT, encode_animation
+from utils.events import EventLog
 from utils.logging_utils import log
+from utils.message_edits import edit_scheduler
+from utils.metrics import METRICS, timed
+from utils.opponent import Opponent
+from utils.render_cache import render_cache
+from utils.render_pool import get_render_pool, shutdown_render_pool
+from utils.snapshots import SnapshotStore
+
+if TYPE_CHECKING:
+    from collections.abc import Collection, Iterable, Iterator
+
+    import numpy as np
 
 TICK = "✅"
 CROSS = "❌"
 TIME_REMEMBER = 4  # Seconds
+TIME_BOT_TURN = 4  # Seconds the picks of the bot are shown
+GAME_IDLE_TTL = int(os.getenv("GAME_IDLE_TTL", "1800"))  # Seconds
+MAX_GAMES = int(os.getenv("MAX_GAMES", "1000"))
+GAME_OVERFLOW_POLICY = os.getenv("GAME_OVERFLOW_POLICY", "evict")  # "evict" the least recently active game or "reject"
+REAPER_INTERVAL = 60  # Seconds
+SNAPSHOT_VERSION = 1
+NO_TILE = 255
+# Version, stones per tile, grid width, grid height, empty spaces, last move from, last move to
+SNAPSHOT_HEADER = struct.Struct("<7B")
+GAME_RECORD_VERSION = 1
+# Version, user id, opponent id, user score, opponent score, player flags, dots to spawn
+GAME_RECORD_HEADER = struct.Struct("<BQQHHBB")
+# Visibility, stones per raft, width and height of the grid
+RENDER_KEY_HEADER = struct.Struct("<4B")
+# A found stone, still on its raft, and a slot of an empty space, in a render key
+FOUND_STONE = b"\xff\xff"
+EMPTY_SLOT = b"\xfe\xfe"
+USER_TURN, OPPONENT_TURN, OPPONENT_BOT = 1, 2, 4
 
 
 class TileNotFoundError(Exception):
@@ -31,6 +74,13 @@ class BoardNotFoundError(Exception):
         super().__init__(f"No board found matching the {index}")
 
 
+class TooManyGamesError(Exception):
+    """Too Many Games Exception."""
+
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"Already running the maximum of {limit} games")
+
+
 class EmptyTileDotError(Exception):
     """Tile Not Found Exception."""
 
@@ -45,23 +95,77 @@ class DotNotFoundError(Exception):
         super().__init__(f"Dot {index} not found in Tile {tile_num}")
 
 
-def select_unique_numbers(numbers: list[int], count: int) -> list[int]:
-    """Select unique numbers."""
-    selected = []
-    random.shuffle(numbers)
+def deal_numbers(rng: random.Random, tiles: int, count: int) -> list[int]:
+    """Deal pairs of numbers on tiles of ``count`` stones, no tile gets both stones of a pair.
 
-    for num in numbers:
-        if num not in selected:
-            selected.append(num)
-            if len(selected) == count:
-                break
+    Return the numbers tile after tile. Stones ``2n`` and ``2n + 1`` carry number ``n``. Every tile draws random
+    stones left in the pool, setting the other stone of each one aside until the next tile, in ``O(count)``. The tile
+    before last first takes every number still left twice, or the last tile would get both stones of it.
+    """
+    if tiles < 2 or tiles * count % 2:  # noqa: PLR2004
+        error_message = f"Cannot deal pairs on {tiles} tiles of {count} stones"
+        raise ValueError(error_message)
+
+    pool = list(range(tiles * count))  # Stones left, the ones drawn or set aside for the tile are moved to the front
+    where = list(pool)  # Index of every stone in the pool
+    dealt_stones = bytearray(len(pool))
 
-    while len(selected) < count:
-        num = random.choice(numbers)  # noqa: S311
-        if num not in selected:
-            selected.append(num)
+    def move(stone: int, position: int) -> None:
+        """Swap a stone to a position of the pool."""
+        other = pool[position]
+        pool[where[stone]], pool[position] = other, stone
+        where[other], where[stone] = where[stone], position
 
-    return selected
+    dealt = []
+    for tile in range(tiles):
+        forced = (
+            [] if tile != tiles - 2 else [stone for stone in pool if stone % 2 == 0 and not dealt_stones[stone + 1]]
+        )
+        picked = []
+        front = 0
+        while len(picked) < count:
+            stone = forced[len(picked)] if len(picked) < len(forced) else pool[rng.randrange(front, len(pool))]
+            move(stone, front)
+            front += 1
+            picked.append(stone)
+            if not dealt_stones[stone ^ 1] and where[stone ^ 1] >= front:
+                move(stone ^ 1, front)
+                front += 1
+
+        for stone in picked:
+            move(stone, len(pool) - 1)
+            pool.pop()
+            dealt_stones[stone] = 1
+
+        rng.shuffle(picked)
+        dealt.extend(stone // 2 for stone in picked)
+
+    return dealt
+
+
+@lru_cache
+def neighbour_table(width: int, height: int) -> tuple[tuple[int, ...], ...]:
+    """Return the positions next to every position of a grid, in left, right, up, down order."""
+    table = []
+    for num in range(width * height):
+        neighbours = []
+        if num % width != 0:
+            neighbours.append(num - 1)
+        if num % width != width - 1:
+            neighbours.append(num + 1)
+        if num >= width:
+            neighbours.append(num - width)
+        if num < width * (height - 1):
+            neighbours.append(num + width)
+        table.append(tuple(neighbours))
+
+    return tuple(table)
+
+
+@lru_cache
+def unfound_slots(count: int) -> tuple[tuple[int, ...], ...]:
+    """Return the slots not found of a tile of ``count`` stones, indexed by the found bits of the tile."""
+    return tuple(tuple(slot for slot in range(count) if not found >> slot & 1) for found in range(1 << count))
 
 
 class TileStatus(Enum):
@@ -86,7 +190,7 @@ class GameDifficulty(Enum):
     HARD = 5
 
 
-@dataclass
+@dataclass(slots=True)
 class Player:
     """Player class."""
 
@@ -112,15 +216,70 @@ class Player:
         return self.__repr__()
 
 
+class Stones:
+    """Flat storage of the stones of a board: numbers, rock variants and a found bitmask."""
+
+    __slots__ = ("found_mask", "numbers", "partners", "variants")
+
+    def __init__(self, numbers: Iterable[int], variants: Iterable[int]) -> None:
+        self.numbers = array("B", numbers)
+        self.variants = array("B", variants)
+        self.found_mask = 0
+        self.index_pairs()
+
+    def __repr__(self) -> str:
+        return f"Stones(Count:{len(self.numbers)}, Found:{self.found_mask.bit_count()})"
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def is_found(self, index: int) -> bool:
+        """Return if a stone is found."""
+        return bool(self.found_mask >> index & 1)
+
+    def set_found(self, index: int, value: bool) -> None:  # noqa: FBT001
+        """Mark a stone as found or not."""
+        if value:
+            self.found_mask |= 1 << index
+        else:
+            self.found_mask &= ~(1 << index)
+
+    def index_pairs(self) -> None:
+        """Index the other stone with the same number of every stone, -1 for a stone without one."""
+        self.partners = array("h", [-1] * len(self.numbers))
+        first: dict[int, int] = {}
+        for index, num in enumerate(self.numbers):
+            if num in first:
+                self.partners[index] = first.pop(num)
+                self.partners[self.partners[index]] = index
+            else:
+                first[num] = index
+
+    @property
+    def remaining_pairs(self) -> int:
+        """Return the number of pairs not found yet."""
+        return (len(self.numbers) - self.found_mask.bit_count()) // 2
+
+
 class Dot:
-    """Dot class."""
+    """Dot class, a view on one stone of a board's stones."""
 
-    def __init__(self, num: int) -> None:
-        self._num = num
-        self._found: bool = False
+    __slots__ = ("_index", "_stones")
+
+    def __init__(self, num: int, variant: int = 0) -> None:
+        self._stones = Stones([num], [variant])
+        self._index = 0
+
+    @classmethod
+    def from_stones(cls, stones: Stones, index: int) -> Dot:
+        """Return the dot of a stone of the board's stones."""
+        dot = cls.__new__(cls)
+        dot._stones = stones  # noqa: SLF001
+        dot._index = index  # noqa: SLF001
+        return dot
 
     def __repr__(self) -> str:
-        return f"Dot(Number:{self._num}, Found:{self._found})"
+        return f"Dot(Number:{self.num}, Variant:{self.variant}, Found:{self.found})"
 
     def __str__(self) -> str:
         return self.__repr__()
@@ -128,24 +287,36 @@ class Dot:
     def __eq__(self, other: Dot) -> bool:
         return self.num == other.num
 
+    @property
+    def index(self) -> int:
+        """Return the index of the stone in the board's stones, it follows its raft when the raft moves."""
+        return self._index
+
     @property
     def num(self) -> int:
         """Return the number."""
-        return self._num
+        return self._stones.numbers[self._index]
+
+    @property
+    def variant(self) -> int:
+        """Return the rock variant the dot is drawn with."""
+        return self._stones.variants[self._index]
 
     @property
     def found(self) -> bool:
         """Return if the dot is found."""
-        return self._found
+        return self._stones.is_found(self._index)
 
     @found.setter
     def found(self, value: bool) -> None:
-        self._found = value
+        self._stones.set_found(self._index, value)
 
 
 class Tile:
     """Tile class."""
 
+    __slots__ = ("_empty", "_num")
+
     def __init__(self, num: int, empty: TileStatus) -> None:
         self._num = num
         self._empty: TileStatus = empty
@@ -174,6 +345,8 @@ class Tile:
 class EmptyTile(Tile):
     """Empty Tile class."""
 
+    __slots__ = ()
+
     def __init__(self, num: int) -> None:
         super().__init__(num, TileStatus.EMPTY)
 
@@ -190,9 +363,24 @@ class EmptyTile(Tile):
 class ActiveTile(Tile):
     """Tile class."""
 
-    def __init__(self, num: int, dots_num: list[int]) -> None:
+    __slots__ = ("_count", "_is_moved", "_offset", "_stones")
+
+    def __init__(self, num: int, dots_num: list[int], variants: list[int] | None = None) -> None:
         super().__init__(num, TileStatus.FILLED)
-        self._dots: list[Dot] = [Dot(i) for i in dots_num]
+        self._bind(Stones(dots_num, variants or [0] * len(dots_num)), 0, len(dots_num))
+
+    @classmethod
+    def from_stones(cls, num: int, stones: Stones, offset: int, count: int) -> ActiveTile:
+        """Return a tile holding a slice of the board's stones."""
+        tile = cls.__new__(cls)
+        Tile.__init__(tile, num, TileStatus.FILLED)
+        tile._bind(stones, offset, count)  # noqa: SLF001
+        return tile
+
+    def _bind(self, stones: Stones, offset: int, count: int) -> None:
+        self._stones = stones
+        self._offset = offset
+        self._count = count
         self._is_moved = False
 
     def __repr__(self) -> str:
@@ -208,13 +396,23 @@ class ActiveTile(Tile):
         return iter(self._dots)
 
     def __getitem__(self, index: int) -> Dot:
-        if 0 <= index < len(self._dots):
-            return self._dots[index]
+        if 0 <= index < self._count:
+            return Dot.from_stones(self._stones, self._offset + index)
 
         raise DotNotFoundError(index, self._num)
 
     def __len__(self) -> int:
-        return len(self._dots)
+        return self._count
+
+    @property
+    def _dots(self) -> list[Dot]:
+        """Return views on the stones of the tile, the stones themselves live in the board's stones."""
+        return [Dot.from_stones(self._stones, self._offset + i) for i in range(self._count)]
+
+    @property
+    def stone_offset(self) -> int:
+        """Return the index of the first stone of the tile in the board's stones."""
+        return self._offset
 
     @property
     def is_moved(self) -> bool:
@@ -228,26 +426,44 @@ class ActiveTile(Tile):
     @property
     def all_found(self) -> bool:
         """Return if all dots are found."""
-        return all(dot.found for dot in self._dots)
+        mask = (1 << self._count) - 1
+        return self._stones.found_mask >> self._offset & mask == mask
 
     @property
     def dots_found(self) -> list[Dot]:
         """Show the dots that are found."""
         return [dot for dot in self._dots if dot.found]
 
+    @property
+    def unfound_slots(self) -> tuple[int, ...]:
+        """Return the slots of the dots not found, the dots players pick among."""
+        return unfound_slots(self._count)[self._stones.found_mask >> self._offset & (1 << self._count) - 1]
+
     @property
     def dots_not_found(self) -> list[Dot]:
         """Show the dots that are not found."""
-        return [dot for dot in self._dots if not dot.found]
+        return [Dot.from_stones(self._stones, self._offset + slot) for slot in self.unfound_slots]
+
+    def dot_not_found(self, position: int) -> Dot:
+        """Return a dot among the ones not found, like ``dots_not_found[position]``."""
+        slots = self.unfound_slots
+        if 0 <= position < len(slots):
+            return Dot.from_stones(self._stones, self._offset + slots[position])
+
+        raise DotNotFoundError(position, self._num)
 
     def set_dot_found(self, position: int) -> None:
         """Mark a dot as found."""
-        self.dots_not_found[position].found = True
+        self.dot_not_found(position).found = True
 
 
 class Board:
     """Board class."""
 
+    # Only set on the boards that change them, so the many boards rendered with PIL do not hold them
+    render_backend: str = RENDER_BACKEND
+    _frame_array: np.ndarray | None = None  # Frames of the NumPy backend
+
     def __init__(
         self,
         msg_id: int,
@@ -255,6 +471,7 @@ class Board:
         players: list[Player],
         dots_to_spawn: int = 4,
         empty_spaces: int = 1,
+        seed: int | None = None,
     ) -> None:
         self._msg_id: int = msg_id
         self._num_stones: int = num_stones  # 3, 4, 5
@@ -265,11 +482,26 @@ class Board:
         self._user: Player = players[0]
         self._opponent: Player = players[-1]
 
+        # Indexed by position, the tile at index i always has num i
         self._tiles: list[ActiveTile | EmptyTile] = []
+        self._stones: Stones = Stones((), ())
+        self._stone_tiles: list[ActiveTile] = []  # The tile holding every stone, by stone index // stones per tile
+        self._neighbours = neighbour_table(*self._board_size)
 
         self._empty_tiles: list[EmptyTile] = []
+        self._moved_tiles: list[ActiveTile] = []
+
+        # Deals the stones and picks the moves, the same seed deals the same board and moves the same rafts
+        self.seed: int = random.getrandbits(64) if seed is None else seed
+        self._rng: random.Random = random.Random(self.seed)  # noqa: S311
+
+        self.opponent: Opponent | None = None  # Plays the turns of the bot
 
         self._lock: asyncio.Lock = asyncio.Lock()
+        # Held while the board renders, renders share the frames so they run one at a time
+        self._render_lock: asyncio.Lock = asyncio.Lock()
+        self._last_active: float = time.monotonic()
+        self._turns_playing = 0  # The board is not evicted while a turn is played on it
         self._user.turn = True
         self._opponent.turn = False
         self.padding: dict[str, int] = {
@@ -278,44 +510,92 @@ class Board:
             "left": 45,
             "right": 20,
         }
-        self.ROCK_SIZE: tuple[int, int] = (40, 40)
-        self.font = ImageFont.truetype("../assets/arial.ttf", 18)
         self.tiles_moved: list[int, int] = []
 
-        # Load raft images
-        self.raft_images = []
-        for i in range(4):
-            raft_path = f"../assets/raft/tile{i:03d}.png"
-            if Path.exists(Path(raft_path)):
-                raft_img = Image.open(raft_path).convert("RGBA")
-                self.raft_images.append(raft_img)
-        self.raft_width, self.raft_height = self.raft_images[0].size
-
-        # Load rock images
-        self.rock_images = []
-        for i in range(1, 6):
-            rock_path = f"../assets/rocks/tile{i:03d}.png"
-            if Path.exists(Path(rock_path)):
-                rock_img = Image.open(rock_path).convert("RGBA")
-                rock_img = rock_img.resize(self.ROCK_SIZE, Image.Resampling.LANCZOS)
-                self.rock_images.append(rock_img)
-
         self.raft_offset = 10
-        self.board_width: int = (self._board_size[0] * self.raft_width) + ((self._board_size[0] - 1) * 10)
-        self.board_height: int = (self._board_size[1] * self.raft_height) + ((self._board_size[1] - 1) * 10)
+
+        # Last rendered stone layers and frames, only the dirty cells are redrawn on the next render
+        self._stone_layers: dict[int, Image.Image] = {}
+        self._frames: list[Image.Image] = []
+        self._frames_visibility: NumberStatus | None = None
+        self._dirty_cells: set[int] = set()
 
     def __iter__(self) -> iter:
         return iter(self.all_tiles)
 
+    def __getstate__(self) -> dict:
+        """Return a picklable state, used to send the board to a render process.
+
+        The locks, the cached frames and the bot's memory are left out and the players lose their disnake member.
+        """
+        state = self.__dict__.copy()
+        for attr in ("_lock", "_render_lock", "_stone_layers", "_frames", "opponent"):
+            del state[attr]
+        state.pop("_frame_array", None)
+
+        state["_user"] = replace(self._user, user=None)
+        state["_opponent"] = replace(self._opponent, user=None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = asyncio.Lock()
+        self._render_lock = asyncio.Lock()
+        self._stone_layers = {}
+        self._frames = []
+        self.opponent = None
+
     def __repr__(self) -> str:
         return f"Board(Message ID:{self._msg_id}, Size:{self._board_size}, Players:{self._user}, {self._opponent})"
 
     def __getitem__(self, index: int) -> ActiveTile | EmptyTile:
-        for t in self._tiles:
-            if t.num == index:
-                return t
+        if 0 <= index < len(self._tiles):
+            return self._tiles[index]
+
         raise TileNotFoundError(index)
 
+    # The assets are only looked up when the board is rendered, so games can be played without loading any image
+
+    @property
+    def raft_images(self) -> tuple[Image.Image, ...]:
+        """Return the raft animation frames."""
+        return get_atlas().raft_images
+
+    @property
+    def raft_tiles(self) -> tuple[Image.Image, ...]:
+        """Return the raft animation frames blended over the water."""
+        return get_atlas().raft_tiles
+
+    @property
+    def rock_images(self) -> tuple[Image.Image, ...]:
+        """Return the rock variants."""
+        return get_atlas().rock_images
+
+    @property
+    def ROCK_SIZE(self) -> tuple[int, int]:  # noqa: N802
+        """Return the size of a rock."""
+        return get_atlas().rock_size
+
+    @property
+    def raft_width(self) -> int:
+        """Return the width of a raft."""
+        return get_atlas().raft_size[0]
+
+    @property
+    def raft_height(self) -> int:
+        """Return the height of a raft."""
+        return get_atlas().raft_size[1]
+
+    @property
+    def board_width(self) -> int:
+        """Return the width of the rendered board."""
+        return self._board_size[0] * self.raft_width + (self._board_size[0] - 1) * self.raft_offset
+
+    @property
+    def board_height(self) -> int:
+        """Return the height of the rendered board."""
+        return self._board_size[1] * self.raft_height + (self._board_size[1] - 1) * self.raft_offset
+
     @property
     def num_stones(self) -> int:
         """Return the number of stones."""
@@ -331,6 +611,31 @@ class Board:
         """Return the lock."""
         return self._lock
 
+    @property
+    def last_active(self) -> float:
+        """Return the monotonic time of the last interaction with the board."""
+        return self._last_active
+
+    def touch(self) -> None:
+        """Mark the board as active now."""
+        self._last_active = time.monotonic()
+
+    @property
+    def is_playing(self) -> bool:
+        """Return if a turn is being played on the board."""
+        return self._turns_playing > 0
+
+    @contextmanager
+    def playing(self) -> Iterator[None]:
+        """Keep the board from being evicted while a turn is played on it."""
+        self._turns_playing += 1
+        self.touch()
+        try:
+            yield
+        finally:
+            self._turns_playing -= 1
+            self.touch()
+
     @property
     def all_tiles(self) -> list[ActiveTile | EmptyTile]:
         """Return all tiles."""
@@ -341,6 +646,34 @@ class Board:
         """Return all active tiles."""
         return [tile for tile in self.all_tiles if isinstance(tile, ActiveTile)]
 
+    @property
+    def all_found(self) -> bool:
+        """Return if every stone is found, the game is won."""
+        return self._stones.remaining_pairs == 0
+
+    @property
+    def remaining_pairs(self) -> int:
+        """Return the number of pairs not found yet."""
+        return self._stones.remaining_pairs
+
+    @property
+    def hidden_stones(self) -> dict[int, int]:
+        """Return the number of every stone not found yet, by stone index."""
+        numbers = self._stones.numbers
+        return {index: numbers[index] for index in range(len(numbers)) if not self._stones.is_found(index)}
+
+    @property
+    def players(self) -> tuple[Player, Player]:
+        """Return the user and the opponent."""
+        return self._user, self._opponent
+
+    @property
+    def winner(self) -> Player | None:
+        """Return the player with the most pairs found, None on a draw."""
+        if self._user.score == self._opponent.score:
+            return None
+        return self._user if self._user.score > self._opponent.score else self._opponent
+
     @property
     def all_players_id(self) -> list[int]:
         """Return all player IDs."""
@@ -354,63 +687,87 @@ class Board:
     def change_turn(self) -> None:
         """Switches the turn of players."""
         if self._user.turn:
-            if not self._opponent.bot:
-                self._user.turn = not self._user.turn
-                self._opponent.turn = not self._opponent.turn
+            self._user.turn = False
+            self._opponent.turn = True
         else:
             self._user.turn = True
             self._opponent.turn = False
 
-        log(self._user.user_id, "Game", f"Turn switched to {self.current_player.username}")
+        log(self._user.user_id, "Game", "Turn switched to %s", self.current_player.username or "Bot")
 
     def _find_movable(self, tile: Tile) -> list[ActiveTile]:
         """Return the index of all adjacent tiles."""
         adjacent_tiles = []
 
-        if tile.num % self._board_size[0] != 0:
-            adj_tile = self.__getitem__(tile.num - 1)
+        for num in self._neighbours[tile.num]:
+            adj_tile = self._tiles[num]
             if not adj_tile.is_empty and not adj_tile.is_moved:
                 adjacent_tiles.append(adj_tile)
 
-        if tile.num % self._board_size[0] != self._board_size[0] - 1:
-            adj_tile = self.__getitem__(tile.num + 1)
-            if not adj_tile.is_empty and not adj_tile.is_moved:
-                adjacent_tiles.append(adj_tile)
+        return adjacent_tiles
 
-        if tile.num >= self._board_size[0]:
-            adj_tile = self.__getitem__(tile.num - self._board_size[0])
-            if not adj_tile.is_empty and not adj_tile.is_moved:
-                adjacent_tiles.append(adj_tile)
+    def _move_tile(self, chosen_tile: ActiveTile, tile: EmptyTile) -> None:
+        """Swap a raft with an empty space."""
+        self.tiles_moved = [chosen_tile.num, tile.num]
+
+        chosen_tile.num, tile.num = tile.num, chosen_tile.num
+        self._tiles[chosen_tile.num] = chosen_tile
+        self._tiles[tile.num] = tile
+
+        chosen_tile.is_moved = True
+        self._dirty_cells.update(self.tiles_moved)
+
+    def _end_moves(self, moved_tiles: list[ActiveTile]) -> None:
+        """Only the rafts that just moved are kept from moving back on the next turn."""
+        for tile in self._moved_tiles:
+            tile.is_moved = False
+        for tile in moved_tiles:
+            tile.is_moved = True
+        self._moved_tiles = moved_tiles
+
+    def match_dots(self, tile1_num: int, dot1_num: int, tile2_num: int, dot2_num: int) -> tuple[bool, Dot, Dot]:
+        """Mark two picked dots as found if their numbers match, dots are picked among the ones not found."""
+        dot_1 = self[tile1_num].dot_not_found(dot1_num)
+        dot_2 = self[tile2_num].dot_not_found(dot2_num)
+        if dot_1 == dot_2 and dot_1.index != dot_2.index:
+            dot_1.found = dot_2.found = True
+            self._dirty_cells.update((tile1_num, tile2_num))
+            return True, dot_1, dot_2
 
-        if tile.num < self._board_size[0] * (self._board_size[1] - 1):
-            adj_tile = self.__getitem__(tile.num + self._board_size[0])
-            if not adj_tile.is_empty and not adj_tile.is_moved:
-                adjacent_tiles.append(adj_tile)
+        return False, dot_1, dot_2
 
-        return adjacent_tiles
+    def locate(self, index: int) -> tuple[int, int]:
+        """Return the position of the tile of a stone not found and its pick among the dots not found."""
+        tile = self._stone_tiles[index // self._num_stones]
+        return tile.num, tile.unfound_slots.index(index - tile.stone_offset)
 
-    def move_tiles(self) -> None:
-        """Move the Empty tiles."""
+    def find_pair(self, tile_num: int, dot_num: int) -> tuple[int, int]:
+        """Return where the other stone with the number of a picked dot is, as a tile position and a pick."""
+        return self.locate(self._stones.partners[self[tile_num].dot_not_found(dot_num).index])
+
+    def move_tiles(self) -> list[tuple[int, int]]:
+        """Move the Empty tiles, return the positions every raft moved from and to."""
         # We should move the empty itself to another position exchanging it with a filled tile
+        moves = []
         moved_tiles = []
         for tile in self._empty_tiles:
-            chosen_tile = random.choice(self._find_movable(tile))  # noqa: S311
-            self.tiles_moved = [chosen_tile.num, tile.num]
-
-            temp_tile = chosen_tile.num
-            chosen_tile.num = tile.num
+            chosen_tile = self._rng.choice(self._find_movable(tile))
+            moves.append((chosen_tile.num, tile.num))
+            self._move_tile(chosen_tile, tile)
+            moved_tiles.append(chosen_tile)
 
-            tile.num = temp_tile
-            chosen_tile.is_moved = True
-            moved_tiles.append(chosen_tile.num)
+        self._end_moves(moved_tiles)
+        return moves
 
-        for tile in self.all_tiles:
-            if not tile.is_empty:
-                tile.is_moved = False
-        for tile_num in moved_tiles:
-            self[tile_num].is_moved = True
+    def apply_moves(self, moves: Iterable[tuple[int, int]]) -> None:
+        """Replay the moves returned by ``move_tiles``."""
+        moved_tiles = []
+        for from_position, to_position in moves:
+            chosen_tile = self._tiles[from_position]
+            self._move_tile(chosen_tile, self._tiles[to_position])
+            moved_tiles.append(chosen_tile)
 
-        self._tiles.sort(key=lambda x: x.num)
+        self._end_moves(moved_tiles)
 
     def _get_dot_positions(self, num_dots: int, width: int, height: int) -> list[tuple[int, int]]:
         """Get the dot positions based on the number of dots to spawn."""
@@ -449,121 +806,484 @@ class Board:
 
         return positions
 
-    def _create_rock_with_number(self, number: str, numbers_visible: NumberStatus) -> Image.Image:
-        """Create a rock image with or without the number visible on it."""
-        if numbers_visible == NumberStatus.VISIBLE:
-            rock = random.choice(self.rock_images).copy()  # noqa: S311
-            draw = ImageDraw.Draw(rock)
-            bbox = draw.textbbox((0, 0), number, font=self.font)
-            text_width = bbox[2] - bbox[0] - 5
-            text_height = bbox[3] - bbox[1] + 10
-            position = ((self.ROCK_SIZE[0] - text_width) // 2, (self.ROCK_SIZE[1] - text_height) // 2)
-            draw.text(position, number, fill=(0, 0, 0), font=self.font)
-        else:
-            rock = random.choice(self.rock_images).copy()  # noqa: S311
-        return rock
+    def _create_rock_with_number(self, dot: Dot, numbers_visible: NumberStatus) -> Image.Image:
+        """Return the rock image of a dot with or without the number visible on it."""
+        return stone_sprite(dot.variant, dot.num, numbers_visible == NumberStatus.VISIBLE)
+
+    def _cell_origin(self, index: int) -> tuple[int, int]:
+        """Return the top left pixel of a grid cell."""
+        row = index // self._board_size[0]
+        col = index % self._board_size[0]
+        return col * (self.raft_width + self.raft_offset), row * (self.raft_height + self.raft_offset)
+
+    def _cell_box(self, index: int) -> tuple[int, int, int, int]:
+        """Return the pixel box of a grid cell."""
+        x, y = self._cell_origin(index)
+        return x, y, x + self.raft_width, y + self.raft_height
+
+    def _stones_box(self) -> tuple[int, int, int, int]:
+        """Return the box covering all the stones of a raft, relative to the raft."""
+        positions = self._get_dot_positions(self._num_stones, self.raft_width, self.raft_height)
+        return (
+            min(x for x, _ in positions),
+            min(y for _, y in positions),
+            max(x for x, _ in positions) + self.ROCK_SIZE[0],
+            max(y for _, y in positions) + self.ROCK_SIZE[1],
+        )
+
+    def _create_stone_layer(self, index: int, numbers_visible: NumberStatus) -> Image.Image | None:
+        """Create the layer of the stones on the tile at a grid cell, shared by all the frames."""
+        tile = self._tiles[index]
+        if not isinstance(tile, ActiveTile):
+            return None
+
+        left, top, right, bottom = self._stones_box()
+        layer = Image.new("RGBA", (right - left, bottom - top), (0, 0, 0, 0))
+        positions = self._get_dot_positions(self._num_stones, self.raft_width, self.raft_height)
 
-    def _create_board_frame(self, raft_image: Image.Image, numbers_visible: NumberStatus) -> Image.Image:
+        for pos, dot in zip(positions, tile, strict=False):
+            if not dot.found:
+                layer.alpha_composite(
+                    self._create_rock_with_number(dot, numbers_visible), (pos[0] - left, pos[1] - top)
+                )
+
+        return layer
+
+    def _draw_cell(self, base: Image.Image, index: int, raft_tile: Image.Image) -> None:
+        """Draw the raft and the stone layer of the tile at a grid cell on a frame."""
+        layer = self._stone_layers.get(index)
+        if layer is None:
+            return
+
+        x, y = self._cell_origin(index)
+        left, top, _, _ = self._stones_box()
+        base.paste(raft_tile, (x, y))
+        base.paste(layer, (x + left, y + top), layer)
+
+    def _create_board_frame(self, raft_tile: Image.Image) -> Image.Image:
         """Create a frame of the board for the GIF."""
-        base = Image.new("RGB", (self.board_width, self.board_height), (135, 206, 235))
-        draw = ImageDraw.Draw(base)
-
-        for index, tile in enumerate(self.all_tiles):
-            row = index // self._board_size[0]
-            col = index % self._board_size[0]
-            x = col * (self.raft_width + self.raft_offset)
-            y = row * (self.raft_height + self.raft_offset)
-
-            if isinstance(tile, EmptyTile):
-                draw.rectangle([x, y, x + self.raft_width, y + self.raft_height], fill=(135, 206, 235))
-            elif isinstance(tile, ActiveTile):
-                base.paste(raft_image, (x, y), raft_image)
-                numbers = [str(dot.num) for dot in tile]
-                positions = self._get_dot_positions(self._num_stones, self.raft_width, self.raft_height)
-
-                for num, pos, dot in zip(numbers, positions, tile, strict=False):
-                    if not dot.found:
-                        rock_with_number = self._create_rock_with_number(num, numbers_visible)
-                        rock_x = x + pos[0]
-                        rock_y = y + pos[1]
-                        base.paste(rock_with_number, (rock_x, rock_y), rock_with_number)
-                    else:
-                        transparent_square = Image.new("RGBA", self.ROCK_SIZE, (0, 0, 0, 0))
-                        square_x = x + pos[0]
-                        square_y = y + pos[1]
-                        base.paste(transparent_square, (square_x, square_y), transparent_square)
+        base = Image.new("RGB", (self.board_width, self.board_height), WATER_COLOR)
+
+        for index in range(len(self._tiles)):
+            self._draw_cell(base, index, raft_tile)
 
         return base
 
-    def _generate_board_img(self, numbers_visible: NumberStatus) -> disnake.File:
-        """Generate the board image as an animated GIF."""
-        log(self._user.user_id, "Game", "Generating board image")
+    def _take_dirty_cells(self) -> set[int]:
+        """Return the cells that changed since the last render, they are no longer dirty."""
+        dirty_cells = self._dirty_cells
+        self._dirty_cells = set()
+        return dirty_cells
+
+    def _render_frames(
+        self, numbers_visible: NumberStatus, dirty_cells: Collection[int] | None = None
+    ) -> list[Image.Image]:
+        """Return the frames of the board, redrawing only the dirty cells, taken from the board when not given.
+
+        The stones are composited once per cell into a layer, each frame only adds its raft tile under them.
+        """
+        if dirty_cells is None:
+            dirty_cells = self._take_dirty_cells()
+        if array_renderer.array_backend(self.render_backend):
+            return self._render_frame_array(numbers_visible, dirty_cells)
+
+        if self._frames and self._frames_visibility == numbers_visible:
+            for index in dirty_cells:
+                self._stone_layers[index] = self._create_stone_layer(index, numbers_visible)
+
+            for frame, raft_tile in zip(self._frames, self.raft_tiles, strict=True):
+                for index in dirty_cells:
+                    frame.paste(WATER_COLOR, self._cell_box(index))
+                    self._draw_cell(frame, index, raft_tile)
+        else:
+            self._stone_layers = {
+                index: self._create_stone_layer(index, numbers_visible) for index in range(len(self._tiles))
+            }
+            self._frames = [self._create_board_frame(raft_tile) for raft_tile in self.raft_tiles]
+            self._frames_visibility = numbers_visible
+
+        return self._frames
+
+    def _array_stones(
+        self, index: int, numbers_visible: NumberStatus
+    ) -> list[tuple[tuple[int, int], array_renderer.StoneLayer]] | None:
+        """Return the stones to draw on the tile at a grid cell with the NumPy backend, at their offset from the cell.
+
+        Stones are drawn from their precomputed sprite arrays, unless some overlap, then they are composited into a
+        layer first, like the PIL backend does, to get the same pixels.
+        """
+        tile = self._tiles[index]
+        if not isinstance(tile, ActiveTile):
+            return None
+
+        positions = self._get_dot_positions(self._num_stones, self.raft_width, self.raft_height)
+        stones = [(position, dot) for position, dot in zip(positions, tile, strict=False) if not dot.found]
+        width, height = self.ROCK_SIZE
+        overlap = any(
+            abs(x1 - x2) < width and abs(y1 - y2) < height
+            for i, ((x1, y1), _) in enumerate(stones)
+            for (x2, y2), _ in stones[i + 1 :]
+        )
+        if overlap:
+            left, top, _, _ = self._stones_box()
+            return [((left, top), array_renderer.stone_layer(self._create_stone_layer(index, numbers_visible)))]
+
+        atlas = array_renderer.get_array_atlas()
+        visible = numbers_visible == NumberStatus.VISIBLE
+        return [(position, atlas.sprite(dot.variant, dot.num, visible)) for position, dot in stones]
+
+    def _render_frame_array(self, numbers_visible: NumberStatus, dirty_cells: Collection[int]) -> list[Image.Image]:
+        """Render the frames with the NumPy backend, every cell is drawn on all the frames at once."""
+        incremental = self._frame_array is not None and self._frames and self._frames_visibility == numbers_visible
+        if incremental:
+            cells = dirty_cells
+            for index in cells:
+                array_renderer.clear_cell(self._frame_array, self._cell_box(index))
+        else:
+            cells = range(len(self._tiles))
+            self._frame_array = array_renderer.new_frames((self.board_width, self.board_height))
+            self._frames_visibility = numbers_visible
+
+        for index in cells:
+            stones = self._array_stones(index, numbers_visible)
+            if stones is not None:
+                array_renderer.draw_cell(self._frame_array, self._cell_origin(index), stones)
+
+        if incremental:
+            # Only the redrawn cells are copied into the images, copying whole frames costs more than drawing them
+            for index in cells:
+                array_renderer.copy_cell(self._frame_array, self._frames, self._cell_box(index))
+        else:
+            self._frames = array_renderer.to_images(self._frame_array)
+        return self._frames
+
+    def invalidate_frames(self) -> None:
+        """Drop the rendered frames, the next render redraws the whole board."""
+        self._stone_layers = {}
+        self._frames = []
+        self.__dict__.pop("_frame_array", None)
+        self._dirty_cells.clear()
+
+    def set_dot_found(self, tile_num: int, position: int) -> None:
+        """Mark a dot of a tile as found."""
+        self[tile_num].set_dot_found(position)
+        self._dirty_cells.add(tile_num)
+
+    def _render_image(self, numbers_visible: NumberStatus, dirty_cells: Collection[int] | None = None) -> bytes:
+        """Render the board as an animation in the configured image format."""
+        log(
+            self._user.user_id,
+            "Render",
+            "Generating board image - Size: %s, Tiles: %s, Empty tiles: %s, Stone cache: %s",
+            self._board_size,
+            len(self._tiles),
+            len(self._empty_tiles),
+            stone_sprite.cache_info(),
+            level="DEBUG",
+        )
+
+        with timed("render.composite"):
+            frames = self._render_frames(numbers_visible, dirty_cells)
+        with timed("render.encode"):
+            return encode_animation(frames)
+
+    def render_key(self, numbers_visible: NumberStatus) -> bytes:
+        """Return the hash of what a render of the board shows, the key of its image in the render cache.
+
+        Only what is drawn is hashed: the variant of every stone not found yet on every cell, with its number when
+        the numbers are visible, so boards that look the same share a key.
+        """
+        visible = numbers_visible == NumberStatus.VISIBLE
+        stones = self._stones
+        cells = bytearray(RENDER_KEY_HEADER.pack(visible, self._num_stones, *self._board_size))
+        for tile in self._tiles:
+            if not isinstance(tile, ActiveTile):
+                cells += EMPTY_SLOT * self._num_stones
+                continue
+
+            for index in range(tile.stone_offset, tile.stone_offset + self._num_stones):
+                if stones.is_found(index):
+                    cells += FOUND_STONE
+                else:
+                    cells += bytes((stones.variants[index], stones.numbers[index] if visible else 0))
+
+        digest = hashlib.blake2b(cells, digest_size=16)
+        digest.update(f"{IMAGE_FORMAT}:{get_atlas().version}".encode())
+        return digest.digest()
+
+    def _cached_image(self, numbers_visible: NumberStatus) -> tuple[bytes | None, bytes | None]:
+        """Return the render key of the board and its image if it is in the render cache, no key if it is disabled."""
+        if not render_cache.enabled:
+            return None, None
+        key = self.render_key(numbers_visible)
+        return key, render_cache.get(key)
+
+    def _generate_board_img(self, numbers_visible: NumberStatus) -> disnake.File | None:
+        """Generate the board image as an animation, unless the same image is cached, None if the render failed."""
         try:
-            log(self._user.user_id, "Game", f"Board size: {self._board_size}")
-            log(self._user.user_id, "Game", f"Number of tiles: {len(self._tiles)}")
+            key, image = self._cached_image(numbers_visible)
+            if image is None:
+                image = self._render_image(numbers_visible)
+                if key is not None:
+                    render_cache.put(key, image)
+            return disnake.File(fp=BytesIO(image), filename=FILENAMES[IMAGE_FORMAT])
+        except Exception as e:  # noqa: BLE001
             log(
                 self._user.user_id,
-                "Game",
-                f"Number of active tiles: {sum(1 for tile in self._tiles if isinstance(tile, ActiveTile))}",
+                "Render",
+                f"An error occurred while generating the board image: {e!s}",
+                level="ERROR",
+                exc_info=True,
             )
+            return None
 
-            frames = [self._create_board_frame(raft_image, numbers_visible) for raft_image in self.raft_images]
+    async def render_async(self, numbers_visible: NumberStatus) -> disnake.File | None:
+        """Generate the board image on the render pool, without blocking the event loop, unless it is cached.
 
-            buffer = BytesIO()
-            frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:], duration=400, loop=0)
-            buffer.seek(0)
-
-            return disnake.File(fp=buffer, filename="board.gif")
+        Return None if the render failed, the error is logged.
+        """
+        try:
+            async with self._render_lock:
+                key, image = self._cached_image(numbers_visible)
+                if image is None:
+                    # Taken on the loop, the cells moved or matched while the render runs stay dirty for the next one
+                    dirty_cells = self._take_dirty_cells()
+                    render_pool = get_render_pool()
+                    try:
+                        with timed("render"):
+                            image, samples = await render_pool.run(_render_board, self, numbers_visible, dirty_cells)
+                    except BaseException:
+                        self._dirty_cells |= dirty_cells
+                        raise
+                    finally:
+                        if render_pool.processes:
+                            # The cells were drawn on a copy of the board, the frames here no longer match it
+                            self.invalidate_frames()
+                    METRICS.merge(samples)
+                    # A move made while the render ran may or may not be drawn, the image is only cached if none was
+                    if key is not None and self.render_key(numbers_visible) == key:
+                        render_cache.put(key, image)
+            return disnake.File(fp=BytesIO(image), filename=FILENAMES[IMAGE_FORMAT])
         except Exception as e:  # noqa: BLE001
-            print(f"An error occurred while generating the board image: {e!s}")
             log(
-                self._user.user_id, "Game", f"An error occurred while generating the board image: {e!s}", level="ERROR"
+                self._user.user_id,
+                "Render",
+                f"An error occurred while generating the board image: {e!s}",
+                level="ERROR",
+                exc_info=True,
             )
+            return None
 
     def _make_tiles(self) -> None:
-        total_num = ((self._total_spaces - self._empty_spaces) * self._num_stones) // 2
-        paired_num = list(range(total_num)) * 2
-        random.shuffle(paired_num)
-
-        for i in range(self._total_spaces):
-            if i > (self._total_spaces - self._empty_spaces - 1):
-                empty_tile = EmptyTile(i)
-                self._tiles.append(empty_tile)
-                self._empty_tiles.append(empty_tile)
+        active_spaces = self._total_spaces - self._empty_spaces
+        numbers = deal_numbers(self._rng, active_spaces, self._num_stones)
+        self._stones = Stones(numbers, (self._rng.randrange(ROCK_VARIANTS) for _ in numbers))
+        self._tiles = [
+            ActiveTile.from_stones(i, self._stones, i * self._num_stones, self._num_stones)
+            if i < active_spaces
+            else EmptyTile(i)
+            for i in range(self._total_spaces)
+        ]
+        self._stone_tiles = self._tiles[:active_spaces]
+        self._empty_tiles = self._tiles[active_spaces:]
+
+        self.invalidate_frames()
+        log(self._user.user_id, "Game", "Tiles created successfully - Seed: %s", self.seed, level="DEBUG")
+
+    @timed("game.deal")
+    def make_tiles(self) -> None:
+        """Deal the stones on the rafts."""
+        self._make_tiles()
 
-            else:
-                dot_numbers = select_unique_numbers(paired_num, self._num_stones)
-                self._tiles.append(ActiveTile(i, dot_numbers))
+    def snapshot(self) -> bytes:
+        """Return the tiles, the stones and the last move packed into bytes."""
+        layout = bytes(
+            tile.stone_offset // self._num_stones if isinstance(tile, ActiveTile) else NO_TILE for tile in self._tiles
+        )
+        moved_mask = sum(1 << tile.num for tile in self._moved_tiles)
+        moved_from, moved_to = self.tiles_moved or (NO_TILE, NO_TILE)
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_VERSION, self._num_stones, *self._board_size, self._empty_spaces, moved_from, moved_to
+        )
+        mask_size = (len(self._stones) + 7) // 8
+        return b"".join(
+            (
+                header,
+                layout,
+                moved_mask.to_bytes((len(self._tiles) + 7) // 8, "little"),
+                self._stones.found_mask.to_bytes(mask_size, "little"),
+                self._stones.numbers.tobytes(),
+                self._stones.variants.tobytes(),
+            )
+        )
 
-                for num in dot_numbers:
-                    paired_num.remove(num)
+    def restore(self, snapshot: bytes) -> None:
+        """Replace the tiles, the stones and the last move with the ones of a snapshot."""
+        version, num_stones, width, height, empty_spaces, moved_from, moved_to = SNAPSHOT_HEADER.unpack_from(snapshot)
+        if version != SNAPSHOT_VERSION:
+            error_message = f"Expected snapshot version {SNAPSHOT_VERSION}, got {version}"
+            raise ValueError(error_message)
 
-        log(self._user.user_id, "Game", f"Tiles created successfully - {self._tiles}")
+        total_spaces = width * height
+        stone_count = (total_spaces - empty_spaces) * num_stones
+        moved_size = (total_spaces + 7) // 8
+        mask_size = (stone_count + 7) // 8
+
+        offset = SNAPSHOT_HEADER.size
+        layout = snapshot[offset : offset + total_spaces]
+        offset += total_spaces
+        moved_mask = int.from_bytes(snapshot[offset : offset + moved_size], "little")
+        offset += moved_size
+        found_mask = int.from_bytes(snapshot[offset : offset + mask_size], "little")
+        offset += mask_size
+        stones = Stones(
+            snapshot[offset : offset + stone_count], snapshot[offset + stone_count : offset + 2 * stone_count]
+        )
+        stones.found_mask = found_mask
+
+        self._num_stones = num_stones
+        self._board_size = (width, height)
+        self._total_spaces = total_spaces
+        self._empty_spaces = empty_spaces
+        self._neighbours = neighbour_table(width, height)
+        self._stones = stones
+        self._tiles = [
+            EmptyTile(position)
+            if tile_id == NO_TILE
+            else ActiveTile.from_stones(position, stones, tile_id * num_stones, num_stones)
+            for position, tile_id in enumerate(layout)
+        ]
+        self._empty_tiles = [tile for tile in self._tiles if tile.is_empty]
+        self._stone_tiles = sorted(
+            (tile for tile in self._tiles if isinstance(tile, ActiveTile)), key=lambda tile: tile.stone_offset
+        )
+        self._moved_tiles = [tile for tile in self._tiles if moved_mask >> tile.num & 1]
+        for tile in self._moved_tiles:
+            tile.is_moved = True
+        self.tiles_moved = [] if moved_from == NO_TILE else [moved_from, moved_to]
+        self.invalidate_frames()
+
+    def game_record(self) -> bytes:
+        """Return the players and the board snapshot packed into bytes, to resume the game after a restart."""
+        flags = (
+            (USER_TURN if self._user.turn else 0)
+            | (OPPONENT_TURN if self._opponent.turn else 0)
+            | (OPPONENT_BOT if self._opponent.bot else 0)
+        )
+        header = GAME_RECORD_HEADER.pack(
+            GAME_RECORD_VERSION,
+            self._user.user_id or 0,
+            self._opponent.user_id or 0,
+            self._user.score,
+            self._opponent.score,
+            flags,
+            self._dots_to_spawn,
+        )
+        return header + self.snapshot()
+
+    @staticmethod
+    def record_players(record: bytes) -> tuple[int, int | None]:
+        """Return the user id and the opponent id, None for the bot, of a game record."""
+        _, user_id, opponent_id, *_ = GAME_RECORD_HEADER.unpack_from(record)
+        return user_id, opponent_id or None
+
+    @classmethod
+    def from_game_record(
+        cls, msg_id: int, record: bytes, user: disnake.Member, opponent: disnake.Member | None
+    ) -> Board:
+        """Rebuild a board from a game record, with the members of its players."""
+        version, _, _, user_score, opponent_score, flags, dots_to_spawn = GAME_RECORD_HEADER.unpack_from(record)
+        if version != GAME_RECORD_VERSION:
+            error_message = f"Expected game record version {GAME_RECORD_VERSION}, got {version}"
+            raise ValueError(error_message)
 
-    def make_board(self) -> disnake.File:
+        snapshot = record[GAME_RECORD_HEADER.size :]
+        _, num_stones, _, _, empty_spaces, _, _ = SNAPSHOT_HEADER.unpack_from(snapshot)
+        players = [
+            Player(user=user, score=user_score),
+            Player(user=opponent, bot=bool(flags & OPPONENT_BOT), score=opponent_score),
+        ]
+        board = cls(msg_id, num_stones, players, dots_to_spawn, empty_spaces)
+        board._user.turn = bool(flags & USER_TURN)  # noqa: SLF001
+        board._opponent.turn = bool(flags & OPPONENT_TURN)  # noqa: SLF001
+        board.restore(snapshot)
+        return board
+
+    def copy(self) -> Board:
+        """Return an independent copy of the board, without the rendered frames."""
+        board = Board(
+            self._msg_id,
+            self._num_stones,
+            [replace(self._user), replace(self._opponent)],
+            self._dots_to_spawn,
+            self._empty_spaces,
+        )
+        board._user.turn = self._user.turn  # noqa: SLF001
+        board._opponent.turn = self._opponent.turn  # noqa: SLF001
+        board.seed = self.seed
+        board._rng.setstate(self._rng.getstate())  # noqa: SLF001
+        board.restore(self.snapshot())
+        return board
+
+    def make_board(self) -> disnake.File | None:
         """Make the board."""
         self._make_tiles()
         return self._generate_board_img(NumberStatus.VISIBLE)
 
-    def hidden_image(self) -> disnake.File:
+    def hidden_image(self) -> disnake.File | None:
         """Make the board."""
         return self._generate_board_img(NumberStatus.HIDDEN)
 
 
+def _render_board(
+    board: Board, numbers_visible: NumberStatus, dirty_cells: Collection[int]
+) -> tuple[bytes, list[tuple[str, float]]]:
+    """Render job run on the render pool, returns its timings with the image as it may run in another process."""
+    with METRICS.capture() as samples:
+        image = board._render_image(numbers_visible, dirty_cells)  # noqa: SLF001
+    return image, samples
+
+
+def board_image_fields(board_img: disnake.File | None) -> dict[str, object]:
+    """Return the fields of a message edit that replace its image with a board image.
+
+    None if the render failed, the message then keeps its last image rather than showing no board at all.
+    """
+    if board_img is None:
+        return {}
+    return {"file": board_img, "attachments": []}
+
+
 class GameFlow:
     """Game Flow class."""
 
-    def __init__(self) -> None:
-        self._boards: list[Board] = []
+    def __init__(
+        self, idle_ttl: float = GAME_IDLE_TTL, max_games: int = MAX_GAMES, overflow_policy: str = GAME_OVERFLOW_POLICY
+    ) -> None:
+        # Ordered from the least to the most recently active board
+        self._boards: OrderedDict[int, Board] = OrderedDict()
         self._players: list[Player] = []
+        self._idle_ttl = idle_ttl
+        self._max_games = max_games
+        self._overflow_policy = overflow_policy
+        self.evicted: int = 0
+        # Set by the cog, boards are only snapshotted when the bot has a database
+        self.snapshots: SnapshotStore | None = None
+        self.events: EventLog | None = None
 
     def __getitem__(self, msg_id: int) -> Board:
         """Retrieve a board by its message ID."""
-        for board in self._boards:
-            if board.msg_id == msg_id:
-                return board
+        try:
+            board = self._boards[msg_id]
+        except KeyError:
+            raise BoardNotFoundError(msg_id) from None
+
+        board.touch()
+        self._boards.move_to_end(msg_id)
+        return board
 
-        raise BoardNotFoundError(msg_id)
+    def __len__(self) -> int:
+        return len(self._boards)
 
     @property
     def player_one(self) -> Player:
@@ -578,9 +1298,97 @@ class GameFlow:
     @property
     def boards(self) -> list[Board]:
         """Return the boards."""
-        return self._boards
+        return list(self._boards.values())
+
+    def remove_board(self, msg_id: int) -> None:
+        """Remove a board, if it is still registered."""
+        if self._boards.pop(msg_id, None) is not None:
+            log(0, "Game", f"Game {msg_id} removed - Active games: {len(self._boards)}")
+
+    def save_board(self, board: Board) -> None:
+        """Snapshot a board, so the game can resume after a restart."""
+        if self.snapshots is not None:
+            self.snapshots.save(board.msg_id, board.game_record())
+
+    async def finish_board(self, msg_id: int) -> None:
+        """Remove a finished board and its snapshot."""
+        if self.events is not None:
+            self.events.record(msg_id, "win")
+        self.remove_board(msg_id)
+        if self.snapshots is not None:
+            await self.snapshots.delete(msg_id)
+
+    async def get_board(self, msg_id: int, guild: disnake.Guild | None) -> Board:
+        """Retrieve a board, rebuilding it from its snapshot when it is not in memory, like after a restart."""
+        if msg_id in self._boards or self.snapshots is None:
+            return self[msg_id]
+
+        start = time.perf_counter()
+        record = await self.snapshots.load(msg_id)
+        if record is None:
+            raise BoardNotFoundError(msg_id)
+
+        user_id, opponent_id = Board.record_players(record)
+        try:
+            user = await _resolve_member(guild, user_id)
+            opponent = await _resolve_member(guild, opponent_id) if opponent_id else None
+        except disnake.NotFound:
+            # A player left the server, the game cannot go on
+            log(user_id, "Game", f"Game {msg_id} dropped, a player left the server", level="WARN")
+            await self.snapshots.delete(msg_id)
+            raise BoardNotFoundError(msg_id) from None
+        METRICS.record("game.resume", time.perf_counter() - start)
+
+        # Another interaction may have rebuilt the board while the snapshot was loading
+        if msg_id not in self._boards:
+            self._make_room()
+            self._boards[msg_id] = Board.from_game_record(msg_id, record, user, opponent)
+            log(
+                user_id,
+                "Game",
+                f"Game {msg_id} resumed from its snapshot in {(time.perf_counter() - start) * 1000:.1f}ms",
+            )
+
+        return self[msg_id]
+
+    def evict_idle(self) -> int:
+        """Remove the boards nobody interacted with for longer than the idle TTL, unless a turn is played on them."""
+        deadline = time.monotonic() - self._idle_ttl
+        idle = []
+        for msg_id, board in self._boards.items():
+            if board.last_active > deadline:
+                break
+            if not board.is_playing:
+                idle.append(msg_id)
+
+        for msg_id in idle:
+            del self._boards[msg_id]
+        evicted = len(idle)
+
+        self.evicted += evicted
+        if evicted:
+            log(0, "Game", f"Evicted {evicted} idle games - Active games: {len(self._boards)}")
+
+        return evicted
+
+    def _make_room(self) -> None:
+        """Apply the overflow policy when the maximum number of games is reached.
+
+        The least recently played board without a turn in progress is evicted, the game is rejected if every board
+        has one.
+        """
+        if len(self._boards) < self._max_games:
+            return
+
+        msg_id = next((msg_id for msg_id, board in self._boards.items() if not board.is_playing), None)
+        if self._overflow_policy == "reject" or msg_id is None:
+            raise TooManyGamesError(self._max_games)
 
-    def create_board(
+        del self._boards[msg_id]
+        self.evicted += 1
+        log(0, "Game", f"Evicted game {msg_id} to make room - Active games: {len(self._boards)}", level="WARN")
+
+    async def create_board(
         self,
         msg_id: int,
         num_stones: GameDifficulty,
@@ -588,8 +1396,9 @@ class GameFlow:
         opponent: disnake.Member | None,
         dots_to_spawn: int = 4,
         empty_spaces: int = 1,
-    ) -> tuple[Board, disnake.File]:
-        """Create a board."""
+    ) -> tuple[Board, disnake.File | None]:
+        """Create a board, it is not kept and its image is None if the render failed."""
+        self._make_room()
         _is_opponent_bot = opponent is None
 
         board = Board(
@@ -599,8 +1408,18 @@ class GameFlow:
             dots_to_spawn,
             empty_spaces,
         )
-        board_img = board.make_board()
-        self._boards.append(board)
+        board.make_tiles()
+        if _is_opponent_bot:
+            # The bot sees the numbers shown at the start of the game like the user does
+            self.bot_opponent(board).start(board.hidden_stones)
+        board_img = await board.render_async(NumberStatus.VISIBLE)
+        if board_img is None:
+            return board, None
+
+        self._boards[msg_id] = board
+        self.save_board(board)
+        if self.events is not None:
+            self.events.record(msg_id, "start", seed=board.seed, record=base64.b64encode(board.game_record()).decode())
         log(user.id, "Game", f"Game started with {opponent.name if opponent else 'Bot'}")
         return board, board_img
 
@@ -608,33 +1427,59 @@ class GameFlow:
         self, msg_id: int, tile1_num: int, tile2_num: int, dot1_num: int, dot2_num: int
     ) -> tuple[bool, Dot, Dot]:
         """Dots match check."""
-        board = self.__getitem__(msg_id)
-
-        tile1 = board[tile1_num]
-        tile2 = board[tile2_num]
-        dot_1 = None
-        dot_2 = None
-        for d in tile1.dots_not_found:
-            if tile1.dots_not_found.index(d) == dot1_num:
-                dot_1 = d
-                break
+        return self.__getitem__(msg_id).match_dots(tile1_num, dot1_num, tile2_num, dot2_num)
 
-        for d in tile2.dots_not_found:
-            if tile2.dots_not_found.index(d) == dot2_num:
-                dot_2 = d
-                break
-
-        if dot_1 == dot_2:
-            board[tile1_num].set_dot_found(dot1_num)
-            board[tile2_num].set_dot_found(dot2_num)
-            return True, dot_1, dot_2
-
-        return False, dot_1, dot_2
+    def record_turn(
+        self, board: Board, picks: tuple[int, int, int, int], moves: list[tuple[int, int]], *, matched: bool
+    ) -> None:
+        """Add a played turn to the event log."""
+        if self.events is not None:
+            self.events.record(board.msg_id, "turn", picks=picks, matched=matched, moves=moves)
+
+    @staticmethod
+    def bot_opponent(board: Board) -> Opponent:
+        """Return the bot of a board, a board resumed from its snapshot gets one that remembers nothing."""
+        if board.opponent is None:
+            board.opponent = Opponent(random.Random(f"opponent-{board.seed}"), board.num_stones)  # noqa: S311
+        return board.opponent
+
+    def end_turn(self, board: Board, picks: tuple[int, int, int, int], *, matched: bool) -> list[tuple[int, int]]:
+        """Score the turn of the current player, pass the turn and move the rafts."""
+        if matched:
+            board.current_player.score += 1
+        board.change_turn()
+        moves = board.move_tiles()
+        if board.opponent is not None:
+            board.opponent.moved(board[to].stone_offset // board.num_stones for _, to in moves)
+        self.record_turn(board, picks, moves, matched=matched)
+        return moves
+
+    def bot_turn(self, board: Board) -> tuple[bool, Dot, Dot]:
+        """Play the turn of the bot, it picks the two stones the solver expects to find the most pairs with."""
+        opponent = self.bot_opponent(board)
+        with timed("opponent.decide"):
+            first, second = opponent.pick(list(board.hidden_stones))
+        (tile1_num, dot1_num), (tile2_num, dot2_num) = board.locate(first), board.locate(second)
+        matched, dot_1, dot_2 = board.match_dots(tile1_num, dot1_num, tile2_num, dot2_num)
+        opponent.reveal((first, dot_1.num), (second, dot_2.num), matched=matched)
+        self.end_turn(board, (tile1_num, dot1_num, tile2_num, dot2_num), matched=matched)
+        log(board.players[0].user_id, "Game", "Bot turn ended: %s, %s (%s)", dot_1.num, dot_2.num, repr(opponent))
+        return matched, dot_1, dot_2
 
     def win_check(self, msg_id: int) -> bool:
         """Win check."""
-        board = self.__getitem__(msg_id)
-        return all(tile.all_found for tile in board.active_tiles)
+        return self.__getitem__(msg_id).all_found
+
+
+async def _resolve_member(guild: disnake.Guild | None, user_id: int) -> disnake.Member | None:
+    """Return the member of a player, from the cache when possible.
+
+    Raises disnake.NotFound if the player left the server.
+    """
+    if guild is None:
+        return None
+
+    return guild.get_member(user_id) or await guild.fetch_member(user_id)
 
 
 game_flow: GameFlow = GameFlow()
@@ -678,6 +1523,7 @@ class TurnDropdown(disnake.ui.StringSelect):
     async def callback(self, inter: disnake.MessageInteraction) -> None:
         """Dropdown callback."""
         _cords = int(inter.resolved_values[0])
+        self.board.touch()
 
         if self.label == "Tile":
             self.view.tile_cords = _cords
@@ -687,7 +1533,8 @@ class TurnDropdown(disnake.ui.StringSelect):
 
             self.placeholder = f"Tile Chosen: {_cords + 1}"
             self.view.add_item(TurnDropdown("Dot", self.board, self.board[self.view.tile_cords].dots_not_found))
-            await inter.response.edit_message(view=self.view)
+            with timed("discord.respond"):
+                await inter.response.edit_message(view=self.view)
             log(inter.author.id, "Game", f"Player chose tile {_cords}: {self.board[self.view.tile_cords]}")
 
         elif self.label == "Dot":
@@ -696,7 +1543,8 @@ class TurnDropdown(disnake.ui.StringSelect):
             self.view.add_item(
                 TurnDropdown("2nd Tile", self.board, chosen_tile_num=self.board[self.view.tile_cords].num)
             )
-            await inter.response.edit_message(view=self.view)
+            with timed("discord.respond"):
+                await inter.response.edit_message(view=self.view)
             log(inter.author.id, "Game", f"Player chose dot {_cords}")
 
         elif self.label == "2nd Tile":
@@ -706,7 +1554,8 @@ class TurnDropdown(disnake.ui.StringSelect):
                     self.view.remove_item(_c)
             self.placeholder = f"2nd Tile Chosen: {_cords + 1}"
             self.view.add_item(TurnDropdown("2nd Dot", self.board, self.board[self.view.tile_cords_2].dots_not_found))
-            await inter.response.edit_message(view=self.view)
+            with timed("discord.respond"):
+                await inter.response.edit_message(view=self.view)
             log(inter.author.id, "Game", f"Player chose 2nd tile {_cords}: {self.board[self.view.tile_cords_2]}")
 
         else:
@@ -719,7 +1568,8 @@ class TurnView(disnake.ui.View):
     """A view that contain dropdown."""
 
     def __init__(self, board: Board, msg_id: int) -> None:
-        super().__init__(timeout=None)
+        # A turn nobody finishes ends after the idle TTL, its board is not evicted until then
+        super().__init__(timeout=GAME_IDLE_TTL)
         self.tile_cords = 0
         self.dot_cords = 0
         self.tile_cords_2 = 0
@@ -736,21 +1586,23 @@ class TurnView(disnake.ui.View):
         """Finish the view."""
         self.clear_items()
 
-        match_check, dot_1, dot_2 = game_flow.match_dot(
-            self.msg_id, self.tile_cords, self.tile_cords_2, self.dot_cords, self.dot_cords_2
+        # The board of the view, the game flow may have evicted it since the turn started
+        match_check, dot_1, dot_2 = self.board.match_dots(
+            self.tile_cords, self.dot_cords, self.tile_cords_2, self.dot_cords_2
         )
         if match_check:
-            self.won = game_flow.win_check(self.msg_id)
+            self.won = self.board.all_found
             self.matched = True
 
-        await inter.response.edit_message(
-            f"You chose {dot_1.num} and {dot_2.num}",
-            view=self,
-        )
+        with timed("discord.respond"):
+            await inter.response.edit_message(
+                f"You chose {dot_1.num} and {dot_2.num}",
+                view=self,
+            )
 
-        self.board.change_turn()
-        self.board.move_tiles()
-        log(inter.author.id, "Game", f"Turn ended: {dot_1}, {dot_2}")
+        picks = (self.tile_cords, self.dot_cords, self.tile_cords_2, self.dot_cords_2)
+        game_flow.end_turn(self.board, picks, matched=match_check)
+        log(inter.author.id, "Game", "Turn ended: %s, %s", dot_1.num, dot_2.num)
         self.stop()
 
 
@@ -763,48 +1615,133 @@ class MainView(disnake.ui.View):
     @disnake.ui.button(label="Play Turn", style=disnake.ButtonStyle.green, custom_id="play_your_turn")
     async def play_turn(self, _: disnake.Button, inter: disnake.MessageInteraction) -> None:
         """Button to play your turn."""
-        board = game_flow[inter.message.id]
+        try:
+            board = await game_flow.get_board(inter.message.id, inter.guild)
+        except BoardNotFoundError:
+            with timed("discord.respond"):
+                await inter.response.send_message("This game is over or has expired.", ephemeral=True)
+            return
+        except TooManyGamesError:
+            with timed("discord.respond"):
+                await inter.response.send_message(
+                    "Too many games are running right now, please try again later.", ephemeral=True
+                )
+            return
+
         if inter.author.id not in board.all_players_id:
-            await inter.response.send_message("You are not in the game!", ephemeral=True)
+            with timed("discord.respond"):
+                await inter.response.send_message("You are not in the game!", ephemeral=True)
             return
 
         player = board.current_player
+        if player.bot:
+            # The bot's turn was cut short, like by a restart
+            with timed("discord.respond"):
+                await inter.response.send_message("The bot is playing its turn!", ephemeral=True)
+            with board.playing():
+                if not await self.play_bot_turn(inter.message, board):
+                    self.reset_button(inter.message)
+            return
+
         if player.user_id != inter.author.id:
-            await inter.response.send_message("Please wait for your turn!", ephemeral=True)
+            with timed("discord.respond"):
+                await inter.response.send_message("Please wait for your turn!", ephemeral=True)
             return
 
+        with board.playing():
+            await self.play_user_turn(inter, board)
+
+    async def play_user_turn(self, inter: disnake.MessageInteraction, board: Board) -> None:
+        """Let the current player pick their stones, then show the moved rafts and play the turn of the bot."""
+        player = board.current_player
         view = TurnView(board, msg_id=inter.message.id)
         log(inter.author.id, "Game", f"Player {player.username} is playing their turn")
         self.play_turn.disabled = True
         self.play_turn.label = "Player Picking  Rocks"
         self.play_turn.style = disnake.ButtonStyle.grey
-        await inter.message.edit(view=self)
-        await inter.response.send_message(view=view, ephemeral=True)
+        # Not waited for, the interaction is answered first and a later update may be merged into it
+        edit_scheduler.queue(inter.message, view=self)
+        with timed("discord.respond"):
+            await inter.response.send_message(view=view, ephemeral=True)
+
+        if await view.wait():
+            # Abandoned, the player can start the turn again
+            self.reset_button(inter.message)
+            log(inter.author.id, "Game", f"Player {player.username} did not finish their turn")
+            return
 
-        await view.wait()
+        game_flow.save_board(board)
         if view.matched:
-            await inter.message.edit(content="# Dots Matched! Congratulations!", view=self)
+            await edit_scheduler.edit(inter.message, content="# Dots Matched! Congratulations!", view=self)
             log(inter.author.id, "Game", f"Player {player.username} matched the dots")
             await asyncio.sleep(4)
 
         if view.won:
-            await inter.message.edit(
-                content="# You Won! Congratulations!", view=None, file=board.hidden_image(), attachments=[]
-            )
+            await self.finish_game(inter.message, board)
             return
 
         self.play_turn.label = f"{board.tiles_moved[0]} Raft Moved to {board.tiles_moved[1]}"
         self.play_turn.disabled = True
         self.play_turn.style = disnake.ButtonStyle.blurple
-        await inter.message.edit("Rafts have moved!", view=self, file=board.hidden_image(), attachments=[])
+        board_img = await board.render_async(NumberStatus.HIDDEN)
+        await edit_scheduler.edit(
+            inter.message, content="Rafts have moved!", view=self, **board_image_fields(board_img)
+        )
         log(inter.author.id, "Game", f"Raft moved from {board.tiles_moved[0]} to {board.tiles_moved[1]}")
         await asyncio.sleep(5)
 
+        if board.current_player.bot and await self.play_bot_turn(inter.message, board):
+            return
+
+        self.reset_button(inter.message)
+        log(inter.author.id, "Game", "Player's turn ended")
+
+    async def play_bot_turn(self, message: disnake.Message, board: Board) -> bool:
+        """Play the turn of the bot and show its picks, return if it ended the game."""
+        self.play_turn.label = "Bot Picking Rocks"
+        self.play_turn.disabled = True
+        self.play_turn.style = disnake.ButtonStyle.grey
+        matched, dot_1, dot_2 = game_flow.bot_turn(board)
+        game_flow.save_board(board)
+        if board.all_found:
+            await self.finish_game(message, board)
+            return True
+
+        board_img = await board.render_async(NumberStatus.HIDDEN)
+        content = f"The bot chose {dot_1.num} and {dot_2.num}" + (" and matched them!" if matched else "")
+        await edit_scheduler.edit(message, content=content, view=self, **board_image_fields(board_img))
+        await asyncio.sleep(TIME_BOT_TURN)
+        return False
+
+    def reset_button(self, message: disnake.Message) -> None:
+        """Let the next player play their turn."""
         self.play_turn.label = "Play Turn"
         self.play_turn.disabled = False
         self.play_turn.style = disnake.ButtonStyle.green
-        await inter.message.edit("Click the button to play your turn.", view=self)
-        log(inter.author.id, "Game", "Player's turn ended")
+        edit_scheduler.queue(message, content="Click the button to play your turn.", view=self)
+
+    @staticmethod
+    async def finish_game(message: disnake.Message, board: Board) -> None:
+        """Show the final board and who won."""
+        user, opponent = board.players
+        winner = board.winner
+        if winner is None:
+            content = "# It's a Draw!"
+        elif winner.bot:
+            content = "# The Bot Won! Better luck next time."
+        elif opponent.bot:
+            content = "# You Won! Congratulations!"
+        else:
+            content = f"# {winner.username} Won! Congratulations!"
+
+        board_img = await board.render_async(NumberStatus.HIDDEN)
+        await edit_scheduler.edit(
+            message,
+            content=f"{content}\nPairs found: {user.score} - {opponent.score}",
+            view=None,
+            **board_image_fields(board_img),
+        )
+        await game_flow.finish_board(board.msg_id)
 
 
 class ChessCog(commands.Cog):
@@ -813,6 +1750,39 @@ class ChessCog(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
         self.persistence_views = False
+        self._db = getattr(bot, "db", None)
+        game_flow.snapshots = SnapshotStore(self._db) if self._db is not None else None
+        game_flow.events = EventLog()
+        if game_flow.snapshots is not None:
+            # Written before the database closes at shutdown
+            self._db.add_close_hook(game_flow.snapshots.close)
+        self.reap_games.start()
+
+    def cog_unload(self) -> None:
+        """Stop the background tasks and the render pool, and write the pending snapshots and events."""
+        self.reap_games.cancel()
+        shutdown_render_pool()
+        if game_flow.events is not None:
+            game_flow.events.close()
+            game_flow.events = None
+        if game_flow.snapshots is not None:
+            self._db.remove_close_hook(game_flow.snapshots.close)
+            # The store of the next load of the cog reads once these are written
+            game_flow.snapshots.close_soon()
+
+    @tasks.loop(seconds=REAPER_INTERVAL)
+    async def reap_games(self) -> None:
+        """Remove the idle games from memory and the stale snapshots, idle games stay resumable until then."""
+        game_flow.evict_idle()
+        if game_flow.snapshots is not None:
+            await game_flow.snapshots.prune()
+        log(
+            0,
+            "Game",
+            f"Active games: {len(game_flow)}, Evicted games: {game_flow.evicted}, {edit_scheduler.stats}, "
+            f"{render_cache}",
+            level="DEBUG",
+        )
 
     @commands.Cog.listener()
     async def on_ready(self) -> None:
@@ -836,27 +1806,45 @@ class ChessCog(commands.Cog):
         difficulty: Choose game difficulty.
 
         """
-        await inter.response.defer()
+        with timed("discord.respond"):
+            await inter.response.defer()
         msg = await inter.original_message()
 
-        board, board_img = game_flow.create_board(
-            msg_id=msg.id,
-            num_stones=difficulty,
-            user=inter.author,
-            opponent=None,
-        )
-        await inter.edit_original_message(
-            "This is your board. Look at it carefully, this will be the last time you can see the numbers!",
-            file=board_img,
-        )
+        try:
+            board, board_img = await game_flow.create_board(
+                msg_id=msg.id,
+                num_stones=difficulty,
+                user=inter.author,
+                opponent=None,
+            )
+        except TooManyGamesError:
+            with timed("discord.edit"):
+                await inter.edit_original_message("Too many games are running right now, please try again later.")
+            return
+        if board_img is None:
+            with timed("discord.edit"):
+                await inter.edit_original_message("The board could not be drawn, please start a new game.")
+            return
+        with timed("discord.edit"):
+            await inter.edit_original_message(
+                "This is your board. Look at it carefully, this will be the last time you can see the numbers!",
+                file=board_img,
+            )
         await asyncio.sleep(TIME_REMEMBER * (10 - difficulty))
         view = MainView()
-        await inter.edit_original_message(
-            "Click the button to play your turn.", view=view, file=board.hidden_image(), attachments=[]
-        )
+        board_img = await board.render_async(NumberStatus.HIDDEN)
+        with timed("discord.edit"):
+            # The numbers are taken off the message even if the hidden board could not be drawn
+            await inter.edit_original_message(
+                "Click the button to play your turn.",
+                view=view,
+                files=[board_img] if board_img is not None else [],
+                attachments=[],
+            )
 
 
 def setup(bot: commands.Bot) -> None:
     """Add the cog to the bot."""
+    atlas = load_atlas()
     bot.add_cog(ChessCog(bot))
-    print("[ChessGame] Loaded")
+    print(f"[ChessGame] Loaded - {atlas}")
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import disnake
+from disnake.ext import commands, tasks
+from utils.logging_utils import log
+from utils.metrics import METRICS, METRICS_FILE, METRICS_INTERVAL, QUANTILES
+
+C_Stats = 0x3E8FFB
+
+
+class StatsCog(commands.Cog):
+    """Latency statistics of the game phases."""
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.metrics_file = Path(METRICS_FILE)
+        if METRICS_INTERVAL > 0:
+            self.export_metrics.start()
+
+    def cog_unload(self) -> None:
+        """Stop the metrics export."""
+        self.export_metrics.cancel()
+
+    @tasks.loop(seconds=max(METRICS_INTERVAL, 1))
+    async def export_metrics(self) -> None:
+        """Write the latency histograms to the metrics file, for a Prometheus node exporter to pick up."""
+        try:
+            await asyncio.to_thread(METRICS.write_prometheus, self.metrics_file)
+        except OSError as e:
+            log(0, "Metrics", f"Could not write {self.metrics_file}: {e!s}", level="ERROR")
+
+    @commands.slash_command()
+    @commands.default_member_permissions(administrator=True)
+    async def stats(self, inter: disnake.ApplicationCommandInteraction) -> None:
+        """Show the latency of every phase of the games."""
+        histograms = METRICS.histograms()
+        if not histograms:
+            await inter.response.send_message("Nothing was timed yet.", ephemeral=True)
+            return
+
+        width = max(len(phase) for phase in histograms)
+        lines = [f"{'Phase':<{width}} {'Count':>7} {'p50':>8} {'p95':>8} {'p99':>8}"]
+        for phase, histogram in histograms.items():
+            p50, p95, p99 = (histogram.quantile(q) * 1000 for q in QUANTILES)
+            lines.append(f"{phase:<{width}} {histogram.count:>7} {p50:>6.1f}ms {p95:>6.1f}ms {p99:>6.1f}ms")
+
+        embed = disnake.Embed(
+            title="Latency",
+            description="```\n" + "\n".join(lines)[:4000] + "\n```",
+            color=disnake.Color(C_Stats),
+        )
+        await inter.response.send_message(embed=embed, ephemeral=True)
+
+
+def setup(bot: commands.Bot) -> None:
+    """Add the cog to the bot."""
+    bot.add_cog(StatsCog(bot))
+    print("[Stats] Loaded")
@@ -0,0 +1,124 @@
+"""Rebuild boards from the game event log.
+
+Run from the ``bot`` directory, like the bot itself::
+
+    python replay.py logs/events --scan
+    python replay.py logs/events --game 1263028897256312872 --turn 4
+    python replay.py logs/events --game 1263028897256312872 --image board.gif
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from cogs.chess import Board, NumberStatus
+from utils.events import read_events
+from utils.logging_utils import LOGGER
+
+
+@dataclass
+class GameHistory:
+    """The events of a single game."""
+
+    msg_id: int
+    record: bytes
+    turns: list[dict] = field(default_factory=list)
+    won: bool = False
+
+
+def load_games(paths: list[Path]) -> dict[int, GameHistory]:
+    """Group the events of the event files by game, games without a start event are skipped."""
+    games: dict[int, GameHistory] = {}
+    for event in read_events(paths):
+        if event["type"] == "start":
+            games[event["game"]] = GameHistory(event["game"], base64.b64decode(event["record"]))
+            continue
+
+        game = games.get(event["game"])
+        if game is None:
+            continue
+        if event["type"] == "turn":
+            game.turns.append(event)
+        elif event["type"] == "win":
+            game.won = True
+
+    return games
+
+
+def replay(game: GameHistory, turn: int | None = None) -> Board:
+    """Return the board of a game after a number of turns, or after all of them.
+
+    Raises ValueError if a replayed pick does not give the recorded result.
+    """
+    board = Board.from_game_record(game.msg_id, game.record, None, None)
+    for number, event in enumerate(game.turns[:turn], start=1):
+        matched, _, _ = board.match_dots(*event["picks"])
+        if matched != event["matched"]:
+            error_message = f"Game {game.msg_id} turn {number}: recorded {event['matched']}, replayed {matched}"
+            raise ValueError(error_message)
+
+        if matched:
+            board.current_player.score += 1
+        board.change_turn()
+        board.apply_moves(event["moves"])
+
+    return board
+
+
+def scan(games: dict[int, GameHistory]) -> None:
+    """Replay every game to its end and print the throughput."""
+    start = time.perf_counter()
+    turns = 0
+    errors = 0
+    for game in games.values():
+        try:
+            replay(game)
+        except (ValueError, IndexError) as e:
+            errors += 1
+            print(e)
+        turns += len(game.turns)
+    elapsed = time.perf_counter() - start
+
+    won = sum(game.won for game in games.values())
+    print(f"Games: {len(games)}, Won: {won}, Turns: {turns}, Errors: {errors}")
+    if elapsed:
+        print(f"Replayed in {elapsed:.2f}s - {len(games) / elapsed:.0f} games/s, {turns / elapsed:.0f} turns/s")
+
+
+def main() -> None:
+    """Run the replay tool."""
+    parser = argparse.ArgumentParser(description="Rebuild boards from the game event log.")
+    parser.add_argument("paths", type=Path, nargs="+", help="event files or directories of event files")
+    parser.add_argument("--scan", action="store_true", help="replay every game and report the throughput")
+    parser.add_argument("--game", type=int, help="message id of the game to rebuild")
+    parser.add_argument("--turn", type=int, help="number of turns to replay, all of them by default")
+    parser.add_argument("--image", type=Path, help="write the rebuilt board with its numbers visible")
+    args = parser.parse_args()
+
+    LOGGER.setLevel(logging.WARNING)
+    games = load_games(args.paths)
+
+    if args.scan or args.game is None:
+        scan(games)
+        return
+
+    if args.game not in games:
+        parser.error(f"No game {args.game} in the event log")
+
+    board = replay(games[args.game], args.turn)
+    print(board)
+    for tile in board:
+        print(tile)
+
+    if args.image:
+        args.image.write_bytes(board._render_image(NumberStatus.VISIBLE))  # noqa: SLF001
+        print(f"Board written to {args.image}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""Play seeded games headless, without Discord or images, to balance the difficulties and catch logic bugs.
+
+Run from the ``bot`` directory, like the bot itself::
+
+    python sim.py --games 1_000_000 --difficulty hard --workers 8
+    python sim.py --strategy random --difficulty easy --max-turns 2000
+    python sim.py --strategy memory --memory 4
+    python sim.py --strategy solver --memory 8 --difficulty hard
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import random
+import signal
+import time
+import traceback
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING
+
+from cogs.chess import Board, GameDifficulty, Player
+from utils.logging_utils import LOGGER
+from utils.opponent import Opponent
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    StrategyFactory = Callable[[random.Random, int], "Strategy"]
+
+MAX_TURNS = 1000
+MEMORY_SIZE = 6  # Stones remembered by the memory strategy
+CHUNKS_PER_WORKER = 16
+MAX_FAILURES = 10  # Failed games kept with their seed and error
+GAME_TIMEOUT = 1  # Seconds, a game taking longer is stopped and counted as failed, they take milliseconds
+
+
+class GameRuleError(Exception):
+    """A board broke a rule of the game."""
+
+
+class GameTimeoutError(Exception):
+    """A game took longer than ``GAME_TIMEOUT``, like when it is stuck in a loop."""
+
+
+def _stop_game(*_: object) -> None:
+    raise GameTimeoutError(GAME_TIMEOUT)
+
+
+class Strategy(ABC):
+    """A player, it sees the board before the game starts and the numbers of the two stones it picks every turn.
+
+    Stones are known by their index in the board's stones, which follows their raft when it moves, like a player
+    watching the board. The raft of a stone is its index divided by the number of stones on a raft.
+    """
+
+    def __init__(self, rng: random.Random, stones_per_raft: int) -> None:
+        self.rng = rng
+        self.stones_per_raft = stones_per_raft
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+    def start(self, stones: dict[int, int]) -> None:  # noqa: B027
+        """See the number of every stone, the board is only shown once."""
+
+    @abstractmethod
+    def pick(self, hidden: list[int]) -> tuple[int, int]:
+        """Return two stones on different rafts among the ones not found yet."""
+
+    def reveal(self, first: tuple[int, int], second: tuple[int, int], *, matched: bool) -> None:  # noqa: B027
+        """See the stone and number of both picks, and whether they matched."""
+
+    def moved(self, rafts: list[int]) -> None:  # noqa: B027
+        """See the rafts that moved at the end of a turn."""
+
+    def random_pick(self, candidates: list[int], hidden: list[int]) -> tuple[int, int]:
+        """Pick two stones on different rafts, the first among the candidates if possible."""
+        first = self.rng.choice(candidates or hidden)
+        raft = first // self.stones_per_raft
+        others = [stone for stone in candidates if stone // self.stones_per_raft != raft]
+        if not others:
+            others = [stone for stone in hidden if stone // self.stones_per_raft != raft]
+        return first, self.rng.choice(others)
+
+
+class RandomStrategy(Strategy):
+    """Remembers nothing and picks two stones at random."""
+
+    def pick(self, hidden: list[int]) -> tuple[int, int]:
+        """Return two random stones."""
+        return self.random_pick(hidden, hidden)
+
+
+class MemoryStrategy(Strategy):
+    """Remembers the numbers of the last stones it saw, up to its capacity, and picks a known pair when it can.
+
+    Otherwise it picks stones it does not know, to learn their numbers.
+    """
+
+    def __init__(self, rng: random.Random, stones_per_raft: int, capacity: int | None = MEMORY_SIZE) -> None:
+        super().__init__(rng, stones_per_raft)
+        self.capacity = capacity
+        self.known: OrderedDict[int, int] = OrderedDict()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(Capacity:{self.capacity}, Known:{len(self.known)})"
+
+    def remember(self, stone: int, number: int) -> None:
+        """Remember the number of a stone, forgetting the oldest one when the memory is full."""
+        self.known[stone] = number
+        self.known.move_to_end(stone)
+        if self.capacity is not None and len(self.known) > self.capacity:
+            self.known.popitem(last=False)
+
+    def start(self, stones: dict[int, int]) -> None:
+        """Look at the stones in a random order."""
+        order = list(stones)
+        self.rng.shuffle(order)
+        for stone in order:
+            self.remember(stone, stones[stone])
+
+    def pick(self, hidden: list[int]) -> tuple[int, int]:
+        """Return a known pair, or stones not known yet."""
+        seen: dict[int, int] = {}
+        for stone, number in self.known.items():
+            if number in seen:
+                return seen[number], stone
+            seen[number] = stone
+
+        return self.random_pick([stone for stone in hidden if stone not in self.known], hidden)
+
+    def reveal(self, first: tuple[int, int], second: tuple[int, int], *, matched: bool) -> None:
+        """Forget a matched pair, otherwise remember both stones."""
+        for stone, number in (first, second):
+            if matched:
+                self.known.pop(stone, None)
+            else:
+                self.remember(stone, number)
+
+
+class PerfectStrategy(MemoryStrategy):
+    """Remembers every stone, so it matches a pair every turn."""
+
+    def __init__(self, rng: random.Random, stones_per_raft: int) -> None:
+        super().__init__(rng, stones_per_raft, capacity=None)
+
+
+STRATEGIES: dict[str, StrategyFactory] = {
+    "random": RandomStrategy,
+    "memory": MemoryStrategy,
+    "perfect": PerfectStrategy,
+    "solver": Opponent,  # The bot opponent of the games
+}
+
+
+@dataclass
+class SimStats:
+    """Results of simulated games."""
+
+    games: int = 0
+    won: int = 0
+    turns: Counter[int] = field(default_factory=Counter)  # Turns to win, by number of games
+    matches: int = 0
+    misses: int = 0
+    misses_before_match: Counter[int] = field(default_factory=Counter)  # Misses in a row before a match
+    failures: list[tuple[int, str]] = field(default_factory=list)
+    failed: int = 0
+
+    @property
+    def match_rate(self) -> float:
+        """Return the fraction of turns that matched a pair."""
+        played = self.matches + self.misses
+        return self.matches / played if played else 0.0
+
+    def merge(self, other: SimStats) -> None:
+        """Add the results of other games."""
+        self.games += other.games
+        self.won += other.won
+        self.turns.update(other.turns)
+        self.matches += other.matches
+        self.misses += other.misses
+        self.misses_before_match.update(other.misses_before_match)
+        self.failed += other.failed
+        self.failures.extend(other.failures[: MAX_FAILURES - len(self.failures)])
+
+    def __repr__(self) -> str:
+        return (
+            f"SimStats(Games:{self.games}, Won:{self.won}, Failed:{self.failed}, Matches:{self.matches}, "
+            f"Misses:{self.misses}, Match rate:{self.match_rate:.1%})"
+        )
+
+
+def hidden_stones(board: Board) -> dict[int, tuple[int, int]]:
+    """Return the position of the raft and the pick index of every stone not found yet, by stone."""
+    return {dot.index: (tile.num, pick) for tile in board.active_tiles for pick, dot in enumerate(tile.dots_not_found)}
+
+
+def check_board(board: Board, matches: int) -> None:
+    """Raise GameRuleError if the board broke a rule of the game."""
+    positions = [tile.num for tile in board]
+    if positions != list(range(len(positions))):
+        error_message = f"Rafts are not on their positions: {positions}"
+        raise GameRuleError(error_message)
+
+    found = Counter(dot.num for tile in board.active_tiles for dot in tile.dots_found)
+    if found.total() != 2 * matches or any(count != 2 for count in found.values()):  # noqa: PLR2004
+        error_message = f"Found stones {dict(found)} after {matches} matches"
+        raise GameRuleError(error_message)
+
+
+def play_game(
+    difficulty: GameDifficulty, new_strategy: StrategyFactory, seed: int, stats: SimStats, max_turns: int
+) -> None:
+    """Play a seeded game to the end, or to ``max_turns``, check the board after every turn and add it to the stats."""
+    board = Board(seed, difficulty.value, [Player(user=None), Player(user=None, bot=True)], seed=seed)
+    board.make_tiles()
+    strategy = new_strategy(random.Random(seed), difficulty.value)  # noqa: S311
+    strategy.start({dot.index: dot.num for tile in board.active_tiles for dot in tile})
+
+    matches = misses = 0
+    for turn in range(1, max_turns + 1):
+        hidden = hidden_stones(board)
+        first, second = strategy.pick(list(hidden))
+        (tile1, dot1), (tile2, dot2) = hidden[first], hidden[second]
+        matched, dot_1, dot_2 = board.match_dots(tile1, dot1, tile2, dot2)
+        strategy.reveal((first, dot_1.num), (second, dot_2.num), matched=matched)
+        board.change_turn()
+        strategy.moved([board[to].stone_offset // difficulty.value for _, to in board.move_tiles()])
+
+        if matched:
+            matches += 1
+            stats.misses_before_match[misses] += 1
+            misses = 0
+        else:
+            stats.misses += 1
+            misses += 1
+        stats.matches += matched
+
+        check_board(board, matches)
+        if board.all_found:
+            stats.won += 1
+            stats.turns[turn] += 1
+            return
+
+
+def run_games(difficulty: GameDifficulty, strategy_name: str, memory: int, max_turns: int, seeds: range) -> SimStats:
+    """Play a range of seeded games, run on the worker processes."""
+    LOGGER.setLevel(logging.WARNING)
+    new_strategy = STRATEGIES[strategy_name]
+    if new_strategy in (MemoryStrategy, Opponent):
+        new_strategy = partial(new_strategy, capacity=memory)
+
+    # Games are stopped by a timer signal, where the platform has one
+    timer = hasattr(signal, "setitimer")
+    if timer:
+        signal.signal(signal.SIGALRM, _stop_game)
+
+    stats = SimStats()
+    for seed in seeds:
+        stats.games += 1
+        try:
+            if timer:
+                signal.setitimer(signal.ITIMER_REAL, GAME_TIMEOUT)
+            play_game(difficulty, new_strategy, seed, stats, max_turns)
+        except Exception:  # noqa: BLE001
+            stats.failed += 1
+            if len(stats.failures) < MAX_FAILURES:
+                stats.failures.append((seed, traceback.format_exc(limit=-4)))
+        finally:
+            if timer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+
+    return stats
+
+
+def percentile(counts: Counter[int], q: float) -> int:
+    """Return a percentile of values counted by occurrence."""
+    rank = q * counts.total()
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen >= rank:
+            return value
+    return 0
+
+
+def report(stats: SimStats, elapsed: float, max_turns: int) -> None:
+    """Print the throughput and the aggregate statistics of the games."""
+    print(f"{stats.games} games in {elapsed:.1f}s - {stats.games / elapsed:.0f} games/s")
+    print(stats)
+
+    if stats.turns:
+        mean = sum(turns * count for turns, count in stats.turns.items()) / stats.won
+        print(
+            f"Turns to win - Mean:{mean:.1f}, p50:{percentile(stats.turns, 0.5)}, p90:{percentile(stats.turns, 0.9)}, "
+            f"p99:{percentile(stats.turns, 0.99)}, Min:{min(stats.turns)}, Max:{max(stats.turns)}"
+        )
+    if stats.won < stats.games - stats.failed:
+        print(f"Not won within {max_turns} turns: {stats.games - stats.failed - stats.won}")
+
+    if stats.misses_before_match:
+        print("Misses before a match:")
+        total = stats.misses_before_match.total()
+        shown = sorted(stats.misses_before_match)[:10]
+        for misses in shown:
+            share = stats.misses_before_match[misses] / total
+            print(f"{misses:>4} {share:>7.1%} {'#' * round(share * 50)}")
+        rest = total - sum(stats.misses_before_match[misses] for misses in shown)
+        if rest:
+            print(f"{'more':>4} {rest / total:>7.1%}")
+
+    for seed, error in stats.failures:
+        print(f"Game with seed {seed} failed:\n{error}")
+
+
+def main() -> None:
+    """Run the simulator."""
+    parser = argparse.ArgumentParser(description="Play seeded games headless.")
+    parser.add_argument("--games", type=int, default=10_000)
+    parser.add_argument("--difficulty", choices=[d.name.lower() for d in GameDifficulty], default="easy")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="memory")
+    parser.add_argument(
+        "--memory", type=int, default=MEMORY_SIZE, help="stones remembered by the memory and solver players"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game, the next games count up from it")
+    parser.add_argument("--max-turns", type=int, default=MAX_TURNS, help="turns after which a game is given up")
+    args = parser.parse_args()
+
+    LOGGER.setLevel(logging.WARNING)
+    difficulty = GameDifficulty[args.difficulty.upper()]
+    chunk_size = max(1, min(10_000, args.games // (args.workers * CHUNKS_PER_WORKER)))
+    chunks = [
+        range(start, min(start + chunk_size, args.seed + args.games))
+        for start in range(args.seed, args.seed + args.games, chunk_size)
+    ]
+
+    stats = SimStats()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(run_games, difficulty, args.strategy, args.memory, args.max_turns, seeds)
+            for seeds in chunks
+        ]
+        for future in as_completed(futures):
+            stats.merge(future.result())
+    report(stats, time.perf_counter() - start, args.max_turns)
+
+
+if __name__ == "__main__":
+    main()
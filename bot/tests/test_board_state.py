@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import tracemalloc
+
+import pytest
+from cogs.chess import GameDifficulty
+from utils.testing import make_board, play_turn
+
+BOARDS = 200
+MAX_STATE = 8 * 1024  # Bytes of game state per dealt board, without its rendered frames
+MAX_SNAPSHOT = 128  # Bytes
+
+
+@pytest.mark.parametrize("difficulty", GameDifficulty)
+def test_state_memory_per_board(difficulty: GameDifficulty) -> None:
+    """Keep the game state of a dealt board under its memory bound."""
+    make_board(difficulty)  # Load the assets outside of the measurement
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    dealt = [make_board(difficulty, seed) for seed in range(BOARDS)]
+    state = (tracemalloc.get_traced_memory()[0] - before) / len(dealt)
+    tracemalloc.stop()
+
+    assert state < MAX_STATE
+    assert len(dealt[0].snapshot()) < MAX_SNAPSHOT
+
+
+@pytest.mark.parametrize("difficulty", GameDifficulty)
+def test_copy_keeps_the_game(difficulty: GameDifficulty) -> None:
+    """Copy a board mid-game into one that plays on the same way."""
+    board = make_board(difficulty, 1)
+    for _ in range(3):
+        play_turn(board)
+
+    copy = board.copy()
+    assert copy.snapshot() == board.snapshot()
+    assert copy.hidden_stones == board.hidden_stones
+
+    play_turn(board)
+    play_turn(copy)
+    assert copy.snapshot() == board.snapshot()
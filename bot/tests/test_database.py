@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import aclosing
+from typing import TYPE_CHECKING
+
+import pytest
+from utils.database import DatabasePool, query_tables
+from utils.testing import measure_peak
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+ROWS = 20_000
+CHUNK_SIZE = 256
+MAX_STREAM_PEAK = 512 * 1024  # Bytes, reading every row at once peaks at about 4MiB
+
+
+async def make_games_table(path: Path, rows: int) -> DatabasePool:
+    """Return a pool of a single connection on a database with a large table."""
+    pool = DatabasePool(str(path / "stream.sqlite"), size=1)
+    await pool.execute("CREATE TABLE games (id INTEGER PRIMARY KEY, player INTEGER, score INTEGER, moves TEXT)")
+    await pool.executemany(
+        "INSERT INTO games VALUES (?, ?, ?, ?)", ((i, i % 97, i % 13, "x" * 32) for i in range(rows))
+    )
+    return pool
+
+
+def test_stream_reads_every_row_in_bounded_memory(tmp_path: Path) -> None:
+    """Stream a large table with a peak far below the one of fetching it at once."""
+
+    async def read() -> tuple[tuple[int, int], tuple[int, int]]:
+        pool = await make_games_table(tmp_path, ROWS)
+
+        async def fetch_all() -> int:
+            return len(await pool.fetch("SELECT * FROM games"))
+
+        async def stream_all() -> int:
+            return sum([1 async for _ in pool.stream("SELECT * FROM games", chunk_size=CHUNK_SIZE)])
+
+        try:
+            return await measure_peak(fetch_all), await measure_peak(stream_all)
+        finally:
+            await pool.close()
+
+    (fetched, fetch_peak), (streamed, stream_peak) = asyncio.run(read())
+    assert fetched == streamed == ROWS
+    assert stream_peak < MAX_STREAM_PEAK
+    assert stream_peak < fetch_peak / 8
+
+
+def test_stream_closed_early_gives_the_connection_back(tmp_path: Path) -> None:
+    """Stop reading a stream early, the only connection of the pool is free again once the stream is closed."""
+
+    async def read() -> tuple[int, int]:
+        pool = await make_games_table(tmp_path, CHUNK_SIZE * 4)
+        read = 0
+        try:
+            async with aclosing(pool.stream("SELECT * FROM games", chunk_size=CHUNK_SIZE)) as stream:
+                async for _ in stream:
+                    read += 1
+                    if read == CHUNK_SIZE + 1:
+                        break
+            return read, await asyncio.wait_for(pool.fetchval("SELECT count(*) FROM games", cache=False), 5)
+        finally:
+            await pool.close()
+
+    assert asyncio.run(read()) == (CHUNK_SIZE + 1, CHUNK_SIZE * 4)
+
+
+@pytest.mark.parametrize(
+    ("query", "tables"),
+    [
+        ("SELECT s.score, g.value FROM scores s, settings g WHERE s.id = g.id", {"scores", "settings"}),
+        ("SELECT score FROM main.scores WHERE id = ?", {"scores"}),
+        (
+            'SELECT * FROM "scores" AS s JOIN settings g ON s.id = g.id LEFT JOIN games USING (id)',
+            {"scores", "settings", "games"},
+        ),
+        ("SELECT * FROM (SELECT * FROM scores) s, settings", {"scores", "settings"}),
+        ("SELECT * FROM scores WHERE id = (SELECT max(id) FROM games)", {"scores", "games"}),
+        ("SELECT 'FROM quotes' FROM scores -- FROM comments", {"scores"}),
+        ("INSERT OR REPLACE INTO snapshots (id, data) VALUES (?, ?)", {"snapshots"}),
+        ("UPDATE OR IGNORE main.scores SET score = 1", {"scores"}),
+        ("DELETE FROM scores WHERE id IN (SELECT id FROM games)", {"scores", "games"}),
+        ("CREATE TABLE IF NOT EXISTS games (id INTEGER)", {"games"}),
+        ("SELECT value FROM json_each(?)", set()),
+        ("SELECT 1", set()),
+    ],
+)
+def test_query_tables(query: str, tables: set[str]) -> None:
+    """Find every table of a query, without its schema, and none when a table cannot be known."""
+    assert query_tables(query) == tables
+
+
+def test_cached_rows_are_dropped_after_a_write(tmp_path: Path) -> None:
+    """Read a write to any table of a cached query, joined by a comma or named with its schema."""
+
+    async def read_after_writes() -> list[object]:
+        pool = DatabasePool(str(tmp_path / "cache.sqlite"), size=2, cache_size=16)
+        try:
+            await pool.execute("CREATE TABLE scores (id INTEGER PRIMARY KEY, score INTEGER)")
+            await pool.execute("CREATE TABLE settings (id INTEGER PRIMARY KEY, value INTEGER)")
+            await pool.execute("INSERT INTO scores VALUES (1, 10)")
+            await pool.execute("INSERT INTO settings VALUES (1, 20)")
+            join = "SELECT g.value FROM scores s, settings g WHERE s.id = g.id AND s.id = ?"
+            qualified = "SELECT score FROM main.scores WHERE id = ?"
+
+            values = [await pool.fetchval(join, 1), await pool.fetchval(qualified, 1)]
+            await pool.execute("UPDATE settings SET value = 30")
+            await pool.execute("UPDATE scores SET score = 99")
+            return [*values, await pool.fetchval(join, 1), await pool.fetchval(qualified, 1)]
+        finally:
+            await pool.close()
+
+    assert asyncio.run(read_after_writes()) == [20, 10, 30, 99]
+
+
+def test_query_cache_counts_hits_and_misses(tmp_path: Path) -> None:
+    """Answer repeated lookups from the cache, miss again once a write dropped them, never cache unknown tables."""
+
+    async def lookups() -> DatabasePool:
+        pool = DatabasePool(str(tmp_path / "cache.sqlite"), size=1, cache_size=16)
+        try:
+            await pool.execute("CREATE TABLE scores (id INTEGER PRIMARY KEY, score INTEGER)")
+            await pool.execute("INSERT INTO scores VALUES (1, 10)")
+            for _ in range(3):
+                assert await pool.fetchrow("SELECT * FROM scores WHERE id = ?", 1) == [1, 10]
+            await pool.execute("UPDATE scores SET score = 11 WHERE id = 1")
+            assert await pool.fetchrow("SELECT * FROM scores WHERE id = ?", 1) == [1, 11]
+            for _ in range(2):
+                assert await pool.fetchval("SELECT value FROM json_each(?)", "[5]") == 5
+            assert await pool.fetchval("SELECT count(*) FROM scores", cache=False) == 1
+            return pool
+        finally:
+            await pool.close()
+
+    cache = asyncio.run(lookups()).cache
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.invalidations) == (2, 4, 1)
+    assert len(cache) == 1
+
+
+def test_pool_reuses_its_connections(tmp_path: Path) -> None:
+    """Run every query on the connections opened with the pool, never more of them at once than its size."""
+
+    async def query_together() -> tuple[set[int], set[int], int]:
+        pool = DatabasePool(str(tmp_path / "pool.sqlite"), size=2)
+        used: set[int] = set()
+        borrowed = most_borrowed = 0
+
+        async def query() -> None:
+            nonlocal borrowed, most_borrowed
+            async with pool.acquire() as db:
+                borrowed += 1
+                most_borrowed = max(most_borrowed, borrowed)
+                used.add(id(db))
+                async with db.execute("SELECT 1") as cur:
+                    await cur.fetchone()
+                borrowed -= 1
+
+        try:
+            await asyncio.gather(*(query() for _ in range(20)))
+            return used, {id(db) for db in pool._connections}, most_borrowed
+        finally:
+            await pool.close()
+
+    used, opened, most_borrowed = asyncio.run(query_together())
+    assert used == opened
+    assert len(opened) == most_borrowed == 2
+
+
+def test_acquire_waits_for_a_free_connection(tmp_path: Path) -> None:
+    """Hold every connection of the pool, the next query waits until one is given back and runs on it."""
+
+    async def contend() -> None:
+        pool = DatabasePool(str(tmp_path / "pool.sqlite"), size=1)
+        try:
+            async with pool.acquire() as db:
+                waiting = asyncio.create_task(pool.fetchval("SELECT 1", cache=False))
+                await asyncio.sleep(0.05)
+                assert not waiting.done()
+            assert await asyncio.wait_for(waiting, 5) == 1
+            async with pool.acquire() as same_db:
+                assert same_db is db
+        finally:
+            await pool.close()
+
+    asyncio.run(contend())
+
+
+def test_close_waits_for_the_borrowed_connections(tmp_path: Path) -> None:
+    """Close the connections once the queries using them are done, the pool opens again on the next query."""
+
+    async def close_while_borrowed() -> None:
+        pool = DatabasePool(str(tmp_path / "pool.sqlite"), size=2)
+        async with pool.acquire() as db:
+            closing = asyncio.create_task(pool.close())
+            await asyncio.sleep(0.05)
+            assert not closing.done()
+            assert await db.execute_fetchall("SELECT 1") == [(1,)]
+        await asyncio.wait_for(closing, 5)
+        assert not pool.is_open
+        with pytest.raises(ValueError, match="no active connection"):
+            await db.execute("SELECT 1")
+
+        try:
+            assert await pool.fetchval("SELECT 2", cache=False) == 2
+            assert pool.is_open
+        finally:
+            await pool.close()
+
+    asyncio.run(close_while_borrowed())
+
+
+@pytest.fixture()
+def write_behind_pool(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Callable[[], DatabasePool]:
+    """Return a factory of write-behind pools on a scores table, committing only when flushed or closed."""
+    monkeypatch.setenv("DB_FLUSH_INTERVAL", "3600000")
+    path = str(tmp_path / "writes.sqlite")
+
+    async def create_table() -> None:
+        pool = DatabasePool(path, size=1)
+        await pool.execute("CREATE TABLE scores (id INTEGER PRIMARY KEY, score INTEGER)")
+        await pool.close()
+
+    asyncio.run(create_table())
+    return lambda: DatabasePool(path, size=2, write_behind=True)
+
+
+def test_queued_writes_are_committed_in_order(write_behind_pool: Callable[[], DatabasePool]) -> None:
+    """Commit the queued statements on flush, in the order they were queued, whatever their query."""
+
+    async def write() -> tuple[DatabasePool, list]:
+        pool = write_behind_pool()
+        try:
+            await pool.execute("INSERT INTO scores VALUES (?, ?)", 1, 0)
+            for digit in range(1, 6):
+                await pool.execute("UPDATE scores SET score = score * 10 + ? WHERE id = 1", digit)
+                await pool.executemany("INSERT INTO scores VALUES (?, ?)", [(digit * 10, digit), (digit * 10 + 1, 0)])
+                await pool.execute("DELETE FROM scores WHERE id = ?", digit * 10 + 1)
+            assert pool.pending_writes == 16
+            assert await pool.fetchval("SELECT count(*) FROM scores", cache=False) == 0
+
+            await pool.flush()
+            assert pool.pending_writes == 0
+            return pool, await pool.fetch("SELECT * FROM scores ORDER BY id")
+        finally:
+            await pool.close()
+
+    pool, rows = asyncio.run(write())
+    assert rows == [(1, 12345), (10, 1), (20, 2), (30, 3), (40, 4), (50, 5)]
+    assert (pool.write_stats.queued, pool.write_stats.written, pool.write_stats.failed) == (16, 16, 0)
+
+
+def test_queued_writes_are_committed_on_close(write_behind_pool: Callable[[], DatabasePool]) -> None:
+    """Commit the statements still queued when the pool closes, before its connections close."""
+
+    async def write_then_read() -> list:
+        pool = write_behind_pool()
+        await pool.executemany("INSERT INTO scores VALUES (?, ?)", [(1, 10), (2, 20)])
+        await pool.execute("UPDATE scores SET score = 30 WHERE id = 2")
+        await pool.close()
+        assert pool.write_stats.written == 2
+
+        pool = DatabasePool(pool._path, size=1)
+        try:
+            return await pool.fetch("SELECT * FROM scores ORDER BY id")
+        finally:
+            await pool.close()
+
+    assert asyncio.run(write_then_read()) == [(1, 10), (2, 30)]
+
+
+def test_failed_queued_statement_is_dropped(
+    write_behind_pool: Callable[[], DatabasePool], caplog: pytest.LogCaptureFixture
+) -> None:
+    """Drop and count a queued statement that fails, the statements queued around it are committed."""
+
+    async def write() -> tuple[DatabasePool, list]:
+        pool = write_behind_pool()
+        try:
+            await pool.execute("INSERT INTO scores VALUES (?, ?)", 1, 10)
+            await pool.execute("INSERT INTO scores VALUES (?, ?)", 1, 99)
+            await pool.execute("INSERT INTO missing VALUES (?)", 1)
+            await pool.execute("INSERT INTO scores VALUES (?, ?)", 2, 20)
+            await pool.flush()
+            return pool, await pool.fetch("SELECT * FROM scores ORDER BY id")
+        finally:
+            await pool.close()
+
+    pool, rows = asyncio.run(write())
+    assert rows == [(1, 10), (2, 20)]
+    assert (pool.write_stats.written, pool.write_stats.failed, pool.write_stats.batches) == (2, 2, 1)
+    dropped = [record.getMessage() for record in caplog.records if "Queued statement dropped" in record.getMessage()]
+    assert len(dropped) == 2
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+from cogs.chess import Board, GameDifficulty, Player, deal_numbers
+from utils.testing import make_board
+
+DEALS = 20_000
+
+
+def assert_dealt_in_pairs(numbers: list[int], count: int) -> None:
+    """Assert that every number is dealt twice and no tile got both stones of a number."""
+    assert sorted(numbers) == [number // 2 for number in range(len(numbers))]
+    for offset in range(0, len(numbers), count):
+        assert len(set(numbers[offset : offset + count])) == count, f"A tile got both stones of a number: {numbers}"
+
+
+@pytest.mark.parametrize("difficulty", GameDifficulty)
+def test_deals_follow_the_rules(difficulty: GameDifficulty) -> None:
+    """Deal the numbers of many boards, every one in pairs with no pair on a single tile."""
+    tiles = Board(0, difficulty.value, [Player(user=None)])._total_spaces - 1
+    for seed in range(DEALS):
+        assert_dealt_in_pairs(deal_numbers(random.Random(seed), tiles, difficulty.value), difficulty.value)  # noqa: S311
+
+
+@pytest.mark.parametrize("count", [3, 4, 5])
+@pytest.mark.parametrize("tiles", [2, 3, 8, 15])
+def test_deals_on_any_number_of_tiles(tiles: int, count: int) -> None:
+    """Deal pairs on every size of board that can hold them."""
+    if tiles * count % 2:
+        with pytest.raises(ValueError, match="Cannot deal pairs"):
+            deal_numbers(random.Random(0), tiles, count)  # noqa: S311
+        return
+
+    for seed in range(200):
+        assert_dealt_in_pairs(deal_numbers(random.Random(seed), tiles, count), count)  # noqa: S311
+
+
+@pytest.mark.parametrize("difficulty", GameDifficulty)
+def test_seed_deals_the_same_board(difficulty: GameDifficulty) -> None:
+    """Deal the same board from the same seed, and other boards from other seeds."""
+    boards = [make_board(difficulty, seed).snapshot() for seed in range(50)]
+    assert boards == [make_board(difficulty, seed).snapshot() for seed in range(50)]
+    assert len(set(boards)) > 45
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import types
+
+import pytest
+from cogs import chess
+from cogs.chess import GameDifficulty, GameFlow, TooManyGamesError, TurnView
+from utils.testing import make_board
+
+
+def flow_with_boards(count: int, **options: object) -> GameFlow:
+    """Return a game flow holding boards with message IDs 0 to ``count - 1``, the first is the least recent."""
+    flow = GameFlow(**options)
+    for msg_id in range(count):
+        flow._boards[msg_id] = make_board(GameDifficulty.EASY, msg_id)
+    return flow
+
+
+def test_make_room_keeps_the_boards_being_played() -> None:
+    """Evict the least recently played board without a turn in progress, reject a game when every board has one."""
+    flow = flow_with_boards(3, max_games=3)
+    with flow._boards[0].playing():
+        flow._make_room()
+        assert list(flow._boards) == [0, 2]
+
+        flow._boards[3] = make_board(GameDifficulty.EASY, 3)
+        with flow._boards[2].playing(), flow._boards[3].playing():
+            with pytest.raises(TooManyGamesError):
+                flow._make_room()
+            assert len(flow) == 3
+
+
+def test_evict_idle_keeps_the_boards_being_played() -> None:
+    """Evict the idle boards, except the one a turn is played on."""
+    flow = flow_with_boards(3, idle_ttl=60)
+    with flow._boards[1].playing():
+        for board in flow.boards:
+            board._last_active = time.monotonic() - 120
+
+        assert flow.evict_idle() == 2
+        assert list(flow._boards) == [1]
+
+
+def test_turn_finishes_on_an_evicted_board(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Finish a turn whose board was evicted while the player was picking, on the board of the view."""
+    board = make_board(GameDifficulty.EASY, 1)
+    monkeypatch.setattr(chess, "game_flow", GameFlow())
+
+    async def pick_and_finish() -> TurnView:
+        view = TurnView(board, msg_id=1)
+        tile = board.active_tiles[0]
+        view.tile_cords, view.dot_cords = tile.num, 0
+        view.tile_cords_2, view.dot_cords_2 = board.find_pair(tile.num, 0)
+
+        async def edit_message(*_: object, **__: object) -> None:
+            pass
+
+        inter = types.SimpleNamespace(
+            author=types.SimpleNamespace(id=1), response=types.SimpleNamespace(edit_message=edit_message)
+        )
+        await asyncio.wait_for(view.finish_view(inter), 5)
+        return view
+
+    view = asyncio.run(pick_and_finish())
+    assert view.is_finished()
+    assert view.matched
+    assert board.players[0].score == 1
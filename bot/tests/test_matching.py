@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+from cogs.chess import Board, GameDifficulty
+from utils.testing import legacy_all_found, legacy_dots_not_found, legacy_match, make_board, random_picks
+
+GAMES = 25
+
+
+def play_against_legacy(board: Board, rng: random.Random) -> int:
+    """Play a game on a board and a copy matched the old way, asserting they play the same, return the turns."""
+    legacy = board.copy()
+    turns = 0
+    while not legacy_all_found(legacy):
+        assert not board.all_found, f"Won with {board.remaining_pairs} pairs left after {turns} turns"
+
+        picks = random_picks(board, rng)
+        matched, dot_1, dot_2 = board.match_dots(*picks)
+        legacy_matched, legacy_dot_1, legacy_dot_2 = legacy_match(legacy, *picks)
+        assert (matched, dot_1.index, dot_2.index) == (legacy_matched, legacy_dot_1.index, legacy_dot_2.index)
+
+        legacy.apply_moves(board.move_tiles())
+        turns += 1
+        for tile, legacy_tile in zip(board.active_tiles, legacy.active_tiles, strict=True):
+            assert [dot.index for dot in tile.dots_not_found] == [
+                dot.index for dot in legacy_dots_not_found(legacy_tile)
+            ]
+        assert board.snapshot() == legacy.snapshot()
+
+    assert board.all_found
+    assert board.remaining_pairs == 0
+    return turns
+
+
+@pytest.mark.parametrize("difficulty", GameDifficulty)
+def test_pair_index_plays_like_the_scan(difficulty: GameDifficulty) -> None:
+    """Match random picks with the pair index and with the old scan of every stone, turn by turn."""
+    for game in range(GAMES):
+        assert play_against_legacy(make_board(difficulty, game), random.Random(game)) > 0  # noqa: S311
+
+
+@pytest.mark.parametrize("difficulty", GameDifficulty)
+def test_find_pair(difficulty: GameDifficulty) -> None:
+    """Find the other stone of every number."""
+    board = make_board(difficulty, 1)
+    for tile in board.active_tiles:
+        for position, dot in enumerate(tile.dots_not_found):
+            pair_tile, pair_position = board.find_pair(tile.num, position)
+            pair = board[pair_tile].dots_not_found[pair_position]
+            assert pair.num == dot.num
+            assert pair.index != dot.index
+            assert pair_tile != tile.num
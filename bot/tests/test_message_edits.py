@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import types
+
+from utils.message_edits import EditScheduler, PendingEdit, RateBucket
+from utils.testing import FakeChannel, FakeMessage, play_edit_games
+
+RATE, PER = 5, 0.2  # Discord's 5 edits per 5 seconds of a channel, 25 times faster
+
+
+def test_merged_edits_show_only_states_of_the_edits_one_by_one() -> None:
+    """Play games through the scheduler and one edit at a time, the scheduler skips states but never adds one."""
+
+    async def play() -> tuple[list[FakeMessage], list[FakeMessage], list[FakeChannel], EditScheduler]:
+        direct, _, _ = await play_edit_games(6, 2, 2, scheduled=False, rate=RATE, per=PER)
+        scheduled, channels, scheduler = await play_edit_games(6, 2, 2, scheduled=True, rate=RATE, per=PER)
+        return direct, scheduled, channels, scheduler
+
+    direct, scheduled, channels, scheduler = asyncio.run(play())
+    for before, after in zip(direct, scheduled, strict=True):
+        states = iter(before.history)
+        assert all(state in states for state in after.history), f"{after} went through {after.history}"
+        assert after.history[-1] == before.history[-1]
+
+    assert sum(channel.refused for channel in channels) == 0
+    assert scheduler.stats.saved > 0
+    assert scheduler.stats.sent == sum(len(message.history) for message in scheduled)
+    assert scheduler.stats.sent + scheduler.stats.saved == scheduler.stats.requested
+
+
+def test_merge_keeps_the_last_content_and_every_new_file() -> None:
+    """Merge updates, the files of an update keeping the attachments are added to the files not sent yet."""
+    first, second, third = (types.SimpleNamespace(filename=f"{i}.gif") for i in range(3))
+    pending = PendingEdit()
+    pending.merge({"content": "a", "file": first})
+    pending.merge({"content": "b", "files": [second]})
+    assert pending.fields == {"content": "b", "files": [first, second]}
+
+    pending.merge({"attachments": [], "file": third})
+    assert pending.fields == {"content": "b", "files": [third], "attachments": []}
+
+
+def test_rate_bucket_delays_the_edit_over_the_rate() -> None:
+    """Allow ``rate`` edits right away, then make the next one wait for the oldest to leave the window."""
+    bucket = RateBucket(2, 10)
+    for _ in range(2):
+        assert bucket.delay() == 0
+        bucket.take()
+    assert 9 < bucket.delay() <= 10
+
+
+def test_failed_edit_raises_in_every_waiter() -> None:
+    """Raise the error of a failed edit in every caller waiting for it, and count it."""
+
+    class FailingMessage(FakeMessage):
+        """A message that was deleted, its edits fail after they were sent."""
+
+        async def edit(self, **fields: object) -> None:
+            await super().edit(**fields)
+            error_message = "Unknown Message"
+            raise RuntimeError(error_message)
+
+    async def edit_twice() -> EditScheduler:
+        scheduler = EditScheduler(RATE, PER)
+        message = FailingMessage(1, FakeChannel(1, RATE, PER), latency=0)
+        results = await asyncio.gather(
+            scheduler.edit(message, content="a"), scheduler.edit(message, view="b"), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        return scheduler
+
+    scheduler = asyncio.run(edit_twice())
+    assert scheduler.stats.failed == 1
+    assert scheduler.stats.saved == 1
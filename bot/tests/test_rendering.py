@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import TYPE_CHECKING
+
+import pytest
+from cogs import chess
+from cogs.chess import Board, GameDifficulty, GameFlow, MainView, NumberStatus
+from utils import render_pool as render_pool_module
+from utils.message_edits import EditScheduler
+from utils.render_cache import RenderCache
+from utils.render_pool import RenderPool
+from utils.testing import FakeChannel, FakeMessage, make_board, play_rendered_game, play_turn
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+
+@pytest.fixture()
+def render_pool(monkeypatch: pytest.MonkeyPatch) -> Iterator[RenderPool]:
+    """Render on a thread pool of the test's own, with the render cache off."""
+    pool = RenderPool(workers=4, processes=False)
+    monkeypatch.setattr(chess, "get_render_pool", lambda: pool)
+    monkeypatch.setattr(chess, "render_cache", RenderCache(0))
+    yield pool
+    pool.shutdown()
+
+
+class RenderGate:
+    """Render job that holds the renders until the gate is opened and counts the ones running."""
+
+    def __init__(self, render_board: Callable[..., tuple[bytes, list[tuple[str, float]]]]) -> None:
+        self._render_board = render_board
+        self._opened = threading.Event()
+        self._lock = threading.Lock()
+        self.started = threading.Event()
+        self.running = 0
+        self.most_running = 0
+
+    def __call__(self, *args: object) -> tuple[bytes, list[tuple[str, float]]]:
+        """Render once the gate is opened."""
+        with self._lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        self.started.set()
+        self._opened.wait()
+        try:
+            return self._render_board(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    async def wait_started(self) -> None:
+        """Wait until a render reached the gate."""
+        assert await asyncio.to_thread(self.started.wait, 5)
+
+    def open(self) -> None:
+        """Let the renders run."""
+        self._opened.set()
+
+
+@pytest.fixture()
+def render_gate(monkeypatch: pytest.MonkeyPatch, render_pool: RenderPool) -> Iterator[RenderGate]:  # noqa: ARG001
+    """Hold the renders on the test's render pool until the gate is opened, it is opened when the test ends."""
+    gate = RenderGate(chess._render_board)
+    monkeypatch.setattr(chess, "_render_board", gate)
+    yield gate
+    gate.open()
+
+
+def full_render(board: Board) -> bytes:
+    """Return the image of a board drawn from scratch."""
+    return board.copy()._render_image(NumberStatus.HIDDEN)
+
+
+def test_cells_changed_during_a_render_are_redrawn(render_gate: RenderGate) -> None:
+    """Keep the cells moved while a render runs dirty, so the next render draws them."""
+    board = make_board(GameDifficulty.HARD, 3)
+    board._render_image(NumberStatus.HIDDEN)
+    play_turn(board)
+
+    async def move_while_rendering() -> bytes:
+        render = asyncio.create_task(board.render_async(NumberStatus.HIDDEN))
+        await render_gate.wait_started()
+        play_turn(board)
+        moved = set(board.tiles_moved)
+        render_gate.open()
+        await render
+        assert moved <= board._dirty_cells
+        return (await board.render_async(NumberStatus.HIDDEN)).fp.getvalue()
+
+    assert asyncio.run(move_while_rendering()) == full_render(board)
+
+
+def test_renders_of_a_board_run_one_at_a_time(render_gate: RenderGate) -> None:
+    """Render a board once at a time however many renders are asked for, while other boards render alongside."""
+    board, other_board = make_board(GameDifficulty.MEDIUM, 4), make_board(GameDifficulty.MEDIUM, 5)
+
+    async def render_together() -> list[bytes]:
+        renders = [asyncio.create_task(board.render_async(NumberStatus.HIDDEN)) for _ in range(3)]
+        other_render = asyncio.create_task(other_board.render_async(NumberStatus.HIDDEN))
+        await render_gate.wait_started()
+        await asyncio.sleep(0.05)
+        assert render_gate.running == 2
+        render_gate.open()
+        await other_render
+        return [(await render).fp.getvalue() for render in renders]
+
+    images = asyncio.run(render_together())
+    assert render_gate.most_running == 2
+    assert images == [full_render(board)] * 3
+
+
+def test_images_changed_during_a_render_are_not_cached(
+    monkeypatch: pytest.MonkeyPatch, render_gate: RenderGate
+) -> None:
+    """Leave the image of a render out of the cache when the board was moved while it ran."""
+    cache = RenderCache(1024 * 1024)
+    monkeypatch.setattr(chess, "render_cache", cache)
+    board = make_board(GameDifficulty.EASY, 6)
+
+    async def move_while_rendering() -> None:
+        render = asyncio.create_task(board.render_async(NumberStatus.HIDDEN))
+        await render_gate.wait_started()
+        play_turn(board)
+        render_gate.open()
+        await render
+        assert len(cache) == 0
+
+        image = (await board.render_async(NumberStatus.HIDDEN)).fp.getvalue()
+        assert cache.get(board.render_key(NumberStatus.HIDDEN)) == image
+
+    asyncio.run(move_while_rendering())
+
+
+def test_cached_images_are_the_images_of_their_boards(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Render the boards of games through the cache, every image found is the one a new render of the board draws."""
+    cache = RenderCache(32 * 1024 * 1024)
+    monkeypatch.setattr(chess, "render_cache", cache)
+    for seed in range(3):
+        for status, board in play_rendered_game(GameDifficulty.EASY, seed):
+            for same_board in (board, board.copy()):
+                hits = cache.stats.hits
+                image = same_board._generate_board_img(status).fp.getvalue()
+                if cache.stats.hits > hits:
+                    assert image == board.copy()._render_image(status)
+
+    assert cache.stats.hits >= cache.stats.stored
+
+
+@pytest.mark.usefixtures("render_pool")
+def test_a_failed_render_keeps_the_last_image(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Show the turn of the bot without a new image when its render fails, and log the error with its traceback."""
+    board = make_board(GameDifficulty.EASY, 7)
+    monkeypatch.setattr(chess, "game_flow", GameFlow())
+    monkeypatch.setattr(chess, "edit_scheduler", EditScheduler())
+    monkeypatch.setattr(chess, "TIME_BOT_TURN", 0)
+    chess.game_flow.bot_opponent(board).start(board.hidden_stones)
+
+    def fail(*_: object) -> bytes:
+        error_message = "Render failed"
+        raise RuntimeError(error_message)
+
+    monkeypatch.setattr(Board, "_render_image", fail)
+    message = FakeMessage(1, FakeChannel(0, rate=5, per=5), latency=0)
+    message.attachments = ["board.gif"]
+
+    async def play_bot_turn() -> bool:
+        return await MainView().play_bot_turn(message, board)
+
+    assert not asyncio.run(play_bot_turn())
+    assert message.history == [(message.content, message.view, ("board.gif",))]
+    assert message.content.startswith("The bot chose")
+    (record,) = (record for record in caplog.records if record.levelname == "ERROR")
+    assert record.exc_info[1].args == ("Render failed",)
+
+
+@pytest.mark.parametrize("difficulty", list(GameDifficulty))
+def test_numpy_backend_draws_the_pixels_of_the_pil_backend(difficulty: GameDifficulty) -> None:
+    """Render a game with both backends, from scratch and cell by cell, every frame has the same pixels."""
+    np = pytest.importorskip("numpy")
+    board, array_board = make_board(difficulty, 8), make_board(difficulty, 8)
+    array_board.render_backend = "numpy"
+    renders = [NumberStatus.VISIBLE, NumberStatus.HIDDEN]
+    while not board.all_found:
+        for numbers_visible in renders:
+            frames = board._render_frames(numbers_visible)
+            array_frames = array_board._render_frames(numbers_visible)
+            for frame, array_frame in zip(frames, array_frames, strict=True):
+                assert np.array_equal(np.asarray(frame), np.asarray(array_frame))
+
+        play_turn(board)
+        play_turn(array_board)
+        renders = [NumberStatus.HIDDEN]
+
+
+def test_renders_in_a_process_leave_the_frames_here_whole(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Render a board in a render process between renders made here, every image is the one of the board."""
+    pool = RenderPool(workers=1, processes=True)
+    monkeypatch.setattr(chess, "get_render_pool", lambda: pool)
+    monkeypatch.setattr(chess, "render_cache", RenderCache(0))
+    board = make_board(GameDifficulty.EASY, 9)
+
+    async def render_here_and_there() -> None:
+        for _ in range(3):
+            assert board._render_image(NumberStatus.HIDDEN) == full_render(board)
+            play_turn(board)
+            assert (await board.render_async(NumberStatus.HIDDEN)).fp.getvalue() == full_render(board)
+            play_turn(board)
+
+    try:
+        asyncio.run(render_here_and_there())
+    finally:
+        pool.shutdown()
+
+
+def test_render_pool_starts_again_after_a_shutdown(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Share the render pool until it is shut down, like when the cog unloads, the next render gets a new one."""
+    monkeypatch.setattr(render_pool_module, "_render_pool", None)
+    pool = render_pool_module.get_render_pool()
+    assert render_pool_module.get_render_pool() is pool
+
+    render_pool_module.shutdown_render_pool()
+    new_pool = render_pool_module.get_render_pool()
+    try:
+        assert new_pool is not pool
+        with pytest.raises(RuntimeError):
+            pool._executor.submit(print)
+    finally:
+        new_pool.shutdown()
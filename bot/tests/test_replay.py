@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import base64
+from typing import TYPE_CHECKING
+
+import pytest
+from cogs.chess import GameDifficulty, GameFlow
+from replay import load_games, replay
+from utils.events import EventLog
+from utils.testing import make_board, play_rendered_game
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_replayed_board_is_the_board_played(tmp_path: Path, seed: int) -> None:
+    """Replay a game from its event log, the rebuilt board has the stones, rafts, turn and scores of the played one."""
+    flow = GameFlow()
+    flow.events = EventLog(tmp_path)
+    start = make_board(GameDifficulty.EASY, seed)
+    flow.events.record(start.msg_id, "start", record=base64.b64encode(start.game_record()).decode())
+    board = play_rendered_game(GameDifficulty.EASY, seed, flow)[-1][1]
+    flow.events.close()
+
+    (game,) = load_games([tmp_path]).values()
+    assert len(game.turns) > 1
+    assert sum(player.score for player in board.players) == len(board.active_tiles) * board.num_stones // 2
+    assert replay(game).game_record() == board.game_record()
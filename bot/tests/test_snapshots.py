@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import types
+from typing import TYPE_CHECKING
+
+import disnake
+import pytest
+from cogs.chess import BoardNotFoundError, GameDifficulty, GameFlow
+from utils.database import DatabasePool
+from utils.snapshots import SnapshotStore
+from utils.testing import make_board
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+    from pathlib import Path
+
+
+class GatedPool(DatabasePool):
+    """A pool whose batched writes wait until they are let through, or fail."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path, size=1)
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.writing = asyncio.Event()
+        self.fail = False
+
+    async def executemany(self, query: str, values: object) -> None:
+        """Wait for the gate, then write or fail."""
+        self.writing.set()
+        await self.gate.wait()
+        if self.fail:
+            error_message = "disk I/O error"
+            raise OSError(error_message)
+        await super().executemany(query, values)
+
+
+def run_with_store(tmp_path: Path, test: Callable[[GatedPool, SnapshotStore], Awaitable[None]]) -> None:
+    """Run a test on a snapshot store flushing only when asked to."""
+
+    async def run() -> None:
+        pool = GatedPool(str(tmp_path / "snapshots.sqlite"))
+        store = SnapshotStore(pool, flush_delay=3600)
+        try:
+            await test(pool, store)
+        finally:
+            await store.close()
+            await pool.close()
+
+    asyncio.run(run())
+
+
+def test_delete_during_a_flush_is_not_undone(tmp_path: Path) -> None:
+    """Delete the snapshot of a game while a flush writes it, the snapshot stays deleted."""
+
+    async def test(pool: GatedPool, store: SnapshotStore) -> None:
+        store.save(1, b"turn 1")
+        store.save(2, b"turn 1")
+        pool.gate.clear()
+        flush = asyncio.create_task(store.flush())
+        await pool.writing.wait()
+
+        assert await store.load(1) == b"turn 1"  # Still readable while it is being written
+        delete = asyncio.create_task(store.delete(1))
+        await asyncio.sleep(0.01)
+        pool.gate.set()
+        await asyncio.gather(flush, delete)
+
+        assert await store.load(1) is None
+        assert await store.load(2) == b"turn 1"
+
+    run_with_store(tmp_path, test)
+
+
+def test_failed_flush_queues_the_snapshots_again(tmp_path: Path) -> None:
+    """Keep the snapshots of a failed flush, without replacing the ones saved while it was written."""
+
+    async def test(pool: GatedPool, store: SnapshotStore) -> None:
+        store.save(1, b"turn 1")
+        store.save(2, b"turn 1")
+        pool.fail = True
+        pool.gate.clear()
+        flush = asyncio.create_task(store.flush())
+        await pool.writing.wait()
+        store.save(2, b"turn 2")
+        pool.gate.set()
+        await flush
+        assert store.stats.written == 0
+
+        pool.fail = False
+        await store.flush()
+        assert store.stats.written == 2
+        assert await store.load(1) == b"turn 1"
+        assert await store.load(2) == b"turn 2"
+
+    run_with_store(tmp_path, test)
+
+
+def test_save_during_a_flush_is_written(tmp_path: Path) -> None:
+    """Write a snapshot saved while the delayed flush was writing, without another save."""
+
+    async def test(pool: GatedPool, store: SnapshotStore) -> None:
+        store._flush_delay = 0
+        pool.gate.clear()
+        store.save(1, b"turn 1")
+        await pool.writing.wait()
+        store.save(1, b"turn 2")
+        pool.gate.set()
+        await asyncio.wait_for(store._flusher, 5)
+
+        assert store.stats.written == 2
+        assert await pool.fetchval("SELECT snapshot FROM game_snapshots WHERE msg_id = 1", cache=False) == b"turn 2"
+
+    run_with_store(tmp_path, test)
+
+
+def test_store_opened_after_a_close_reads_its_snapshots(tmp_path: Path) -> None:
+    """Load a snapshot the store of an unloaded cog is still writing from the store replacing it."""
+
+    async def test(pool: GatedPool, store: SnapshotStore) -> None:
+        store.save(1, b"turn 1")
+        pool.gate.clear()
+        store.close_soon()
+        await pool.writing.wait()
+
+        load = asyncio.create_task(SnapshotStore(pool).load(1))
+        await asyncio.sleep(0.01)
+        pool.gate.set()
+        assert await asyncio.wait_for(load, 5) == b"turn 1"
+
+    run_with_store(tmp_path, test)
+
+
+def test_game_of_a_player_who_left_is_dropped(tmp_path: Path) -> None:
+    """Drop the snapshot of a game a player left the server of, instead of failing every time it is played."""
+
+    async def fetch_member(user_id: int) -> None:
+        raise disnake.NotFound(types.SimpleNamespace(status=404, reason="Not Found"), f"Unknown member {user_id}")
+
+    guild = types.SimpleNamespace(get_member=lambda _: None, fetch_member=fetch_member)
+
+    async def test(_: GatedPool, store: SnapshotStore) -> None:
+        flow = GameFlow()
+        flow.snapshots = store
+        store.save(1, make_board(GameDifficulty.EASY, 1).game_record())
+
+        with pytest.raises(BoardNotFoundError):
+            await flow.get_board(1, guild)
+        assert await store.load(1) is None
+
+    run_with_store(tmp_path, test)
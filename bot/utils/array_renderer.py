@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, NamedTuple
+
+from PIL import Image
+from utils.assets import WATER_COLOR, get_atlas, stone_sprite
+from utils.logging_utils import log
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, boards are rendered with PIL without it
+    np = None
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from utils.assets import AssetAtlas
+
+RENDER_BACKEND = os.getenv("RENDER_BACKEND", "pil")  # "pil" or "numpy"
+
+if RENDER_BACKEND == "numpy" and np is None:
+    log(0, "Render", "RENDER_BACKEND is numpy but NumPy is not installed, boards are rendered with PIL", level="WARN")
+
+
+def array_backend(backend: str = RENDER_BACKEND) -> bool:
+    """Return if a render backend setting selects the NumPy renderer and NumPy is installed."""
+    return backend == "numpy" and np is not None
+
+
+class StoneLayer(NamedTuple):
+    """The stones of a raft composited together, premultiplied by their alpha."""
+
+    premultiplied: np.ndarray  # Colour times alpha plus 128, (height, width, 3)
+    transparency: np.ndarray  # 255 minus alpha, (height, width, 1)
+
+
+class ArrayAtlas:
+    """The raft tiles of an asset atlas stacked in a single array, one row per animation frame.
+
+    The stone sprites are split into the arrays blended by ``draw_cell`` once, when they are first drawn.
+    """
+
+    def __init__(self, atlas: AssetAtlas) -> None:
+        self.atlas = atlas
+        self.rafts = np.array([np.asarray(tile) for tile in atlas.raft_tiles])  # (frames, height, width, 3)
+        self.water = np.array(WATER_COLOR, dtype=np.uint8)
+        self._empty_frames: dict[tuple[int, int], np.ndarray] = {}
+        self._sprites: dict[tuple[int, int, bool], StoneLayer] = {}
+
+    def sprite(self, variant: int, number: int, visible: bool) -> StoneLayer:  # noqa: FBT001
+        """Return the arrays of the sprite of a stone."""
+        key = (variant, number, visible)
+        layer = self._sprites.get(key)
+        if layer is None:
+            layer = self._sprites[key] = stone_layer(stone_sprite(variant, number, visible))
+        return layer
+
+    def empty_frames(self, size: tuple[int, int]) -> np.ndarray:
+        """Return the frames of an empty board of a size, filled with water, to be copied."""
+        if size not in self._empty_frames:
+            width, height = size
+            frames = np.empty((len(self.rafts), height, width, 3), dtype=np.uint8)
+            frames[...] = self.water
+            self._empty_frames[size] = frames
+        return self._empty_frames[size]
+
+    def __repr__(self) -> str:
+        return (
+            f"ArrayAtlas(Frames:{len(self.rafts)}, Sprites:{len(self._sprites)}, "
+            f"Memory:{self.rafts.nbytes / 1024:.1f}KiB)"
+        )
+
+
+_array_atlas: ArrayAtlas | None = None
+
+
+def get_array_atlas() -> ArrayAtlas:
+    """Return the arrays of the process-wide asset atlas, rebuilding them when the atlas was reloaded."""
+    global _array_atlas  # noqa: PLW0603
+
+    atlas = get_atlas()
+    if _array_atlas is None or _array_atlas.atlas is not atlas:
+        _array_atlas = ArrayAtlas(atlas)
+    return _array_atlas
+
+
+def stone_layer(layer: Image.Image) -> StoneLayer:
+    """Split an RGBA stone layer or sprite into the arrays blended by ``draw_cell``."""
+    rgba = np.asarray(layer, dtype=np.uint16)
+    alpha = rgba[..., 3:]
+    # The rounding term of the division by 255 is added once here instead of on every draw
+    return StoneLayer(rgba[..., :3] * alpha + 128, 255 - alpha)
+
+
+def new_frames(size: tuple[int, int]) -> np.ndarray:
+    """Return the frames of an empty board of a size, filled with water."""
+    return get_array_atlas().empty_frames(size).copy()
+
+
+def clear_cell(frames: np.ndarray, box: tuple[int, int, int, int]) -> None:
+    """Fill a cell of every frame with water."""
+    left, top, right, bottom = box
+    # Copying from the empty frames is much faster than broadcasting the three bytes of the water colour
+    water = get_array_atlas().empty_frames((frames.shape[2], frames.shape[1]))
+    frames[:, top:bottom, left:right] = water[:, top:bottom, left:right]
+
+
+def draw_cell(
+    frames: np.ndarray, origin: tuple[int, int], stones: Iterable[tuple[tuple[int, int], StoneLayer]]
+) -> None:
+    """Draw a raft at a cell of every frame, each frame with its own raft animation frame, then its stones.
+
+    The stones are drawn one after the other at their offset from the cell, they must not overlap.
+    """
+    rafts = get_array_atlas().rafts
+    x, y = origin
+    frames[:, y : y + rafts.shape[1], x : x + rafts.shape[2]] = rafts
+
+    for (left, top), layer in stones:
+        height, width = layer.transparency.shape[:2]
+        region = frames[:, y + top : y + top + height, x + left : x + left + width]
+        # Pillow's paste with a mask, in 16 bits: colour * alpha + background * (255 - alpha) + 128 is at most 65153
+        blend = region.astype(np.uint16)
+        blend *= layer.transparency
+        blend += layer.premultiplied
+        blend += blend >> 8
+        blend >>= 8
+        region[...] = blend
+
+
+def copy_cell(frames: np.ndarray, images: list[Image.Image], box: tuple[int, int, int, int]) -> None:
+    """Copy a cell of every frame into the images made by ``to_images``."""
+    left, top, right, bottom = box
+    for frame, image in zip(frames, images, strict=True):
+        image.paste(Image.fromarray(frame[top:bottom, left:right]), (left, top))
+
+
+def to_images(frames: np.ndarray) -> list[Image.Image]:
+    """Return the frames as RGB images sharing the memory of the array, drawing on it updates them."""
+    height, width = frames.shape[1:3]
+    return [Image.frombuffer("RGB", (width, height), frame, "raw", "RGB", 0, 1) for frame in frames]
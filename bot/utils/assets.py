@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+from utils.logging_utils import log
+
+ASSETS_DIR = Path(__file__).resolve().parents[2] / "assets"
+RAFT_FRAMES = 4
+ROCK_VARIANTS = 5
+ROCK_SIZE: tuple[int, int] = (40, 40)
+FONT_SIZE = 18
+STONE_CACHE_SIZE = int(os.getenv("STONE_CACHE_SIZE", "256"))
+WATER_COLOR = (135, 206, 235)
+TRANSPARENT_INDEX = 255  # Kept out of the shared palette, used for unchanged pixels of delta frames
+
+
+def _image_nbytes(image: Image.Image) -> int:
+    """Return the size of the decoded pixel data of an image."""
+    return image.width * image.height * len(image.getbands())
+
+
+def _raft_tile(raft_image: Image.Image) -> Image.Image:
+    """Return a raft frame already blended over the water, so it can be pasted without a mask."""
+    tile = Image.new("RGB", raft_image.size, WATER_COLOR)
+    tile.paste(raft_image, (0, 0), raft_image)
+    return tile
+
+
+def _asset_version(images: list[Image.Image], font_path: Path, rock_size: tuple[int, int]) -> str:
+    """Return a hash of the decoded assets, it changes whenever a board would be drawn differently."""
+    digest = hashlib.blake2b(digest_size=8)
+    for image in images:
+        digest.update(image.tobytes())
+    digest.update(font_path.read_bytes())
+    digest.update(bytes(rock_size))
+    return digest.hexdigest()
+
+
+def _build_palette(
+    raft_images: list[Image.Image], rock_images: list[Image.Image], font: ImageFont.FreeTypeFont
+) -> Image.Image:
+    """Quantise a sample of everything a board can show into a single palette."""
+    raft_width, raft_height = raft_images[0].size
+    rock_width, rock_height = rock_images[0].size
+    sample = Image.new("RGB", (raft_width * len(raft_images), raft_height + rock_height), WATER_COLOR)
+
+    for i, raft in enumerate(raft_images):
+        sample.paste(raft, (i * raft_width, 0), raft)
+        for j, rock in enumerate(rock_images):
+            numbered = rock.copy()
+            ImageDraw.Draw(numbered).text(
+                (rock_width // 4, rock_height // 4), str(i * 10 + j), fill=(0, 0, 0), font=font
+            )
+            x = i * raft_width + (j * rock_width) % (raft_width - rock_width)
+            sample.paste(rock, (x, raft_height // 2 - rock_height // 2), rock)
+            sample.paste(numbered, (x, raft_height), numbered)
+
+    palette = sample.quantize(TRANSPARENT_INDEX, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    palette.putpalette(palette.getpalette()[: TRANSPARENT_INDEX * 3])
+    return palette
+
+
+@dataclass(frozen=True)
+class AssetAtlas:
+    """Decoded and pre-resized game assets, shared read-only by every board.
+
+    The images are never drawn on directly, copy them before mutating.
+    """
+
+    raft_images: tuple[Image.Image, ...]
+    raft_tiles: tuple[Image.Image, ...]
+    rock_images: tuple[Image.Image, ...]
+    font: ImageFont.FreeTypeFont
+    rock_size: tuple[int, int]
+    palette: Image.Image
+    version: str  # Hash of the assets, part of the key of cached renders
+    load_time: float
+
+    @classmethod
+    def load(cls, assets_dir: Path = ASSETS_DIR, rock_size: tuple[int, int] = ROCK_SIZE) -> AssetAtlas:
+        """Load the assets from disk."""
+        start = time.perf_counter()
+
+        raft_images = []
+        for i in range(RAFT_FRAMES):
+            raft_path = assets_dir / "raft" / f"tile{i:03d}.png"
+            if raft_path.exists():
+                with Image.open(raft_path) as raft_img:
+                    raft_images.append(raft_img.convert("RGBA"))
+
+        rock_images = []
+        for i in range(1, ROCK_VARIANTS + 1):
+            rock_path = assets_dir / "rocks" / f"tile{i:03d}.png"
+            if rock_path.exists():
+                with Image.open(rock_path) as rock_img:
+                    rock_images.append(rock_img.convert("RGBA").resize(rock_size, Image.Resampling.LANCZOS))
+
+        font_path = assets_dir / "arial.ttf"
+        font = ImageFont.truetype(str(font_path), FONT_SIZE)
+
+        return cls(
+            raft_images=tuple(raft_images),
+            raft_tiles=tuple(_raft_tile(raft) for raft in raft_images),
+            rock_images=tuple(rock_images),
+            font=font,
+            rock_size=rock_size,
+            palette=_build_palette(raft_images, rock_images, font),
+            version=_asset_version([*raft_images, *rock_images], font_path, rock_size),
+            load_time=time.perf_counter() - start,
+        )
+
+    @property
+    def raft_size(self) -> tuple[int, int]:
+        """Return the size of a raft frame."""
+        return self.raft_images[0].size
+
+    @property
+    def memory_bytes(self) -> int:
+        """Return the memory used by the decoded images."""
+        images = (*self.raft_images, *self.raft_tiles, *self.rock_images, self.palette)
+        return sum(_image_nbytes(img) for img in images)
+
+    def __repr__(self) -> str:
+        return (
+            f"AssetAtlas(Version:{self.version}, Rafts:{len(self.raft_images)}, Rocks:{len(self.rock_images)}, "
+            f"Load time:{self.load_time * 1000:.1f}ms, Memory:{self.memory_bytes / 1024:.1f}KiB)"
+        )
+
+
+_atlas: AssetAtlas | None = None
+
+
+def load_atlas(*, force: bool = False) -> AssetAtlas:
+    """Load the process-wide asset atlas, unless it is already loaded."""
+    global _atlas  # noqa: PLW0603
+
+    if _atlas is None or force:
+        _atlas = AssetAtlas.load()
+        stone_sprite.cache_clear()
+        log(0, "Assets", f"Asset atlas loaded - {_atlas}")
+
+    return _atlas
+
+
+def get_atlas() -> AssetAtlas:
+    """Return the process-wide asset atlas, loading it on first use."""
+    return _atlas if _atlas is not None else load_atlas()
+
+
+@lru_cache(maxsize=STONE_CACHE_SIZE)
+def stone_sprite(variant: int, number: int, visible: bool) -> Image.Image:  # noqa: FBT001
+    """Return the rock sprite of a stone, with or without its number drawn on it.
+
+    Sprites are shared between boards and must not be drawn on.
+    """
+    atlas = get_atlas()
+    rock = atlas.rock_images[variant]
+    if not visible:
+        return rock
+
+    rock = rock.copy()
+    text = str(number)
+    draw = ImageDraw.Draw(rock)
+    bbox = draw.textbbox((0, 0), text, font=atlas.font)
+    text_width = bbox[2] - bbox[0] - 5
+    text_height = bbox[3] - bbox[1] + 10
+    position = ((atlas.rock_size[0] - text_width) // 2, (atlas.rock_size[1] - text_height) // 2)
+    draw.text(position, text, fill=(0, 0, 0), font=atlas.font)
+    return rock
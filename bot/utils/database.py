@@ -0,0 +1,637 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from itertools import groupby
+from typing import TYPE_CHECKING
+
+import aiosqlite
+from utils.logging_utils import log
+from utils.metrics import timed
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+
+# Applied to every connection of the pool when it is opened
+PRAGMAS = {
+    "journal_mode": "WAL",  # Readers do not block the writer and the other way around
+    "synchronous": "NORMAL",  # Safe with WAL, only a power loss can drop the last transactions
+    "temp_store": "MEMORY",
+    "cache_size": "-8192",  # KiB
+    "mmap_size": "67108864",  # Bytes
+    "busy_timeout": "5000",  # Milliseconds
+}
+STREAM_CHUNK_SIZE = 256  # Rows
+
+# Strings and comments are single tokens, so the names and keywords inside them are skipped
+SQL_TOKEN = re.compile(r"""\s+|--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]|\w+|.""", re.DOTALL)
+# Keywords followed by a list of tables, or by a single table
+TABLE_LIST_KEYWORDS = frozenset(("FROM", "JOIN"))
+TABLE_KEYWORDS = frozenset(("INTO", "UPDATE", "TABLE"))
+# Keywords that can follow a table, so they are not its alias
+CLAUSE_KEYWORDS = frozenset(
+    (
+        "CROSS", "DEFAULT", "EXCEPT", "FROM", "FULL", "GROUP", "HAVING", "INDEXED", "INNER", "INTERSECT", "JOIN",
+        "LEFT", "LIMIT", "NATURAL", "NOT", "OFFSET", "ON", "ORDER", "OUTER", "RETURNING", "RIGHT", "SELECT", "SET",
+        "UNION", "USING", "VALUES", "WHERE", "WINDOW",
+    )
+)  # fmt: skip
+
+
+class QueryParseError(ValueError):
+    """A query names its tables in a way ``query_tables`` does not understand."""
+
+
+def _identifier(token: str) -> str | None:
+    """Return the lower-cased name of an identifier token, without its quotes, or None if it is not one."""
+    if token[0] in '"`[':
+        return token[1:-1].replace('""', '"').lower()
+    if token[0].isalpha() or token[0] == "_":
+        return token.lower()
+    return None
+
+
+def _word(tokens: list[str], index: int) -> str:
+    """Return the upper-cased token at ``index``, or an empty string past the end."""
+    return tokens[index].upper() if index < len(tokens) else ""
+
+
+def _scan(tokens: list[str], start: int, tables: set[str]) -> int:
+    """Add the tables of the tokens from ``start`` up to the unmatched closing bracket, return its index."""
+    index = start
+    while index < len(tokens):
+        word = _word(tokens, index)
+        index += 1
+        if word == ")":
+            return index - 1
+        if word == "(":
+            index = _scan(tokens, index, tables) + 1
+        elif word in TABLE_LIST_KEYWORDS:
+            index = _table_list(tokens, index, tables)
+        elif word in TABLE_KEYWORDS:
+            if word == "UPDATE" and _word(tokens, index) == "OR":
+                # UPDATE OR REPLACE and the other conflict clauses
+                index += 2
+            while word == "TABLE" and _word(tokens, index) in ("IF", "NOT", "EXISTS"):
+                index += 1
+            _, index = _table_name(tokens, index, tables)
+    return index
+
+
+def _table_name(tokens: list[str], index: int, tables: set[str]) -> tuple[str, int]:
+    """Add the table named at ``index``, without its ``schema.`` prefix, return it and the index after it."""
+    name = _identifier(tokens[index]) if index < len(tokens) else None
+    if _word(tokens, index + 1) == ".":
+        name = _identifier(tokens[index + 2]) if index + 2 < len(tokens) else None
+        index += 2
+    if name is None:
+        raise QueryParseError
+    tables.add(name)
+    return name, index + 1
+
+
+def _table_list(tokens: list[str], index: int, tables: set[str]) -> int:
+    """Add the tables, separated by commas, named after ``FROM`` or ``JOIN``, return the index after the list.
+
+    The subqueries of the list are scanned and the aliases of its tables skipped.
+    """
+    while True:
+        if _word(tokens, index) == "(":
+            index = _scan(tokens, index + 1, tables) + 1
+        else:
+            _, index = _table_name(tokens, index, tables)
+            if _word(tokens, index) == "(":
+                # A table-valued function, like json_each(), the tables it reads are unknown
+                raise QueryParseError
+
+        word = _word(tokens, index)
+        if word == "AS":
+            index += 2
+        elif word and word not in CLAUSE_KEYWORDS and _identifier(tokens[index]):
+            index += 1
+        if _word(tokens, index) != ",":
+            return index
+        index += 1
+
+
+def query_tables(query: str) -> frozenset[str]:
+    """Return the lower-cased names of the tables a query touches, none if they cannot all be found.
+
+    A query whose tables are not known is never cached, and writing with it clears the whole cache.
+    """
+    tokens = [
+        token for token in SQL_TOKEN.findall(query) if not token.isspace() and not token.startswith(("--", "/*"))
+    ]
+    tables: set[str] = set()
+    try:
+        index = _scan(tokens, 0, tables)
+        while index < len(tokens):
+            # A closing bracket without its opening one
+            index = _scan(tokens, index + 1, tables)
+    except QueryParseError:
+        return frozenset()
+    return frozenset(tables)
+
+
+@dataclass
+class QueryCacheStats:
+    """Counters of a query cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the share of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"QueryCacheStats(Hits:{self.hits}, Misses:{self.misses}, Hit rate:{self.hit_rate:.1%}, "
+            f"Evictions:{self.evictions}, Invalidations:{self.invalidations})"
+        )
+
+
+class QueryCache:
+    """LRU cache of single-row query results, invalidated by the tables written to.
+
+    Every table has a generation, bumped when a write to it is committed, and clearing the cache bumps them all. A
+    result is only stored if the generations of its tables did not change while it was being read, so a read racing
+    a write cannot cache a stale row.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = maxsize
+        self._entries: OrderedDict[tuple, tuple[frozenset[str], object]] = OrderedDict()
+        self._by_table: dict[str, set[tuple]] = {}
+        self._generations: dict[str, int] = {}
+        self._epoch = 0
+        self._stats = QueryCacheStats()
+
+    def __repr__(self) -> str:
+        return f"QueryCache(Size:{len(self._entries)}/{self._maxsize}, {self._stats})"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> QueryCacheStats:
+        """Return the cache counters."""
+        return self._stats
+
+    def generations(self, tables: frozenset[str]) -> tuple[int, ...]:
+        """Return the current generations of tables, to pass back to ``put``."""
+        return (self._epoch, *(self._generations.get(table, 0) for table in sorted(tables)))
+
+    def get(self, key: tuple) -> tuple[bool, object]:
+        """Return if the key is cached and its result."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats.misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        return True, entry[1]
+
+    def put(self, key: tuple, tables: frozenset[str], result: object, generations: tuple[int, ...]) -> None:
+        """Store a result, unless one of its tables was written to since ``generations`` was taken."""
+        if not tables or self.generations(tables) != generations:
+            return
+
+        self._entries[key] = (tables, result)
+        self._entries.move_to_end(key)
+        for table in tables:
+            self._by_table.setdefault(table, set()).add(key)
+
+        while len(self._entries) > self._maxsize:
+            old_key, (old_tables, _) = self._entries.popitem(last=False)
+            for table in old_tables:
+                self._by_table[table].discard(old_key)
+            self._stats.evictions += 1
+
+    def invalidate(self, query: str) -> None:
+        """Drop the results of the tables a write query touches, or everything when they are unknown."""
+        tables = query_tables(query)
+        if not tables:
+            self.clear()
+            return
+
+        for table in tables:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            for key in self._by_table.pop(table, ()):
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._stats.invalidations += 1
+                    for other in entry[0] - {table}:
+                        self._by_table[other].discard(key)
+
+    def clear(self) -> None:
+        """Drop every result."""
+        self._epoch += 1
+        self._stats.invalidations += len(self._entries)
+        self._entries.clear()
+        self._by_table.clear()
+
+
+@dataclass
+class WriteBehindStats:
+    """Counters of the write-behind queue of a database pool."""
+
+    queued: int = 0
+    written: int = 0
+    failed: int = 0
+    batches: int = 0
+    max_batch: int = 0
+    total_flush: float = 0.0
+    max_flush: float = 0.0
+
+    @property
+    def avg_batch(self) -> float:
+        """Return the average number of statements written per transaction."""
+        return (self.written + self.failed) / self.batches if self.batches else 0.0
+
+    @property
+    def avg_flush(self) -> float:
+        """Return the average time a transaction took to write."""
+        return self.total_flush / self.batches if self.batches else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"WriteBehindStats(Queued:{self.queued}, Written:{self.written}, Failed:{self.failed}, "
+            f"Batches:{self.batches}, Avg batch:{self.avg_batch:.1f}, Max batch:{self.max_batch}, "
+            f"Avg flush:{self.avg_flush * 1000:.1f}ms, Max flush:{self.max_flush * 1000:.1f}ms)"
+        )
+
+
+class DatabasePool:
+    """Long-lived SQLite connections shared by all the queries of the bot.
+
+    The pool size and the statement cache size default to ``DB_POOL_SIZE`` and ``DB_STATEMENT_CACHE``, read when the
+    pool is created because ``bot.py`` imports this module before loading the ``.env`` file.
+
+    Reads run on any free connection. SQLite only allows one writer at a time, so writes are serialised by a lock
+    instead of failing with ``database is locked``. Every connection keeps a cache of its prepared statements.
+
+    With ``write_behind`` (``DB_WRITE_BEHIND=1``), ``execute`` and ``executemany`` only queue their statements and
+    return. A single writer task commits the queue in one transaction every ``DB_FLUSH_INTERVAL`` milliseconds or
+    ``DB_BATCH_SIZE`` statements, whichever comes first. Reads do not wait for the queue, call ``flush`` first when
+    they must see the latest writes.
+
+    With ``cache_size`` (``DB_CACHE_SIZE``) above 0, ``fetchval`` and ``fetchrow`` results are kept in a ``QueryCache``
+    and dropped when a write to one of their tables is committed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int | None = None,
+        statement_cache: int | None = None,
+        *,
+        write_behind: bool | None = None,
+        cache_size: int | None = None,
+    ) -> None:
+        self._path = path
+        self._size = size if size is not None else int(os.getenv("DB_POOL_SIZE", "4"))
+        self._statement_cache = (
+            statement_cache if statement_cache is not None else int(os.getenv("DB_STATEMENT_CACHE", "128"))
+        )
+        self._connections: list[aiosqlite.Connection] = []
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+        self._close_hooks: list[Callable[[], Awaitable[None]]] = []
+
+        self._write_behind = write_behind if write_behind is not None else os.getenv("DB_WRITE_BEHIND", "0") == "1"
+        self._flush_interval = int(os.getenv("DB_FLUSH_INTERVAL", "200")) / 1000
+        self._batch_size = int(os.getenv("DB_BATCH_SIZE", "256"))
+        self._pending: asyncio.Queue[tuple[str, tuple, bool]] = asyncio.Queue(maxsize=self._batch_size * 4)
+        self._writer: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+        self._flush_waiters = 0
+        self._write_stats = WriteBehindStats()
+
+        cache_size = cache_size if cache_size is not None else int(os.getenv("DB_CACHE_SIZE", "0"))
+        self._cache = QueryCache(cache_size) if cache_size > 0 else None
+
+    def __repr__(self) -> str:
+        return (
+            f"DatabasePool(Path:{self._path}, Size:{self._size}, Open:{len(self._connections)}, "
+            f"Idle:{self._idle.qsize()})"
+        )
+
+    @property
+    def is_open(self) -> bool:
+        """Return if the connections are open."""
+        return bool(self._connections)
+
+    @property
+    def write_behind(self) -> bool:
+        """Return if writes are queued instead of committed right away."""
+        return self._write_behind
+
+    @property
+    def pending_writes(self) -> int:
+        """Return the number of queued statements not committed yet."""
+        return self._pending.qsize()
+
+    @property
+    def write_stats(self) -> WriteBehindStats:
+        """Return the write-behind counters."""
+        return self._write_stats
+
+    @property
+    def cache(self) -> QueryCache | None:
+        """Return the query cache, if it is enabled."""
+        return self._cache
+
+    def _invalidate(self, queries: Iterable[str]) -> None:
+        """Drop the cached results of the tables written to by committed queries."""
+        if self._cache is not None:
+            for query in set(queries):
+                self._cache.invalidate(query)
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """Open a connection and apply the pragmas."""
+        connection = await aiosqlite.connect(self._path, cached_statements=self._statement_cache)
+        for pragma, value in PRAGMAS.items():
+            await connection.execute(f"PRAGMA {pragma} = {value}")
+        return connection
+
+    async def open(self) -> None:
+        """Open the connections, unless they are already open."""
+        async with self._open_lock:
+            if self._connections:
+                return
+
+            self._connections = [await self._connect() for _ in range(self._size)]
+            for connection in self._connections:
+                self._idle.put_nowait(connection)
+
+        log(0, "Database", f"Database pool opened - {self}")
+
+    def add_close_hook(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Run ``hook`` when the pool closes, before the queued writes are committed."""
+        self._close_hooks.append(hook)
+
+    def remove_close_hook(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Stop running ``hook`` when the pool closes."""
+        self._close_hooks.remove(hook)
+
+    async def close(self) -> None:
+        """Commit the queued writes and close the connections once the queries using them are done."""
+        for hook in self._close_hooks:
+            try:
+                await hook()
+            except Exception as e:  # noqa: BLE001
+                log(0, "Database", f"A close hook failed: {e!s}", level="ERROR")
+
+        if self._writer is not None:
+            await self.flush()
+            self._writer.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._writer
+            self._writer = None
+            log(0, "Database", f"Write-behind queue stopped - {self._write_stats}")
+
+        async with self._open_lock:
+            for _ in range(len(self._connections)):
+                connection = await self._idle.get()
+                await connection.close()
+            self._connections = []
+
+        log(0, "Database", f"Database pool closed - {self}")
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a connection, opening the pool on first use."""
+        if not self._connections:
+            await self.open()
+
+        connection = await self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put_nowait(connection)
+
+    @asynccontextmanager
+    async def acquire_writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a connection while holding the write lock."""
+        async with self._write_lock, self.acquire() as connection:
+            yield connection
+
+    async def _enqueue(self, query: str, values: tuple, *, many: bool) -> None:
+        """Queue a statement for the writer task, starting it on first use."""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop(), name="database-writer")
+
+        await self._pending.put((query, values, many))
+        self._write_stats.queued += 1
+        self._wake.set()
+
+    async def _fill_batch(self, batch: list[tuple[str, tuple, bool]]) -> None:
+        """Wait for a statement, then gather more until the batch is full or the flush interval is over.
+
+        A flush request ends the wait early, once the queue is empty.
+        """
+        batch.append(await self._pending.get())
+        deadline = time.monotonic() + self._flush_interval
+        while len(batch) < self._batch_size:
+            if not self._pending.empty():
+                batch.append(self._pending.get_nowait())
+                continue
+
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or self._flush_waiters:
+                break
+
+            self._wake.clear()
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), timeout)
+
+    async def _write_batch(self, batch: list[tuple[str, tuple, bool]]) -> None:
+        """Write a batch of statements in a single transaction, then mark them done in the queue."""
+        try:
+            await self._commit_batch(batch)
+        finally:
+            for _ in batch:
+                self._pending.task_done()
+
+    async def _commit_batch(self, batch: list[tuple[str, tuple, bool]]) -> None:
+        """Commit a batch of statements in a single transaction.
+
+        If the transaction fails, the statements are retried one by one so a single bad statement only loses itself.
+        """
+        start = time.perf_counter()
+        async with self.acquire_writer() as db:
+            try:
+                # Consecutive single statements with the same query are sent together, in one call to the thread
+                for (query, many), group in groupby(batch, key=lambda item: (item[0], item[2])):
+                    if many:
+                        for _, values, _ in group:
+                            await db.executemany(query, values)
+                    else:
+                        await db.executemany(query, [values for _, values, _ in group])
+                await db.commit()
+            except Exception:  # noqa: BLE001
+                await db.rollback()
+                for query, values, many in batch:
+                    try:
+                        await (db.executemany(query, values) if many else db.execute(query, values))
+                        await db.commit()
+                    except Exception as e:  # noqa: BLE001
+                        await db.rollback()
+                        self._write_stats.failed += 1
+                        log(0, "Database", f"Queued statement dropped: {query} - {e!s}", level="ERROR")
+                    else:
+                        self._write_stats.written += 1
+                        self._invalidate((query,))
+            else:
+                self._write_stats.written += len(batch)
+                self._invalidate(query for query, _, _ in batch)
+
+        flush_time = time.perf_counter() - start
+        self._write_stats.batches += 1
+        self._write_stats.max_batch = max(self._write_stats.max_batch, len(batch))
+        self._write_stats.total_flush += flush_time
+        self._write_stats.max_flush = max(self._write_stats.max_flush, flush_time)
+
+    async def _write_loop(self) -> None:
+        """Commit the queued statements batch by batch.
+
+        When cancelled, for instance by the event loop cleanup after a signal, whatever is still queued is committed
+        before stopping. A batch already being written is shielded from the cancellation and awaited.
+        """
+        batch: list[tuple[str, tuple, bool]] = []
+        writing: asyncio.Task | None = None
+        try:
+            while True:
+                await self._fill_batch(batch)
+                writing = asyncio.ensure_future(self._write_batch(batch))
+                await asyncio.shield(writing)
+                batch, writing = [], None
+        except asyncio.CancelledError:
+            if writing is not None:
+                await writing
+                batch = []
+            while not self._pending.empty():
+                batch.append(self._pending.get_nowait())
+            if batch:
+                await self._write_batch(batch)
+            raise
+
+    @timed("db.flush")
+    async def flush(self) -> None:
+        """Commit the queued statements without waiting for the flush interval, and wait until they are committed."""
+        if self._writer is None:
+            return
+
+        self._flush_waiters += 1
+        self._wake.set()
+        try:
+            await self._pending.join()
+        finally:
+            self._flush_waiters -= 1
+
+    async def commit(self) -> None:
+        """Commit any transaction left open by a writer, and the queued writes."""
+        await self.flush()
+        async with self.acquire_writer() as db:
+            await db.commit()
+
+    @timed("db.execute")
+    async def execute(self, query: str, *values: object) -> None:
+        """Execute a query and commit it, or queue it in write-behind mode."""
+        if self._write_behind:
+            await self._enqueue(query, values, many=False)
+            return
+
+        async with self.acquire_writer() as db:
+            try:
+                await db.execute(query, values)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+        self._invalidate((query,))
+
+    @timed("db.execute")
+    async def executemany(self, query: str, values: Iterable[tuple]) -> None:
+        """Execute a query for every set of values and commit them together, or queue it in write-behind mode."""
+        if self._write_behind:
+            await self._enqueue(query, list(values), many=True)
+            return
+
+        async with self.acquire_writer() as db:
+            try:
+                await db.executemany(query, values)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+        self._invalidate((query,))
+
+    async def _fetchone(self, query: str, values: tuple, *, cache: bool) -> tuple | None:
+        """Fetch the first row, through the query cache when it is enabled."""
+        if self._cache is None or not cache:
+            async with self.acquire() as db, db.execute(query, values) as cur:
+                return await cur.fetchone()
+
+        key = (query, values)
+        found, row = self._cache.get(key)
+        if found:
+            return row
+
+        tables = query_tables(query)
+        generations = self._cache.generations(tables)
+        async with self.acquire() as db, db.execute(query, values) as cur:
+            row = await cur.fetchone()
+        self._cache.put(key, tables, row, generations)
+        return row
+
+    @timed("db.fetch")
+    async def fetchval(self, query: str, *values: object, cache: bool = True) -> object:
+        """Fetch the first value of the first row.
+
+        Pass ``cache=False`` for queries whose result does not only depend on their tables, like ``random()``.
+        """
+        row = await self._fetchone(query, values, cache=cache)
+        return row[0] if row else None
+
+    @timed("db.fetch")
+    async def fetchrow(self, query: str, *values: object, cache: bool = True) -> list | None:
+        """Fetch the first row, see ``fetchval`` for ``cache``."""
+        row = await self._fetchone(query, values, cache=cache)
+        return list(row) if row else None
+
+    @timed("db.fetch")
+    async def fetchmany(self, query: str, size: int, *values: object) -> list:
+        """Fetch the first rows."""
+        async with self.acquire() as db, db.execute(query, values) as cur:
+            return await cur.fetchmany(size)
+
+    @timed("db.fetch")
+    async def fetch(self, query: str, *values: object) -> list:
+        """Fetch all the rows."""
+        async with self.acquire() as db, db.execute(query, values) as cur:
+            return await cur.fetchall()
+
+    async def stream(self, query: str, *values: object, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[tuple]:
+        """Yield the rows of a query, fetching ``chunk_size`` of them at a time.
+
+        The stream holds a connection of the pool until it is exhausted or closed. When the consumer stops early, the
+        cursor is closed and the connection returned as soon as the stream is garbage collected, wrap it in
+        ``contextlib.aclosing`` to release them right away.
+        """
+        async with self.acquire() as db, db.execute(query, values) as cur:
+            while rows := await cur.fetchmany(chunk_size):
+                for row in rows:
+                    yield row
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+from io import BytesIO
+from itertools import pairwise
+
+from PIL import Image, ImageChops
+from utils.assets import TRANSPARENT_INDEX, get_atlas
+
+IMAGE_FORMAT = os.getenv("BOARD_IMAGE_FORMAT", "gif")  # "gif", "webp" or "png"
+FRAME_DURATION = 400  # Milliseconds
+
+FILENAMES = {
+    "gif": "board.gif",
+    "webp": "board.webp",
+    "png": "board.png",
+}
+
+
+def _indices(frame: Image.Image) -> Image.Image:
+    """Return the palette indices of a ``P`` mode frame as an ``L`` image."""
+    return Image.frombytes("L", frame.size, frame.tobytes())
+
+
+def quantize_frames(frames: list[Image.Image]) -> list[Image.Image]:
+    """Map the frames onto the shared palette of the asset atlas."""
+    palette = get_atlas().palette
+    return [frame.quantize(palette=palette, dither=Image.Dither.NONE) for frame in frames]
+
+
+def delta_frames(frames: list[Image.Image]) -> list[Image.Image]:
+    """Replace the pixels that did not change since the previous frame with the transparent index.
+
+    The frames must be in ``P`` mode on the same palette. The first frame is kept whole.
+    """
+    deltas = [frames[0]]
+    for previous, frame in pairwise(frames):
+        changed = ImageChops.difference(_indices(previous), _indices(frame)).point(lambda v: 255 if v else 0)
+        delta = Image.new("P", frame.size, TRANSPARENT_INDEX)
+        delta.putpalette(frame.getpalette())
+        delta.paste(frame, mask=changed.convert("1"))
+        deltas.append(delta)
+
+    return deltas
+
+
+def encode_animation(frames: list[Image.Image], image_format: str = IMAGE_FORMAT) -> bytes:
+    """Encode the frames of a board as an animation."""
+    buffer = BytesIO()
+    if image_format == "gif":
+        deltas = delta_frames(quantize_frames(frames))
+        deltas[0].save(
+            buffer,
+            format="GIF",
+            save_all=True,
+            append_images=deltas[1:],
+            duration=FRAME_DURATION,
+            loop=0,
+            disposal=1,
+            transparency=TRANSPARENT_INDEX,
+            optimize=False,
+        )
+    elif image_format == "webp":
+        frames[0].save(
+            buffer,
+            format="WEBP",
+            save_all=True,
+            append_images=frames[1:],
+            duration=FRAME_DURATION,
+            loop=0,
+            lossless=True,
+            method=0,
+        )
+    elif image_format == "png":
+        indexed = quantize_frames(frames)
+        indexed[0].save(
+            buffer,
+            format="PNG",
+            save_all=True,
+            append_images=indexed[1:],
+            duration=FRAME_DURATION,
+            loop=0,
+            disposal=0,
+            blend=0,
+        )
+    else:
+        error_message = f"Expected one of {', '.join(FILENAMES)}, got {image_format}"
+        raise ValueError(error_message)
+
+    return buffer.getvalue()
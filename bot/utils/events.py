@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+from utils.logging_utils import LOG_DIR, log
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+EVENT_DIR = LOG_DIR / "events"
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "256"))  # Events
+EVENT_FLUSH_DELAY = float(os.getenv("EVENT_FLUSH_DELAY", "5"))  # Seconds
+
+
+def event_file(directory: Path, timestamp: float) -> Path:
+    """Return the file holding the events of a UTC day."""
+    return directory / f"events-{datetime.fromtimestamp(timestamp, UTC):%Y-%m-%d}.jsonl"
+
+
+class EventLog:
+    """Append-only log of game events, one JSON object per line and one file per UTC day.
+
+    Events are buffered and appended together, every ``EVENT_FLUSH_DELAY`` seconds or ``EVENT_BATCH_SIZE`` events,
+    from a single worker thread so batches land in the order they were taken. Whatever is still buffered at exit is
+    appended before the process stops.
+    """
+
+    def __init__(
+        self, directory: Path = EVENT_DIR, batch_size: int = EVENT_BATCH_SIZE, flush_delay: float = EVENT_FLUSH_DELAY
+    ) -> None:
+        self._directory = directory
+        self._batch_size = batch_size
+        self._flush_delay = flush_delay
+        self._buffer: list[tuple[float, str]] = []
+        self._file_lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="events")
+        self._flusher: asyncio.Task | None = None
+        self.written = 0
+        self.batches = 0
+        atexit.register(self.flush_sync)
+
+    def __repr__(self) -> str:
+        return f"EventLog(Directory:{self._directory}, Buffered:{len(self._buffer)}, Written:{self.written})"
+
+    def record(self, game: int, event_type: str, **fields: object) -> None:
+        """Buffer an event of a game."""
+        timestamp = time.time()
+        event = {"t": round(timestamp, 3), "game": game, "type": event_type, **fields}
+        self._buffer.append((timestamp, json.dumps(event, separators=(",", ":"))))
+
+        if len(self._buffer) >= self._batch_size:
+            self._schedule(0)
+        else:
+            self._schedule(self._flush_delay)
+
+    def _schedule(self, delay: float) -> None:
+        """Start a flush after ``delay`` seconds, unless one is already waiting."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Outside of the bot, like in the tools, events are written at exit or on flush_sync
+            return
+
+        if self._flusher is not None and not self._flusher.done():
+            if delay > 0:
+                return
+            self._flusher.cancel()
+
+        self._flusher = loop.create_task(self._flush_later(delay), name="event-flush")
+
+    async def _flush_later(self, delay: float) -> None:
+        """Wait for more events to gather, then append them."""
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Append the buffered events without blocking the event loop."""
+        batch, self._buffer = self._buffer, []
+        if batch:
+            await asyncio.get_running_loop().run_in_executor(self._writer, self._write, batch)
+
+    def flush_sync(self) -> None:
+        """Append the buffered events from the calling thread."""
+        batch, self._buffer = self._buffer, []
+        if batch:
+            self._write(batch)
+
+    def close(self) -> None:
+        """Append the buffered events and stop the worker thread, the log records nothing after."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+        self._writer.shutdown()
+        self.flush_sync()
+        atexit.unregister(self.flush_sync)
+
+    def _write(self, batch: list[tuple[float, str]]) -> None:
+        """Append a batch of events to the files of their days."""
+        by_file: dict[Path, list[str]] = {}
+        for timestamp, line in batch:
+            by_file.setdefault(event_file(self._directory, timestamp), []).append(line)
+
+        try:
+            with self._file_lock:
+                self._directory.mkdir(parents=True, exist_ok=True)
+                for path, lines in by_file.items():
+                    with path.open("a", encoding="utf-8") as file:
+                        file.write("\n".join(lines) + "\n")
+        except OSError as e:
+            log(0, "Events", f"Could not write {len(batch)} game events: {e!s}", level="ERROR")
+            return
+
+        self.written += len(batch)
+        self.batches += 1
+
+
+def read_events(paths: list[Path]) -> Iterator[dict]:
+    """Yield the events of event files or directories of event files, in file order."""
+    files = []
+    for path in paths:
+        files.extend(sorted(path.glob("events-*.jsonl")) if path.is_dir() else [path])
+
+    for file in files:
+        with file.open(encoding="utf-8") as lines:
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
@@ -1,9 +1,21 @@
+import atexit
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import os
+import queue
+from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
 
 FORMATTER = logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
 LOG_DIR = Path("./logs")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Keep one debug record in every n of a category, for example "Game:10,Render:5"
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+LEVELS = {
+    "INFO": logging.INFO,
+    "WARN": logging.WARNING,
+    "ERROR": logging.ERROR,
+}
 
 if not Path.exists(LOG_DIR):
     Path.mkdir(LOG_DIR)
@@ -38,12 +50,88 @@ def get_file_handler(logger_name: str) -> logging.FileHandler:
     return file_handler
 
 
+@dataclass
+class LogStats:
+    """Counters of the logging queue."""
+
+    enqueued: int = 0
+    dropped: int = 0
+    sampled_out: int = 0
+    max_backlog: int = 0
+    backlog: int = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"LogStats(Enqueued:{self.enqueued}, Dropped:{self.dropped}, Sampled out:{self.sampled_out}, "
+            f"Backlog:{self.backlog}, Max backlog:{self.max_backlog})"
+        )
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that does not block the caller when the queue is full.
+
+    Debug and info records are dropped right away, warnings and errors wait up to a second for room.
+
+    Records are queued unformatted, the listener thread merges their arguments into the message. Arguments are
+    formatted when the record is written, pass values that are not mutated afterwards.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.stats = LogStats()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Queue the record as is, formatting is left to the listener thread."""
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Put a record on the queue, or count it as dropped."""
+        try:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=1)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.stats.dropped += 1
+            return
+
+        self.stats.enqueued += 1
+        self.stats.max_backlog = max(self.stats.max_backlog, self.queue.qsize())
+
+
+def parse_sampling(spec: str) -> dict[str, int]:
+    """Parse a ``Category:n,...`` sampling spec."""
+    sampling = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        category, _, every = item.partition(":")
+        sampling[category.strip()] = max(1, int(every))
+    return sampling
+
+
+SAMPLING: dict[str, int] = parse_sampling(LOG_SAMPLING)
+_sample_counts: dict[str, int] = {}
+
+
 def get_logger(logger_name: str) -> logging.Logger:
-    """Return a logger."""
+    """Return a logger.
+
+    The caller only puts records on a queue, a listener thread formats them and writes them to the console and the
+    log file.
+    """
     logger = logging.getLogger(logger_name)
     logger.setLevel(logging.DEBUG)
-    logger.addHandler(get_console_handler())
-    logger.addHandler(get_file_handler(logger_name))
+
+    queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    listener = QueueListener(
+        queue_handler.queue, get_console_handler(), get_file_handler(logger_name), respect_handler_level=True
+    )
+    listener.start()
+    # Stopping the listener writes the records still queued
+    atexit.register(listener.stop)
+    # Forked render processes inherit the queue but not the listener thread
+    os.register_at_fork(after_in_child=listener.start)
+
+    logger.addHandler(queue_handler)
     # with this pattern, it's rarely necessary to propagate the error up to parent
 
     if not logger.handlers:
@@ -58,18 +146,51 @@ def get_logger(logger_name: str) -> logging.Logger:
 LOGGER = get_logger("main")
 
 
-def log(user_id: int, log_type: str, text: str, level: str = "INFO", logger: logging.Logger = LOGGER) -> None:
-    """Log a message."""
-    text = str(user_id) + " | " + log_type + " | " + text
-
-    if level == "INFO":
-        logger.info(text)
-
-    elif level == "WARN":
-        logger.warning(text)
-
-    elif level == "ERROR":
-        logger.error(text)
-
+def logging_stats(logger: logging.Logger = LOGGER) -> LogStats:
+    """Return the counters of the logging queue of a logger."""
+    for handler in logger.handlers:
+        if isinstance(handler, DroppingQueueHandler):
+            handler.stats.backlog = handler.queue.qsize()
+            return handler.stats
+
+    return LogStats()
+
+
+def _sampled_out(log_type: str) -> bool:
+    """Return if a debug record of a category is skipped by the sampling."""
+    every = SAMPLING.get(log_type)
+    if every is None:
+        return False
+
+    count = _sample_counts.get(log_type, 0)
+    _sample_counts[log_type] = count + 1
+    return count % every != 0
+
+
+def log(
+    user_id: int,
+    log_type: str,
+    text: str,
+    *args: object,
+    level: str = "INFO",
+    logger: logging.Logger = LOGGER,
+    exc_info: bool = False,
+) -> None:
+    """Log a message.
+
+    ``text`` may hold ``%s`` placeholders for ``args``, they are only formatted if the record is kept. Debug records
+    of the categories in ``LOG_SAMPLING`` are sampled. With ``exc_info`` the traceback of the exception being handled
+    is written after the message.
+    """
+    levelno = LEVELS.get(level, logging.DEBUG)
+    if not logger.isEnabledFor(levelno):
+        return
+
+    if levelno == logging.DEBUG and _sampled_out(log_type):
+        logging_stats(logger).sampled_out += 1
+        return
+
+    if args:
+        logger.log(levelno, "%s | %s | " + text, user_id, log_type, *args, exc_info=exc_info)  # noqa: G003
     else:
-        logger.debug(text)
+        logger.log(levelno, "%s | %s | %s", user_id, log_type, text, exc_info=exc_info)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from utils.logging_utils import log
+from utils.metrics import timed
+
+if TYPE_CHECKING:
+    import disnake
+
+EDIT_RATE = int(os.getenv("EDIT_RATE", "5"))  # Edits of the messages of a channel per EDIT_PER seconds
+EDIT_PER = float(os.getenv("EDIT_PER", "5"))  # Seconds
+
+
+@dataclass
+class EditStats:
+    """Counters of an edit scheduler."""
+
+    requested: int = 0
+    sent: int = 0
+    saved: int = 0  # Updates merged into an edit that was already pending
+    failed: int = 0
+    rate_limited: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"EditStats(Requested:{self.requested}, Sent:{self.sent}, Saved:{self.saved}, Failed:{self.failed}, "
+            f"Rate limited:{self.rate_limited}, Max wait:{self.max_wait * 1000:.1f}ms)"
+        )
+
+
+class RateBucket:
+    """Sliding window of the last edits of a channel, at most ``rate`` of them in any ``per`` seconds."""
+
+    def __init__(self, rate: int, per: float) -> None:
+        self._rate = rate
+        self._per = per
+        self._sent: deque[float] = deque()
+
+    def __repr__(self) -> str:
+        return f"RateBucket(Rate:{self._rate}/{self._per}s, Recent:{len(self._sent)})"
+
+    def delay(self) -> float:
+        """Return how long to wait before the next edit fits in the window."""
+        now = time.monotonic()
+        while self._sent and self._sent[0] <= now - self._per:
+            self._sent.popleft()
+        if len(self._sent) < self._rate:
+            return 0.0
+        return self._sent[0] + self._per - now
+
+    def take(self) -> None:
+        """Count an edit sent now."""
+        self._sent.append(time.monotonic())
+
+
+@dataclass
+class PendingEdit:
+    """The updates of a message not sent yet, merged so that sending them once leaves the message as sending each."""
+
+    fields: dict[str, Any] = field(default_factory=dict)
+    waiters: list[asyncio.Future[None]] = field(default_factory=list)
+
+    def merge(self, fields: dict[str, Any]) -> None:
+        """Add newer updates, the last content and view win and new files are added to the files not sent yet."""
+        fields = fields.copy()
+        files = fields.pop("files", [])
+        if "file" in fields:
+            files = [*files, fields.pop("file")]
+        if "attachments" in fields:
+            # The attachments to keep replace the ones of the message, so files of earlier updates are dropped
+            self.fields.pop("files", None)
+        if files:
+            self.fields["files"] = [*self.fields.get("files", []), *files]
+        self.fields.update(fields)
+
+
+class EditScheduler:
+    """Per-message edit queue that merges the updates waiting to be sent and keeps to the rate limit of every channel.
+
+    An edit is sent right away when its channel's bucket allows it. While an edit of a message is being sent or waits
+    for its bucket, newer updates of the message are merged into a single pending edit, so a message gets at most one
+    edit per free slot of its channel however many updates were made. Disnake still handles the 429 responses, an
+    edit it holds back counts as being sent and the updates made meanwhile are merged too.
+    """
+
+    def __init__(self, rate: int = EDIT_RATE, per: float = EDIT_PER) -> None:
+        self._rate = rate
+        self._per = per
+        self._pending: dict[int, PendingEdit] = {}
+        self._senders: dict[int, asyncio.Task] = {}
+        self._buckets: dict[int, RateBucket] = {}
+        self._stats = EditStats()
+
+    def __repr__(self) -> str:
+        return f"EditScheduler(Pending:{len(self._pending)}, Channels:{len(self._buckets)}, {self._stats})"
+
+    @property
+    def stats(self) -> EditStats:
+        """Return the scheduler counters."""
+        return self._stats
+
+    def _submit(self, message: disnake.Message, fields: dict[str, Any]) -> PendingEdit:
+        """Merge updates into the pending edit of a message and make sure it gets sent."""
+        self._stats.requested += 1
+        pending = self._pending.get(message.id)
+        if pending is None:
+            pending = self._pending[message.id] = PendingEdit()
+        else:
+            self._stats.saved += 1
+        pending.merge(fields)
+
+        sender = self._senders.get(message.id)
+        if sender is None or sender.done():
+            self._senders[message.id] = asyncio.create_task(self._send(message), name=f"edit-{message.id}")
+        return pending
+
+    def queue(self, message: disnake.Message, **fields: Any) -> None:  # noqa: ANN401
+        """Update a message without waiting, a failed edit is logged."""
+        self._submit(message, fields)
+
+    async def edit(self, message: disnake.Message, **fields: Any) -> None:  # noqa: ANN401
+        """Update a message and wait until the edit carrying the update was sent, raising its error if it failed."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._submit(message, fields).waiters.append(waiter)
+        await waiter
+
+    async def _send(self, message: disnake.Message) -> None:
+        """Send the pending edits of a message, one at a time, each when its channel's bucket has room."""
+        bucket = self._buckets.get(message.channel.id)
+        if bucket is None:
+            bucket = self._buckets[message.channel.id] = RateBucket(self._rate, self._per)
+
+        while message.id in self._pending:
+            await self._wait_for_room(bucket)
+            pending = self._pending.pop(message.id)
+            bucket.take()
+            try:
+                with timed("discord.edit"):
+                    await message.edit(**pending.fields)
+            except Exception as e:  # noqa: BLE001
+                self._stats.failed += 1
+                log(0, "Edit", f"Editing message {message.id} failed: {e!s}", level="WARN")
+                error = e
+            else:
+                self._stats.sent += 1
+                error = None
+
+            for waiter in pending.waiters:
+                if waiter.done():
+                    continue
+                if error is None:
+                    waiter.set_result(None)
+                else:
+                    waiter.set_exception(error)
+
+        del self._senders[message.id]
+
+    async def _wait_for_room(self, bucket: RateBucket) -> None:
+        """Wait until a bucket allows another edit, updates made meanwhile are merged into the pending edit."""
+        delay = bucket.delay()
+        if delay <= 0:
+            return
+
+        self._stats.rate_limited += 1
+        start = time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = bucket.delay()
+        waited = time.monotonic() - start
+        self._stats.total_wait += waited
+        self._stats.max_wait = max(self._stats.max_wait, waited)
+
+    async def close(self) -> None:
+        """Wait for the pending edits to be sent."""
+        senders = list(self._senders.values())
+        if senders:
+            await asyncio.gather(*senders, return_exceptions=True)
+
+
+edit_scheduler = EditScheduler()
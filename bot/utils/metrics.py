@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, ParamSpec, Self, TypeVar
+
+from utils.logging_utils import LOG_DIR
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+    from types import TracebackType
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+METRICS_FILE = os.getenv("METRICS_FILE", str(LOG_DIR / "metrics.prom"))
+METRICS_INTERVAL = float(os.getenv("METRICS_INTERVAL", "15"))  # Seconds, 0 turns the export off
+METRIC_NAME = "majestic_moons_phase_seconds"
+# Upper bounds from 0.1ms to 26s, each a fourth of an octave above the last, so quantiles are within ~10%
+BUCKET_BOUNDS = tuple(0.0001 * 2 ** (i / 4) for i in range(73))
+QUANTILES = (0.5, 0.95, 0.99)
+
+_capture: ContextVar[list[tuple[str, float]] | None] = ContextVar("metrics_capture", default=None)
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram of a phase with fixed bucket bounds, the same ones Prometheus is given."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def __repr__(self) -> str:
+        p50, p95, p99 = (self.quantile(q) for q in QUANTILES)
+        return (
+            f"LatencyHistogram(Count:{self.count}, p50:{p50 * 1000:.1f}ms, p95:{p95 * 1000:.1f}ms, "
+            f"p99:{p99 * 1000:.1f}ms, Max:{self.max * 1000:.1f}ms)"
+        )
+
+    def observe(self, seconds: float) -> None:
+        """Add a sample."""
+        self.counts[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Return an estimate of a quantile, interpolated inside its bucket and capped at the largest sample."""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKET_BOUNDS[index - 1] if index else 0.0
+                upper = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+
+        return self.max
+
+
+class LatencyRegistry:
+    """Latency histograms of every timed phase, shared by the event loop and the worker threads."""
+
+    def __init__(self) -> None:
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"LatencyRegistry(Phases:{len(self._histograms)})"
+
+    def record(self, phase: str, seconds: float) -> None:
+        """Add a sample to a phase, or to the capture list when one is open."""
+        captured = _capture.get()
+        if captured is not None:
+            captured.append((phase, seconds))
+            return
+
+        with self._lock:
+            histogram = self._histograms.get(phase)
+            if histogram is None:
+                histogram = self._histograms[phase] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def merge(self, samples: list[tuple[str, float]]) -> None:
+        """Add the samples of a capture list."""
+        for phase, seconds in samples:
+            self.record(phase, seconds)
+
+    def histograms(self) -> dict[str, LatencyHistogram]:
+        """Return the histograms by phase, sorted by name."""
+        with self._lock:
+            return dict(sorted(self._histograms.items()))
+
+    def prometheus(self) -> str:
+        """Return the histograms in the Prometheus text format."""
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent in each phase of a game interaction.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        with self._lock:
+            for phase, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKET_BOUNDS, histogram.counts, strict=False):
+                    cumulative += count
+                    lines.append(f'{METRIC_NAME}_bucket{{phase="{phase}",le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'{METRIC_NAME}_bucket{{phase="{phase}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{METRIC_NAME}_sum{{phase="{phase}"}} {histogram.total:.6f}')
+                lines.append(f'{METRIC_NAME}_count{{phase="{phase}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path) -> None:
+        """Replace a file with the histograms in the Prometheus text format, readers never see half of it."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".tmp")
+        temp_path.write_text(self.prometheus(), encoding="utf-8")
+        temp_path.replace(path)
+
+    @contextmanager
+    def capture(self) -> Iterator[list[tuple[str, float]]]:
+        """Collect the samples of the current thread in a list instead of the histograms.
+
+        Used by render jobs, whose samples are merged back by the event loop, so they are kept even when the job
+        runs in another process.
+        """
+        samples: list[tuple[str, float]] = []
+        token = _capture.set(samples)
+        try:
+            yield samples
+        finally:
+            _capture.reset(token)
+
+
+METRICS = LatencyRegistry()
+
+
+class Timer:
+    """Time a block or every call of a function, sync or async, as a phase."""
+
+    __slots__ = ("_phase", "_registry", "_start")
+
+    def __init__(self, phase: str, registry: LatencyRegistry = METRICS) -> None:
+        self._phase = phase
+        self._registry = registry
+        self._start = 0.0
+
+    def __repr__(self) -> str:
+        return f"Timer(Phase:{self._phase})"
+
+    def __enter__(self) -> Self:
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self._registry.record(self._phase, time.perf_counter() - self._start)
+
+    def __call__(self, func: Callable[P, T]) -> Callable[P, T]:
+        """Time every call of a function, a new timer is used for each call so calls can overlap."""
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+                with Timer(self._phase, self._registry):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            with Timer(self._phase, self._registry):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+def timed(phase: str) -> Timer:
+    """Return a timer of a phase, usable with ``with`` or as a decorator."""
+    return Timer(phase)
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import Counter, OrderedDict
+from enum import Enum
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import random
+    from collections.abc import Iterable
+
+OPPONENT_MEMORY = int(os.getenv("OPPONENT_MEMORY", "8"))  # Stones the bot remembers at once
+OPPONENT_FORGET_MOVED = os.getenv("OPPONENT_FORGET_MOVED", "1") == "1"  # Forget the stones of the rafts that moved
+OPPONENT_BUDGET = float(os.getenv("OPPONENT_BUDGET", "20"))  # Milliseconds per decision
+DISCOUNT = 0.9  # Worth of a pair found a turn later, pairs found sooner are not left to the other player
+MAX_HORIZON = 64  # Turns looked ahead at most, a pair found later is worth less than 0.1% of one found now
+TABLE_SIZE = 200_000  # Entries of the transposition table, about 20MiB, it is cleared when full
+FIELD_BITS = 6  # Bits of every count of the table keys, boards have fewer than 64 stones
+HORIZON_BITS = 7
+
+
+class Move(Enum):
+    """The kinds of picks, the search only tells them apart by how much the player knows about the stones."""
+
+    PAIR = "pair"  # Two remembered stones with the same number
+    KNOWN_UNKNOWN = "known+unknown"  # A remembered stone and a stone never seen, which may be its pair
+    UNKNOWN_UNKNOWN = "unknown+unknown"  # Two stones never seen
+
+
+class _DeadlineError(Exception):
+    """The search ran out of its time budget."""
+
+
+class Solver:
+    """Expected pairs found by a player, discounted by turn, searched on an abstract state with a transposition table.
+
+    A state is the number of unknown stones, of remembered stones whose pair is unknown (singles), of remembered
+    pairs, the memory capacity and the turns left to look ahead. Stones are seen when picked and the oldest single is
+    forgotten first when the memory is full. The other player's turns are left out.
+    """
+
+    def __init__(self, table_size: int = TABLE_SIZE) -> None:
+        self._table: dict[int, float] = {}
+        self._table_size = table_size
+        self._deadline = float("inf")
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return f"Solver(Entries:{len(self._table)}, Hits:{self.hits}, Misses:{self.misses})"
+
+    @staticmethod
+    def moves(unknown: int, singles: int, pairs: int) -> list[Move]:
+        """Return the moves possible in a state."""
+        moves = []
+        if pairs:
+            moves.append(Move.PAIR)
+        if singles and unknown:
+            moves.append(Move.KNOWN_UNKNOWN)
+        if unknown >= 2:  # noqa: PLR2004
+            moves.append(Move.UNKNOWN_UNKNOWN)
+        return moves
+
+    @staticmethod
+    def outcomes(move: Move, unknown: int, singles: int, pairs: int) -> list[tuple[float, int, int, int, int]]:
+        """Return the probability, the pairs found and the next unknown, singles and pairs of every outcome."""
+        if move is Move.PAIR:
+            return [(1.0, 1, unknown, singles, pairs - 1)]
+
+        fresh = unknown - singles  # Unknown stones whose pair is unknown too
+        if move is Move.KNOWN_UNKNOWN:
+            return [
+                (1 / unknown, 1, unknown - 1, singles - 1, pairs),
+                ((singles - 1) / unknown, 0, unknown - 1, singles - 1, pairs + 1),
+                (fresh / unknown, 0, unknown - 1, singles + 1, pairs),
+            ]
+
+        # The first stone is the pair of a single, or fresh and then the second one may match it
+        first_single, first_fresh = singles / unknown, fresh / unknown
+        rest = unknown - 1
+        return [
+            (first_single * (singles - 1) / rest, 0, unknown - 2, singles - 2, pairs + 2),
+            (first_single * fresh / rest, 0, unknown - 2, singles, pairs + 1),
+            (first_fresh / rest, 1, unknown - 2, singles, pairs),
+            (first_fresh * singles / rest, 0, unknown - 2, singles, pairs + 1),
+            (first_fresh * (fresh - 2) / rest, 0, unknown - 2, singles + 2, pairs),
+        ]
+
+    @staticmethod
+    def key(unknown: int, singles: int, pairs: int, capacity: int, horizon: int) -> int:
+        """Return the key of a state in the transposition table, its counts packed into an integer."""
+        key = (((unknown << FIELD_BITS | singles) << FIELD_BITS | pairs) << FIELD_BITS | capacity) << HORIZON_BITS
+        return key | horizon
+
+    @staticmethod
+    def forget(unknown: int, singles: int, pairs: int, capacity: int) -> tuple[int, int, int]:
+        """Forget stones until the remembered ones fit in the capacity, singles first."""
+        while singles + 2 * pairs > capacity:
+            if singles:
+                singles -= 1
+            else:
+                pairs -= 1
+                singles += 1
+            unknown += 1
+        return unknown, singles, pairs
+
+    def expected(self, move: Move, unknown: int, singles: int, pairs: int, capacity: int, horizon: int) -> float:
+        """Return the expected pairs found by a move and the best moves of the next turns."""
+        total = 0.0
+        for probability, found, *state in self.outcomes(move, unknown, singles, pairs):
+            if probability > 0:
+                future = self.value(*self.forget(*state, capacity), capacity, horizon - 1)
+                total += probability * (found + DISCOUNT * future)
+        return total
+
+    def value(self, unknown: int, singles: int, pairs: int, capacity: int, horizon: int) -> float:
+        """Return the expected discounted pairs found in the next ``horizon`` turns when playing the best moves."""
+        if horizon == 0 or unknown + pairs == 0:
+            return 0.0
+
+        key = self.key(unknown, singles, pairs, capacity, horizon)
+        value = self._table.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        if time.perf_counter() > self._deadline:
+            raise _DeadlineError
+
+        value = max(
+            self.expected(move, unknown, singles, pairs, capacity, horizon)
+            for move in self.moves(unknown, singles, pairs)
+        )
+        if len(self._table) >= self._table_size:
+            self._table.clear()
+        self._table[key] = value
+        return value
+
+    def decide(self, unknown: int, singles: int, pairs: int, capacity: int, budget: float) -> tuple[Move, int]:
+        """Return the best move and how many turns ahead it was searched, within ``budget`` milliseconds.
+
+        The search looks one more turn ahead at a time, up to ``MAX_HORIZON`` or until the budget is spent, and keeps
+        the move of the deepest search that finished. A state already searched to the end goes there directly.
+        """
+        moves = self.moves(unknown, singles, pairs)
+        capacity = min(capacity, (1 << FIELD_BITS) - 1)
+        best, depth = moves[0], 0
+        first = MAX_HORIZON if self.key(unknown, singles, pairs, capacity, MAX_HORIZON) in self._table else 1
+        self._deadline = time.perf_counter() + budget / 1000
+        try:
+            for horizon in range(first, MAX_HORIZON + 1):
+                values = [self.expected(move, unknown, singles, pairs, capacity, horizon) for move in moves]
+                best, depth = moves[values.index(max(values))], horizon
+                self._table[self.key(unknown, singles, pairs, capacity, horizon)] = max(values)
+        except _DeadlineError:
+            pass
+        finally:
+            self._deadline = float("inf")
+
+        return best, depth
+
+
+SOLVER = Solver()  # Shared by every game, the table keeps the states of earlier decisions
+
+
+class Opponent:
+    """The bot player, it remembers a few stones and picks the move the solver expects to find the most pairs with.
+
+    Stones are known by their index in the board's stones, which follows their raft when it moves. The raft of a
+    stone is its index divided by the number of stones on a raft.
+    """
+
+    def __init__(
+        self,
+        rng: random.Random,
+        stones_per_raft: int,
+        capacity: int = OPPONENT_MEMORY,
+        *,
+        forget_moved: bool = OPPONENT_FORGET_MOVED,
+        budget: float = OPPONENT_BUDGET,
+        solver: Solver = SOLVER,
+    ) -> None:
+        self.rng = rng
+        self.stones_per_raft = stones_per_raft
+        self.capacity = capacity
+        self.forget_moved = forget_moved
+        self.budget = budget
+        self.solver = solver
+        self.known: OrderedDict[int, int] = OrderedDict()  # Number of every remembered stone, the oldest first
+        self.last_move: Move | None = None
+        self.last_depth = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"Opponent(Capacity:{self.capacity}, Known:{len(self.known)}, Last move:{self.last_move}, "
+            f"Depth:{self.last_depth})"
+        )
+
+    def raft(self, stone: int) -> int:
+        """Return the raft of a stone."""
+        return stone // self.stones_per_raft
+
+    def remember(self, stone: int, number: int) -> None:
+        """Remember the number of a stone, forgetting the oldest single first when the memory is full."""
+        self.known[stone] = number
+        self.known.move_to_end(stone)
+        while len(self.known) > self.capacity:
+            counts = Counter(self.known.values())
+            single = next((known for known, num in self.known.items() if counts[num] == 1), None)
+            self.known.pop(single if single is not None else next(iter(self.known)))
+
+    def start(self, stones: dict[int, int]) -> None:
+        """Look at the numbers of the board before it is hidden, in a random order."""
+        order = list(stones)
+        self.rng.shuffle(order)
+        for stone in order:
+            self.remember(stone, stones[stone])
+
+    def moved(self, rafts: Iterable[int]) -> None:
+        """Forget the stones of the rafts that moved, when the memory model loses track of them."""
+        if self.forget_moved:
+            rafts = set(rafts)
+            for stone in [stone for stone in self.known if self.raft(stone) in rafts]:
+                del self.known[stone]
+
+    def reveal(self, first: tuple[int, int], second: tuple[int, int], *, matched: bool) -> None:
+        """See the numbers of the two picked stones, a matched pair leaves the board."""
+        for stone, number in (first, second):
+            if matched:
+                self.known.pop(stone, None)
+            else:
+                self.remember(stone, number)
+
+    def pick(self, hidden: list[int]) -> tuple[int, int]:
+        """Return two stones on different rafts among the ones not found yet."""
+        hidden_set = set(hidden)
+        for stone in [stone for stone in self.known if stone not in hidden_set]:
+            del self.known[stone]
+
+        by_number: dict[int, list[int]] = {}
+        for stone, number in self.known.items():
+            by_number.setdefault(number, []).append(stone)
+        pairs = [stones for stones in by_number.values() if len(stones) == 2]  # noqa: PLR2004
+        singles = [stones[0] for stones in by_number.values() if len(stones) == 1]
+        unknown = [stone for stone in hidden if stone not in self.known]
+
+        self.last_move, self.last_depth = self.solver.decide(
+            len(unknown), len(singles), len(pairs), self.capacity, self.budget
+        )
+        if self.last_move is Move.PAIR:
+            return pairs[0][0], pairs[0][1]
+
+        if self.last_move is Move.KNOWN_UNKNOWN:
+            candidates = [stone for stone in unknown if self.raft(stone) != self.raft(singles[0])]
+            if candidates:
+                return singles[0], self.rng.choice(candidates)
+
+        first = self.rng.choice(unknown or hidden)
+        candidates = [stone for stone in unknown if self.raft(stone) != self.raft(first)]
+        candidates = candidates or [stone for stone in hidden if self.raft(stone) != self.raft(first)]
+        return first, self.rng.choice(candidates)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+RENDER_CACHE_BYTES = int(os.getenv("RENDER_CACHE_BYTES", "0"))  # Bytes, 0 disables the cache
+
+
+@dataclass
+class RenderCacheStats:
+    """Counters of a render cache."""
+
+    hits: int = 0
+    misses: int = 0
+    stored: int = 0
+    evicted: int = 0
+    too_large: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the share of lookups that found their image."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"RenderCacheStats(Hits:{self.hits}, Misses:{self.misses}, Hit rate:{self.hit_rate:.1%}, "
+            f"Stored:{self.stored}, Evicted:{self.evicted}, Too large:{self.too_large})"
+        )
+
+
+class RenderCache:
+    """Encoded board images by the hash of what they show, the least recently used are dropped over the budget.
+
+    Boards that look the same share an entry, whichever game they belong to. The memory of an entry is the size of its
+    key and image objects.
+    """
+
+    def __init__(self, budget: int = RENDER_CACHE_BYTES) -> None:
+        self._budget = budget
+        self._images: OrderedDict[bytes, bytes] = OrderedDict()
+        self._memory = 0
+        self._lock = threading.Lock()
+        self._stats = RenderCacheStats()
+
+    def __repr__(self) -> str:
+        return (
+            f"RenderCache(Entries:{len(self._images)}, Memory:{self._memory / 1024:.1f}KiB, "
+            f"Budget:{self._budget / 1024:.0f}KiB, {self._stats})"
+        )
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    @property
+    def enabled(self) -> bool:
+        """Return if images can be cached at all."""
+        return self._budget > 0
+
+    @property
+    def memory(self) -> int:
+        """Return the bytes held by the cached images and their keys."""
+        return self._memory
+
+    @property
+    def stats(self) -> RenderCacheStats:
+        """Return the cache counters."""
+        return self._stats
+
+    @staticmethod
+    def _entry_size(key: bytes, image: bytes) -> int:
+        """Return the memory of an entry."""
+        return sys.getsizeof(key) + sys.getsizeof(image)
+
+    def get(self, key: bytes) -> bytes | None:
+        """Return the image of a key, or None if it is not cached."""
+        with self._lock:
+            image = self._images.get(key)
+            if image is None:
+                self._stats.misses += 1
+                return None
+
+            self._images.move_to_end(key)
+            self._stats.hits += 1
+            return image
+
+    def put(self, key: bytes, image: bytes) -> None:
+        """Cache an image, dropping the least recently used ones until the cache fits in its budget."""
+        size = self._entry_size(key, image)
+        with self._lock:
+            if size > self._budget:
+                self._stats.too_large += 1
+                return
+
+            previous = self._images.pop(key, None)
+            if previous is not None:
+                self._memory -= self._entry_size(key, previous)
+            self._images[key] = image
+            self._memory += size
+            self._stats.stored += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop the least recently used images until the cache fits in its budget, the lock must be held."""
+        while self._memory > self._budget:
+            old_key, old_image = self._images.popitem(last=False)
+            self._memory -= self._entry_size(old_key, old_image)
+            self._stats.evicted += 1
+
+    def resize(self, budget: int) -> None:
+        """Change the budget of the cache, dropping the least recently used images that no longer fit."""
+        with self._lock:
+            self._budget = budget
+            self._evict()
+
+    def clear(self) -> None:
+        """Drop every image."""
+        with self._lock:
+            self._images.clear()
+            self._memory = 0
+
+
+render_cache = RenderCache()
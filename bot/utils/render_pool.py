@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, ParamSpec, TypeVar
+
+from utils.logging_utils import log
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+RENDER_EXECUTOR = os.getenv("RENDER_EXECUTOR", "thread")  # "thread" or "process"
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+RENDER_QUEUE_SIZE = int(os.getenv("RENDER_QUEUE_SIZE", "16"))
+
+
+@dataclass
+class RenderPoolStats:
+    """Counters of a render pool."""
+
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    throttled: int = 0
+    max_queue_depth: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    total_run: float = 0.0
+
+    @property
+    def avg_wait(self) -> float:
+        """Return the average time a job waited for a worker."""
+        done = self.completed + self.failed
+        return self.total_wait / done if done else 0.0
+
+    @property
+    def avg_run(self) -> float:
+        """Return the average time a job ran on a worker."""
+        done = self.completed + self.failed
+        return self.total_run / done if done else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"RenderPoolStats(Submitted:{self.submitted}, Completed:{self.completed}, Failed:{self.failed}, "
+            f"Throttled:{self.throttled}, Max queue:{self.max_queue_depth}, "
+            f"Avg wait:{self.avg_wait * 1000:.1f}ms, Max wait:{self.max_wait * 1000:.1f}ms, "
+            f"Avg run:{self.avg_run * 1000:.1f}ms)"
+        )
+
+
+class RenderPool:
+    """Bounded executor that runs blocking render jobs off the event loop.
+
+    At most ``workers`` jobs run at once and at most ``queue_size`` more wait for a worker.
+    Any further job is held back until a queue slot frees up.
+    """
+
+    def __init__(
+        self, workers: int = RENDER_WORKERS, queue_size: int = RENDER_QUEUE_SIZE, *, processes: bool = False
+    ) -> None:
+        self._workers = workers
+        self._queue_size = queue_size
+        self._processes = processes
+        self._executor: Executor = (
+            ProcessPoolExecutor(max_workers=workers)
+            if processes
+            else ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render")
+        )
+        self._slots = asyncio.Semaphore(workers)
+        self._admission = asyncio.Semaphore(workers + queue_size)
+        self._queued = 0
+        self._running = 0
+        self._stats = RenderPoolStats()
+
+    def __repr__(self) -> str:
+        kind = "process" if self._processes else "thread"
+        return (
+            f"RenderPool({kind}, Workers:{self._workers}, Queue size:{self._queue_size}, "
+            f"Queued:{self._queued}, Running:{self._running})"
+        )
+
+    @property
+    def processes(self) -> bool:
+        """Return if the jobs run in other processes, on copies of their arguments."""
+        return self._processes
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of jobs waiting for a worker."""
+        return self._queued
+
+    @property
+    def running(self) -> int:
+        """Return the number of jobs currently running."""
+        return self._running
+
+    @property
+    def stats(self) -> RenderPoolStats:
+        """Return the pool counters."""
+        return self._stats
+
+    async def run(self, func: Callable[P, T], *args: P.args) -> T:
+        """Run ``func(*args)`` on a worker and return its result.
+
+        With a process pool, ``func`` and its arguments must be picklable.
+        """
+        self._stats.submitted += 1
+        submitted_at = time.perf_counter()
+
+        if self._admission.locked():
+            self._stats.throttled += 1
+            log(0, "Render", f"Render queue full, waiting for a slot - {self}", level="WARN")
+
+        async with self._admission:
+            self._queued += 1
+            self._stats.max_queue_depth = max(self._stats.max_queue_depth, self._queued)
+            try:
+                await self._slots.acquire()
+            finally:
+                self._queued -= 1
+
+            started_at = time.perf_counter()
+            wait = started_at - submitted_at
+            self._stats.total_wait += wait
+            self._stats.max_wait = max(self._stats.max_wait, wait)
+
+            self._running += 1
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+            except Exception:
+                self._stats.failed += 1
+                raise
+            else:
+                self._stats.completed += 1
+            finally:
+                self._running -= 1
+                self._stats.total_run += time.perf_counter() - started_at
+                self._slots.release()
+
+        return result
+
+    def shutdown(self) -> None:
+        """Stop the workers once the running jobs are done."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_render_pool: RenderPool | None = None
+
+
+def get_render_pool() -> RenderPool:
+    """Return the process-wide render pool, creating it on first use."""
+    global _render_pool  # noqa: PLW0603
+
+    if _render_pool is None:
+        _render_pool = RenderPool(processes=RENDER_EXECUTOR == "process")
+        log(0, "Render", f"Render pool started - {_render_pool}")
+
+    return _render_pool
+
+
+def shutdown_render_pool() -> None:
+    """Stop the process-wide render pool, the next render starts a new one."""
+    global _render_pool  # noqa: PLW0603
+
+    if _render_pool is not None:
+        _render_pool.shutdown()
+        log(0, "Render", f"Render pool stopped - {_render_pool.stats}")
+        _render_pool = None
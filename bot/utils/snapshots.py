@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from utils.logging_utils import log
+
+if TYPE_CHECKING:
+    from utils.database import DatabasePool
+
+SNAPSHOT_FLUSH_DELAY = float(os.getenv("SNAPSHOT_FLUSH_DELAY", "1"))  # Seconds
+SNAPSHOT_TTL = int(os.getenv("SNAPSHOT_TTL", "604800"))  # Seconds
+SNAPSHOT_WRITE_TARGET = 0.05  # Seconds, a slower flush is logged
+REHYDRATE_TARGET = 0.05  # Seconds, a slower load is logged
+
+# Closes of stores still writing their snapshots, like the store of an unloaded cog
+_closing: set[asyncio.Task] = set()
+
+
+@dataclass
+class SnapshotStats:
+    """Counters of a snapshot store."""
+
+    saved: int = 0
+    written: int = 0
+    flushes: int = 0
+    bytes_written: int = 0
+    total_flush: float = 0.0
+    max_flush: float = 0.0
+    loaded: int = 0
+    missing: int = 0
+    total_load: float = 0.0
+    max_load: float = 0.0
+
+    @property
+    def avg_flush(self) -> float:
+        """Return the average time a flush took."""
+        return self.total_flush / self.flushes if self.flushes else 0.0
+
+    @property
+    def avg_load(self) -> float:
+        """Return the average time a snapshot took to load."""
+        return self.total_load / self.loaded if self.loaded else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"SnapshotStats(Saved:{self.saved}, Written:{self.written}, Flushes:{self.flushes}, "
+            f"Bytes:{self.bytes_written}, Avg flush:{self.avg_flush * 1000:.1f}ms, "
+            f"Max flush:{self.max_flush * 1000:.1f}ms, Loaded:{self.loaded}, Missing:{self.missing}, "
+            f"Avg load:{self.avg_load * 1000:.1f}ms, Max load:{self.max_load * 1000:.1f}ms)"
+        )
+
+
+class SnapshotStore:
+    """Game snapshots kept in the bot's SQLite database, so games survive a restart.
+
+    Saves are held in memory for ``SNAPSHOT_FLUSH_DELAY`` seconds and then written together in a single statement,
+    only the latest snapshot of every game is written. Snapshots older than ``SNAPSHOT_TTL`` seconds are pruned.
+    Flushes and deletes take turns, so the snapshot of a finished game is never written back after it was deleted.
+    A store reads and writes only after the stores closed before it was created wrote their snapshots.
+    """
+
+    def __init__(self, db: DatabasePool, flush_delay: float = SNAPSHOT_FLUSH_DELAY, ttl: int = SNAPSHOT_TTL) -> None:
+        self._db = db
+        self._flush_delay = flush_delay
+        self._ttl = ttl
+        self._pending: dict[int, bytes] = {}
+        self._writing: dict[int, bytes] = {}  # Snapshots of the flush being written
+        self._lock = asyncio.Lock()
+        self._flusher: asyncio.Task | None = None
+        self._ready = False
+        self._after = set(_closing)
+        self._stats = SnapshotStats()
+
+    def __repr__(self) -> str:
+        return f"SnapshotStore(Pending:{len(self._pending)}, {self._stats})"
+
+    @property
+    def stats(self) -> SnapshotStats:
+        """Return the store counters."""
+        return self._stats
+
+    async def _ensure_table(self) -> None:
+        """Create the snapshot table on first use, once the stores closed before this one are written."""
+        if not self._ready:
+            if self._after:
+                await asyncio.wait(self._after)
+                self._after = set()
+            await self._db.execute(
+                "CREATE TABLE IF NOT EXISTS game_snapshots "
+                "(msg_id INTEGER PRIMARY KEY, snapshot BLOB NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._ready = True
+
+    def save(self, msg_id: int, snapshot: bytes) -> None:
+        """Queue the snapshot of a game, replacing any snapshot of it not written yet."""
+        self._pending[msg_id] = snapshot
+        self._stats.saved += 1
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later(), name="snapshot-flush")
+
+    async def _flush_later(self) -> None:
+        """Wait for more saves to gather, then write them, until none are left."""
+        while self._pending:
+            await asyncio.sleep(self._flush_delay)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write the queued snapshots, they are queued again if writing them failed."""
+        async with self._lock:
+            if not self._pending:
+                return
+
+            pending, self._pending = self._pending, {}
+            self._writing = pending
+            now = time.time()
+            start = time.perf_counter()
+            try:
+                await self._ensure_table()
+                await self._db.executemany(
+                    "INSERT OR REPLACE INTO game_snapshots VALUES (?, ?, ?)",
+                    [(msg_id, snapshot, now) for msg_id, snapshot in pending.items()],
+                )
+            except asyncio.CancelledError:
+                self._pending = pending | self._pending
+                raise
+            except Exception as e:  # noqa: BLE001
+                # Snapshots saved meanwhile are newer than the ones that failed
+                self._pending = pending | self._pending
+                log(0, "Snapshot", f"Writing {len(pending)} snapshots failed: {e!s}", level="ERROR")
+                return
+            finally:
+                self._writing = {}
+            flush_time = time.perf_counter() - start
+
+        self._stats.written += len(pending)
+        self._stats.flushes += 1
+        self._stats.bytes_written += sum(len(snapshot) for snapshot in pending.values())
+        self._stats.total_flush += flush_time
+        self._stats.max_flush = max(self._stats.max_flush, flush_time)
+        if flush_time > SNAPSHOT_WRITE_TARGET:
+            log(0, "Snapshot", f"Writing {len(pending)} snapshots took {flush_time * 1000:.1f}ms", level="WARN")
+
+    async def load(self, msg_id: int) -> bytes | None:
+        """Return the latest snapshot of a game, or None if it has none."""
+        start = time.perf_counter()
+        snapshot = self._pending.get(msg_id) or self._writing.get(msg_id)
+        if snapshot is None:
+            await self._ensure_table()
+            snapshot = await self._db.fetchval(
+                "SELECT snapshot FROM game_snapshots WHERE msg_id = ?", msg_id, cache=False
+            )
+        load_time = time.perf_counter() - start
+
+        if snapshot is None:
+            self._stats.missing += 1
+            return None
+
+        self._stats.loaded += 1
+        self._stats.total_load += load_time
+        self._stats.max_load = max(self._stats.max_load, load_time)
+        if load_time > REHYDRATE_TARGET:
+            log(0, "Snapshot", f"Loading the snapshot of game {msg_id} took {load_time * 1000:.1f}ms", level="WARN")
+        return bytes(snapshot)
+
+    async def delete(self, msg_id: int) -> None:
+        """Forget the snapshot of a finished game, after the flush writing it if there is one."""
+        async with self._lock:
+            self._pending.pop(msg_id, None)
+            await self._ensure_table()
+            await self._db.execute("DELETE FROM game_snapshots WHERE msg_id = ?", msg_id)
+
+    async def prune(self) -> None:
+        """Delete the snapshots of the games nobody played for longer than the TTL."""
+        await self._ensure_table()
+        await self._db.execute("DELETE FROM game_snapshots WHERE updated_at < ?", time.time() - self._ttl)
+
+    async def close(self) -> None:
+        """Write the queued snapshots now."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+    def close_soon(self) -> None:
+        """Write the queued snapshots in the background, for callers that cannot wait like a cog unloading."""
+        task = asyncio.get_event_loop().create_task(self.close(), name="snapshot-close")
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
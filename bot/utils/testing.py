@@ -0,0 +1,236 @@
+"""Boards, fakes, reference implementations and measures shared by the tests and the benchmarks."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+import tracemalloc
+import types
+from typing import TYPE_CHECKING
+
+from cogs.chess import Board, GameDifficulty, GameFlow, NumberStatus, Player
+from utils.message_edits import EditScheduler, RateBucket
+from utils.opponent import Opponent
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from cogs.chess import ActiveTile, Dot
+
+PAIR_PICK_CHANCE = 0.5  # Share of the random picks that go for a known pair
+
+
+def make_board(difficulty: GameDifficulty, seed: int | None = None) -> Board:
+    """Deal a board without a Discord message or members, its seed is drawn from ``random`` when not given."""
+    board = Board(0, difficulty.value, [Player(user=None), Player(user=None, bot=True)], seed=seed)
+    board.make_tiles()
+    return board
+
+
+def play_turn(board: Board) -> None:
+    """Find the first remaining pair, like a matched turn, then move a raft."""
+    seen: dict[int, tuple[int, int]] = {}
+    for tile in board.active_tiles:
+        for position, dot in enumerate(tile.dots_not_found):
+            if dot.num in seen and seen[dot.num][0] != tile.num:
+                board.set_dot_found(*seen[dot.num])
+                board.set_dot_found(tile.num, tile.dots_not_found.index(dot))
+                board.move_tiles()
+                return
+            seen.setdefault(dot.num, (tile.num, position))
+
+    board.move_tiles()
+
+
+def play_rendered_game(
+    difficulty: GameDifficulty, seed: int, flow: GameFlow | None = None
+) -> list[tuple[NumberStatus, Board]]:
+    """Play a game against the bot, return a copy of the board at every render the cog makes, with its visibility.
+
+    The user is played by a second bot with its own memory. The turns are played through ``flow`` when given.
+    """
+    board = make_board(difficulty, seed)
+    if flow is None:
+        flow = GameFlow()
+    flow.bot_opponent(board).start(board.hidden_stones)
+    user = Opponent(random.Random(-seed), board.num_stones)  # noqa: S311
+    user.start(board.hidden_stones)
+    renders = [(NumberStatus.VISIBLE, board.copy()), (NumberStatus.HIDDEN, board.copy())]
+    while not board.all_found:
+        if board.current_player.bot:
+            flow.bot_turn(board)
+        else:
+            first, second = user.pick(list(board.hidden_stones))
+            (tile1_num, dot1_num), (tile2_num, dot2_num) = board.locate(first), board.locate(second)
+            matched, dot_1, dot_2 = board.match_dots(tile1_num, dot1_num, tile2_num, dot2_num)
+            user.reveal((first, dot_1.num), (second, dot_2.num), matched=matched)
+            flow.end_turn(board, (tile1_num, dot1_num, tile2_num, dot2_num), matched=matched)
+        renders.append((NumberStatus.HIDDEN, board.copy()))
+
+    return renders
+
+
+async def measure_peak(consume: Callable[[], Awaitable[int]]) -> tuple[int, int]:
+    """Return the rows read by a query and the peak memory allocated while reading them."""
+    tracemalloc.start()
+    try:
+        rows = await consume()
+        return rows, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def legacy_dots_not_found(tile: ActiveTile) -> list[Dot]:
+    """Return the dots not found of a tile by scanning all of them, like boards did before the pair index."""
+    return [dot for dot in tile if not dot.found]
+
+
+def legacy_match(board: Board, tile1_num: int, dot1_num: int, tile2_num: int, dot2_num: int) -> tuple[bool, Dot, Dot]:
+    """Match two picked dots like boards did before the pair index."""
+    dot_1 = legacy_dots_not_found(board[tile1_num])[dot1_num]
+    dot_2 = legacy_dots_not_found(board[tile2_num])[dot2_num]
+    if dot_1 == dot_2:
+        legacy_dots_not_found(board[tile1_num])[dot1_num].found = True
+        legacy_dots_not_found(board[tile2_num])[dot2_num].found = True
+        return True, dot_1, dot_2
+
+    return False, dot_1, dot_2
+
+
+def legacy_all_found(board: Board) -> bool:
+    """Return if the game is won by scanning every dot, like boards did before the pair index."""
+    return all(dot.found for tile in board.active_tiles for dot in tile)
+
+
+def random_picks(board: Board, rng: random.Random) -> tuple[int, int, int, int]:
+    """Pick two dots on different rafts like a player, half of the time a matching pair found with the index."""
+    tile1, tile2 = rng.sample([tile.num for tile in board.active_tiles if not tile.all_found], 2)
+    dot1 = rng.randrange(len(board[tile1].dots_not_found))
+    if rng.random() < PAIR_PICK_CHANCE:
+        pair_tile, pair_dot = board.find_pair(tile1, dot1)
+        if pair_tile != tile1:
+            return tile1, dot1, pair_tile, pair_dot
+    return tile1, dot1, tile2, rng.randrange(len(board[tile2].dots_not_found))
+
+
+class FakeChannel:
+    """A channel that counts the edits Discord would have refused with a 429."""
+
+    def __init__(self, channel_id: int, rate: int, per: float) -> None:
+        self.id = channel_id
+        self.rate = rate
+        self.per = per
+        self.recent: list[float] = []
+        self.refused = 0
+
+    def __repr__(self) -> str:
+        return f"FakeChannel(ID:{self.id}, Refused:{self.refused})"
+
+    def send(self) -> None:
+        """Count an edit arriving now."""
+        now = time.monotonic()
+        # A little slack, the scheduler and this window read the clock at slightly different times
+        self.recent = [sent for sent in self.recent if sent > now - self.per * 0.99]
+        self.refused += len(self.recent) >= self.rate
+        self.recent.append(now)
+
+
+class FakeMessage:
+    """The part of ``disnake.Message`` the edit scheduler uses, it keeps every state the message went through."""
+
+    def __init__(self, message_id: int, channel: FakeChannel, latency: float) -> None:
+        self.id = message_id
+        self.channel = channel
+        self.latency = latency
+        self.content: str | None = None
+        self.view: str | None = None
+        self.attachments: list[str] = []
+        self.history: list[tuple[str | None, str | None, tuple[str, ...]]] = []
+
+    def __repr__(self) -> str:
+        return f"FakeMessage(ID:{self.id}, Edits:{len(self.history)})"
+
+    async def edit(self, **fields: object) -> None:
+        """Apply an edit after the latency of a request, like ``disnake.Message.edit`` does."""
+        self.channel.send()
+        await asyncio.sleep(self.latency)
+        self.content = fields.get("content", self.content)
+        self.view = fields.get("view", self.view)
+        if "attachments" in fields:
+            self.attachments = list(fields["attachments"])
+        files = [*fields.get("files", []), *([fields["file"]] if "file" in fields else [])]
+        self.attachments += [file.filename for file in files]
+        self.history.append((self.content, self.view, tuple(self.attachments)))
+
+
+async def play_edits(
+    message: FakeMessage,
+    turns: int,
+    edit: Callable[..., Awaitable[None]],
+    queue: Callable[..., Awaitable[None]],
+    think: float,
+) -> None:
+    """Make the updates of the turns of a game against the bot, with the waits of ``MainView.play_turn``.
+
+    A burst of random updates not waited for follows, to go through every way updates are merged.
+    """
+    for turn in range(turns):
+        await queue(message, view=f"Picking {turn}")
+        await asyncio.sleep(think)
+        if turn % 3 == 0:
+            await edit(message, content=f"Matched {turn}", view=f"Picking {turn}")
+            await asyncio.sleep(think)
+        image = types.SimpleNamespace(filename=f"{turn}.gif")
+        await edit(message, content=f"Moved {turn}", view=f"Moved {turn}", file=image, attachments=[])
+        await asyncio.sleep(think)
+        bot_image = types.SimpleNamespace(filename=f"{turn}-bot.gif")
+        await edit(message, content=f"Bot {turn}", view="Bot", file=bot_image, attachments=[])
+        await asyncio.sleep(think)
+        await queue(message, content="Play", view="Play")
+
+    rng = random.Random(message.id)  # noqa: S311
+    for update in range(turns * 4):
+        fields = rng.choice(
+            (
+                {"content": f"Burst {update}"},
+                {"view": f"Burst {update}"},
+                {"file": types.SimpleNamespace(filename=f"burst-{update}.gif")},
+                {"file": types.SimpleNamespace(filename=f"burst-{update}.gif"), "attachments": []},
+                {"attachments": []},
+            )
+        )
+        await queue(message, **fields)
+
+
+async def play_edit_games(
+    games: int, turns: int, channels: int, *, scheduled: bool, rate: int, per: float
+) -> tuple[list[FakeMessage], list[FakeChannel], EditScheduler | None]:
+    """Play games on fake messages, every edit sent through a scheduler or waited for and sent one by one."""
+    fake_channels = [FakeChannel(channel, rate, per) for channel in range(channels)]
+    messages = [FakeMessage(game, fake_channels[game % channels], latency=per / 20) for game in range(games)]
+    think = per / 2
+    if scheduled:
+        scheduler = EditScheduler(rate, per)
+        edit = scheduler.edit
+
+        async def queue(message: FakeMessage, **fields: object) -> None:
+            scheduler.queue(message, **fields)
+    else:
+        scheduler = None
+        # Every edit waited for and sent, like before, disnake keeps to the rate limit by waiting
+        buckets = [RateBucket(rate, per) for _ in range(channels)]
+
+        async def edit(message: FakeMessage, **fields: object) -> None:
+            bucket = buckets[message.channel.id]
+            while (delay := bucket.delay()) > 0:
+                await asyncio.sleep(delay)
+            bucket.take()
+            await message.edit(**fields)
+
+        queue = edit
+
+    await asyncio.gather(*(play_edits(message, turns, edit, queue, think) for message in messages))
+    if scheduler is not None:
+        await scheduler.close()
+    return messages, fake_channels, scheduler